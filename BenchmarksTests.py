@@ -0,0 +1,26 @@
+# This file contains tests for the benchmark suite's report and regression check.
+import json
+import unittest
+from benchmarks import run, regressions
+
+
+class BenchmarksTests(unittest.TestCase):
+
+    def test_run_writes_every_benchmark_as_json(self):
+        report = json.loads(json.dumps(run(scale=0.001)))
+        self.assertEqual(set(report["results"]),
+                         {"move_piece", "reserved_move", "check_location", "check_on_board",
+                          "tile_remove_bottom", "apply_moves", "move_piece_batch",
+                          "random_games", "game_memory",
+                          "board_6", "board_12", "board_20", "board_32"})
+
+    def test_regressions_compare_in_the_right_direction(self):
+        old = {"results": {"move_piece": {"ns_per_op": 100.0},
+                           "random_games": {"games_per_second": 10.0}}}
+        new = {"results": {"move_piece": {"ns_per_op": 150.0},
+                           "random_games": {"games_per_second": 20.0}}}
+        self.assertEqual(regressions(new, old, 0.1), [("move_piece", "ns_per_op", 1.5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# This file contains tests for the memory-mapped opening book.
+import os
+import tempfile
+import unittest
+from FocusGame import FocusGame
+from book import build, book_key, OpeningBook
+from engine import Engine
+from mcts import MCTS
+from server import GameHost
+
+
+class BookTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        cls.size = build(cls.path, plies=1, depth=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def setUp(self):
+        self.book = OpeningBook(self.path)
+        self.g = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True)
+
+    def tearDown(self):
+        self.book.close()
+
+    def test_book_holds_one_entry_per_symmetric_class(self):
+        self.assertEqual(self.size, 31)
+        self.assertEqual(len(self.book), 31)
+        self.assertEqual(self.book.get_rules(), (6, 5, 6))
+        keys = [self.book.entry(index)[0] for index in range(len(self.book))]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_lookup_matches_search_in_every_symmetric_position(self):
+        result = Engine().search(self.g, 10000, max_depth=2)
+        self.assertEqual(self.book.lookup(self.g)[1], result.get_score())
+        for move in self.g.legal_moves("PlayerA"):
+            token = self.g.make_move(move)
+            found = self.book.lookup(self.g)
+            self.assertIn(found[0], self.g.legal_moves("PlayerB"))
+            self.g.unmake_move(token)
+
+    def test_positions_outside_the_book_are_not_found(self):
+        for move in (((0, 0), (0, 1), 1), ((1, 0), (1, 1), 1)):
+            self.g.make_move(move)
+        self.assertIsNone(self.book.find(book_key(self.g)[0] ^ 1))
+        self.assertIsNone(self.book.lookup(self.g))
+        other = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True, 6, 5, 7)
+        self.assertIsNone(self.book.lookup(other))
+
+    def test_engines_and_hints_consult_the_book(self):
+        result = Engine(book=self.book).search(self.g, 10000)
+        self.assertEqual((result.get_move(), result.get_depth(), result.get_nodes()),
+                         (self.book.lookup(self.g)[0], 0, 0))
+        self.assertEqual(MCTS(workers=1, book=self.book).search(self.g, 10).get_move(),
+                         result.get_move())
+        host = GameHost(self.book)
+        game_id = host.handle({"op": "new", "p1": ["PlayerA", "R"],
+                               "p2": ["PlayerB", "G"]})["game"]
+        self.assertEqual(host.handle({"op": "hint", "game": game_id}),
+                         {"ok": True, "result": result.get_move()})
+        bookless = GameHost()
+        game_id = bookless.handle({"op": "new", "p1": ["PlayerA", "R"],
+                                   "p2": ["PlayerB", "G"]})["game"]
+        self.assertEqual(bookless.handle({"op": "hint", "game": game_id}),
+                         {"ok": True, "result": None})
+
+    def test_other_files_are_refused(self):
+        with open(self.path + ".bad", "wb") as stream:
+            stream.write(b"FBOK" + bytes(20))
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path + ".bad")
+        os.remove(self.path + ".bad")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# This file contains tests for the SQLite game database.
+import io
+import unittest
+from FocusGame import FocusGame
+from database import GameDatabase, random_games
+from records import RecordWriter, read_games
+
+P1, P2 = ("PlayerA", "R"), ("PlayerB", "G")
+
+
+class DatabaseTests(unittest.TestCase):
+
+    def setUp(self):
+        self.games = list(random_games(40, seed=2, max_plies=80))
+        self.db = GameDatabase(":memory:")
+        self.db.ingest(self.games, batch=15)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_games_round_trip_and_every_position_is_indexed(self):
+        self.assertEqual(self.db.count_games(), 40)
+        self.assertEqual(self.db.count_positions(),
+                         sum(len(moves) + 1 for _, _, moves, _ in self.games))
+        for game_id in (1, 17, 40):
+            self.assertEqual(self.db.get_game(game_id), self.games[game_id - 1])
+        self.assertIsNone(self.db.get_game(41))
+
+    def test_start_position_lookups_cover_every_game(self):
+        start = FocusGame(P1, P2, quiet=True)
+        self.assertEqual(self.db.find_games(start, limit=5), [(i, 0) for i in range(1, 6)])
+        outcomes = self.db.outcomes(start)
+        self.assertEqual(sum(outcomes.values()), 40)
+        self.assertEqual(outcomes["p1"], sum(winner == "PlayerA" for *_, winner in self.games))
+        moves = self.db.next_moves(start)
+        self.assertEqual(sum(moves.values()), 40)
+        self.assertEqual(list(moves.values()), sorted(moves.values(), reverse=True))
+        self.assertTrue(set(moves) <= set(start.legal_moves("PlayerA")))
+
+    def test_later_position_finds_the_game_that_reached_it(self):
+        moves = self.games[6][2]
+        game = FocusGame(P1, P2, quiet=True)
+        for move in moves[:9]:
+            game.make_move(move)
+        self.assertIn((7, 9), self.db.find_games(game))
+        self.assertIn(moves[9], self.db.next_moves(game))
+
+    def test_ingest_reads_records_and_keeps_rules(self):
+        stream = io.BytesIO()
+        with RecordWriter(stream) as writer:
+            for p1, p2, moves, winner in self.games[:3]:
+                writer.write_game(p1, p2, moves, winner)
+        stream.seek(0)
+        self.assertEqual(self.db.ingest(read_games(stream)), 3)
+        self.assertEqual(self.db.get_game(43), self.games[2])
+        with self.assertRaises(ValueError):
+            self.db.outcomes(FocusGame(P1, P2, True, 8, 5, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
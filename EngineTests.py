@@ -0,0 +1,48 @@
+# This file contains tests for the alpha-beta Engine.
+import unittest
+from FocusGame import FocusGame
+from engine import Engine, WIN_SCORE, best_move
+
+
+class EngineTests(unittest.TestCase):
+
+    def setUp(self):
+        # player1 to move with 5 captures and a green piece at the bottom of a full stack
+        self.g = FocusGame(("player1", "r"), ("player2", "g"))
+        self.g._p1.change_reserves(2)
+        self.g._p2.change_reserves(2)
+        self.g._p1.change_captured(5)
+        self.g._hash = self.g.compute_hash()
+        for name in ('player1', 'player2', 'player1', 'player2'):
+            self.g.reserved_move(name, (1, 0))
+
+    def test_engine_finds_winning_capture(self):
+        result = Engine().search(self.g, 200)
+        token = self.g.make_move(result.get_move())
+        self.assertTrue(self.g.check_win('player1'))
+        self.g.unmake_move(token)
+        self.assertEqual(result.get_score(), WIN_SCORE - 1)
+
+    def test_search_leaves_game_unchanged(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        before = (g.get_hash(), g.to_bytes(), g.get_turn())
+        Engine().search(g, 100, max_depth=3)
+        self.assertEqual((g.get_hash(), g.to_bytes(), g.get_turn()), before)
+
+    def test_search_reports_depth_nodes_and_principal_variation(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        result = Engine().search(g, 10000, max_depth=2)
+        self.assertEqual(result.get_depth(), 2)
+        self.assertGreater(result.get_nodes(), 0)
+        self.assertEqual(result.get_pv()[0], result.get_move())
+        self.assertIn(result.get_move(), g.legal_moves('player1'))
+
+    def test_search_stops_near_time_limit(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        result = Engine().search(g, 50)
+        self.assertLess(result.get_elapsed_ms(), 1000)
+        self.assertIn(best_move(g, 10), g.legal_moves('player1'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+# This file contains tests for the move log and crash recovery.
+import os
+import random
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from FocusGame import FocusGame
+from eventlog import GameLog, recover, compact, read_records, replay, CHECKPOINT, MOVE, CLOSE
+from server import GameHost
+
+P1, P2 = ("PlayerA", "R"), ("PlayerB", "G")
+
+
+def play(game, moves, rng):
+    # makes moves random legal moves in game through move_piece/reserved_move
+    for _ in range(moves):
+        name = game.get_turn()
+        start, destination, num_of_pieces = rng.choice(game.legal_moves(name))
+        if start is None:
+            game.reserved_move(name, destination)
+        else:
+            game.move_piece(name, start, destination, num_of_pieces)
+
+
+class EventLogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.log")
+        self.rng = random.Random(4)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def kinds(self):
+        with open(self.path, "rb") as stream:
+            return [(kind, game_id) for _, kind, game_id, _ in read_records(stream.read())]
+
+    def test_checkpoint_every_n_moves_and_tail_replay(self):
+        games = {1: FocusGame(P1, P2, True), 2: FocusGame(P1, P2, True, 8, 5, 6)}
+        with GameLog(self.path, checkpoint_every=4) as log:
+            for game_id, game in games.items():
+                log.follow(game_id, game)
+            play(games[1], 10, self.rng)
+            play(games[2], 3, self.rng)
+        kinds = self.kinds()
+        self.assertEqual(kinds.count((CHECKPOINT, 1)), 3)
+        self.assertEqual(kinds.count((MOVE, 1)), 10)
+        self.assertEqual(kinds.count((CHECKPOINT, 2)), 1)
+        recovered = recover(self.path)
+        self.assertEqual(sorted(recovered), [1, 2])
+        for game_id, game in games.items():
+            self.assertEqual(recovered[game_id].to_bytes(), game.to_bytes())
+            self.assertEqual(recovered[game_id].get_hash(), game.get_hash())
+            self.assertEqual(recovered[game_id].features(), game.features())
+            self.assertEqual(sorted(recovered[game_id].legal_moves(game.get_turn())),
+                             sorted(game.legal_moves(game.get_turn())))
+
+    def test_batched_moves_are_logged_and_closed_games_dropped(self):
+        games = {game_id: FocusGame(P1, P2, True) for game_id in (1, 2, 3)}
+        moves = {}
+        with GameLog(self.path, checkpoint_every=5) as log:
+            for game_id, game in games.items():
+                log.follow(game_id, game)
+                moves[game_id] = []
+                for _ in range(7):
+                    move = self.rng.choice(game.legal_moves(game.get_turn()))
+                    game.apply_moves([(game.get_turn(),) + move])
+                    moves[game_id].append(move)
+            log.close_game(2)
+        self.assertEqual(self.kinds()[-1], (CLOSE, 2))
+        recovered = recover(self.path)
+        self.assertEqual(sorted(recovered), [1, 3])
+        replayed = replay(moves)
+        for game_id in (1, 3):
+            self.assertEqual(recovered[game_id].to_bytes(), replayed[game_id].to_bytes())
+
+    def test_records_wait_for_flush(self):
+        game = FocusGame(P1, P2, True)
+        log = GameLog(self.path, sync_every=1000)
+        log.follow(1, game)
+        play(game, 5, self.rng)
+        self.assertEqual(log.get_pending(), 6)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        log.flush()
+        self.assertEqual(log.get_pending(), 0)
+        self.assertEqual(len(self.kinds()), 6)
+        log.close()
+
+    def test_fsync_runs_on_the_writer_thread(self):
+        threads = []
+        fsync = os.fsync
+        with mock.patch("os.fsync", lambda fd: threads.append(threading.current_thread())
+                        or fsync(fd)):
+            with GameLog(self.path, sync_every=2) as log:
+                game = FocusGame(P1, P2, True)
+                log.follow(1, game)
+                play(game, 5, self.rng)
+                self.assertLessEqual(log.get_pending(), 1)
+        self.assertGreaterEqual(len(threads), 3)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(len(self.kinds()), 6)
+
+    def test_write_error_stops_the_host_taking_moves(self):
+        log = GameLog(self.path, sync_every=1)
+        host = GameHost(log=log)
+        move = {"op": "move", "game": 1, "name": "PlayerA", "start": [0, 0],
+                "destination": [0, 1], "pieces": 1}
+        with mock.patch("os.fsync", side_effect=OSError("disk full")):
+            self.assertEqual(host.handle({"op": "new", "p1": list(P1), "p2": list(P2)}),
+                             {"ok": True, "game": 1})
+            self.assertRaises(OSError, log.flush)
+        game = host.get_games()[1]
+        before = game.to_bytes()
+        self.assertIsInstance(log.get_error(), OSError)
+        self.assertEqual(host.handle(move), {"ok": False, "error": "log failed"})
+        self.assertEqual(game.to_bytes(), before)
+        self.assertEqual(host.handle({"op": "show", "game": 1, "position": [0, 0]}),
+                         {"ok": True, "result": ["R"]})
+        self.assertEqual(game.move_piece("PlayerA", (0, 0), (0, 1), 1), "successfully moved")
+        self.assertRaises(OSError, log.close)
+        self.assertEqual(self.kinds(), [(CHECKPOINT, 1)])
+
+    def test_torn_tail_is_cut_off(self):
+        game = FocusGame(P1, P2, True)
+        with GameLog(self.path, checkpoint_every=100) as log:
+            log.follow(7, game)
+            play(game, 5, self.rng)
+            fifth = game.to_bytes()
+            play(game, 1, self.rng)
+            sixth = game.to_bytes()
+            play(game, 1, self.rng)
+        size = os.path.getsize(self.path)
+        os.truncate(self.path, size - 1)
+        self.assertEqual(recover(self.path)[7].to_bytes(), sixth)
+        self.assertEqual(os.path.getsize(self.path), size - 13)
+        with open(self.path, "r+b") as stream:
+            stream.seek(-1, os.SEEK_END)
+            stream.write(b"\xff")
+        self.assertEqual(recover(self.path, truncate=False)[7].to_bytes(), fifth)
+        self.assertEqual(os.path.getsize(self.path), size - 13)
+        self.assertEqual(recover(os.path.join(self.directory.name, "missing.log")), {})
+
+    def test_host_recovers_games_after_restart(self):
+        log = GameLog(self.path)
+        host = GameHost(log=log)
+        for _ in range(3):
+            host.handle({"op": "new", "p1": list(P1), "p2": list(P2)})
+        host.handle({"op": "move", "game": 2, "name": "PlayerA", "start": [0, 0],
+                     "destination": [0, 1], "pieces": 1})
+        host.handle({"op": "close", "game": 3})
+        log.flush()
+        games = recover(self.path)
+        compact(self.path, games)
+        self.assertEqual(self.kinds(), [(CHECKPOINT, 1), (CHECKPOINT, 2)])
+        log.close()
+        log = GameLog(self.path)
+        restarted = GameHost(log=log)
+        restarted.adopt(games)
+        self.assertEqual(restarted.handle({"op": "show", "game": 2, "position": [0, 1]}),
+                         {"ok": True, "result": ["R", "R"]})
+        self.assertEqual(restarted.handle({"op": "new", "p1": list(P1), "p2": list(P2)}),
+                         {"ok": True, "game": 3})
+        log.close()
+
+    def test_host_refuses_players_it_cannot_log(self):
+        with GameLog(self.path) as log:
+            host = GameHost(log=log)
+            for p1 in ([1, "R"], ["x" * 256, "R"], "PlayerA", ["PlayerA"]):
+                self.assertEqual(host.handle({"op": "new", "p1": p1, "p2": list(P2)}),
+                                 {"ok": False, "error": "bad players"})
+            self.assertEqual(host.get_games(), {})
+            self.assertEqual(log.get_pending(), 0)
+            self.assertEqual(host.handle({"op": "new", "p1": list(P1), "p2": list(P2)}),
+                             {"ok": True, "game": 1})
+        self.assertEqual(self.kinds(), [(CHECKPOINT, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,40 @@
 This Program is used to play the game Domination. This will allow 2 players to
 play the game, they decide who can start. The player has 3 options on their
 turn, single move, multiple move, reserve/capture & reserve move. The game ends
- when one player captures 6 pieces.
+ when one player captures 6 pieces, or as many as the game's rules say.
 """
+import struct
+import sys
+from array import array
+from zobrist import get_keys
+from events import MoveApplied, PiecesReserved, PiecesCaptured, GameWon
+
+SNAPSHOT_MAGIC = b"FOCS"
+SNAPSHOT_VERSION = 2
+_SNAPSHOT = struct.Struct("<4sBBBBH4H")
+
+# board length, max_height and captures needed to win of the standard game
+DEFAULT_RULES = (6, 5, 6)
+# most utf-8 bytes in a player's name or colour, to_bytes stores each length in 1 byte
+NAME_LIMIT = 255
+# largest board length and captures to win, to_bytes stores them in 1 and 2 bytes
+LENGTH_LIMIT = 255
+WIN_LIMIT = 65535
+
+# result codes of apply_moves, one byte per move, MOVE_MESSAGES[code] describes each
+MOVE_OK = 0
+MOVE_UNKNOWN_PLAYER = 1
+MOVE_GAME_OVER = 2
+MOVE_NOT_YOUR_TURN = 3
+MOVE_INVALID_LOCATION = 4
+MOVE_INVALID_PIECES = 5
+MOVE_NO_RESERVES = 6
+MOVE_MESSAGES = ("ok", "unknown player", "game over", "not your turn", "invalid location",
+                 "invalid number of pieces", "no pieces in reserve")
+
+_move_tables = {}
+_reach_cache = {}
+_start_hashes = {}
 
 
 class FocusGame:
@@ -34,37 +66,98 @@ class FocusGame:
     reserved_move: takes player name & location on board. Places reserved
     piece at location(appends to list), reduce reserve piece by 1, if no pieces
     in reserve, return "no pieces in reserve"
+
+    legal_moves: takes player name and returns list of every legal move tuple for
+    the player whose turn it is, kept up to date tile by tile as moves are made
+
+    make_move/unmake_move: apply a move tuple without validation and return an undo
+    token, then reverse it exactly, used for lookahead instead of copying the game
+
+    subscribe/unsubscribe: register callables for the events move_piece and
+    reserved_move fire, quiet games never print
+
+    get_state/from_state: compact tuple of the whole game for other processes
+
+    to_bytes/from_bytes: canonical byte encoding of the whole game, position_key is
+    its fixed size part without the players
+
+    get_hash: returns 64 bit Zobrist hash of the position (stacks, reserves, captures
+    and turn), updated by make_move for the 2 cells a move touches
+
+    get_rules: returns (board length, max_height, captures to win), the variant
+    being played, 6x6 with stacks of 5 and 6 captures to win by default
+
+    apply_moves: validates and applies a whole list of moves in one pass, returning
+    one result code per move that says which check a refused move failed
+
+    features: returns evaluation counters for both players (stacks controlled,
+    pieces on the board, height controlled, full and nearly full stacks controlled,
+    reserves and captures), kept up to date by make_move so reading them never scans the board
     """
 
-    def __init__(self, p1, p2):
+    def __init__(self, p1, p2, quiet=False, length=6, max_height=5, win_captures=6):
         """
         initializes the 2 players' names and colours by taking 2 tuples
         (1 for each player) and then initializing the board to desired size(6x6 default)
         positions where each position has a piece marked R or G for red and green
         respectively. p1/p2: tuple where first item is their name(str) and second is their
         colour(str). Example tuple ("PlayerA", "G")
+        quiet: True to never print, for servers and simulators
+        length/max_height/win_captures: length of the board's sides, pieces allowed
+        on a tile (at most 31) and captures that win the game
+        Raises ValueError unless p1 and p2 are each a name and a colour given as str
+        of at most NAME_LIMIT bytes in utf-8, or if check_rules refuses the rules
         """
+        check_player(p1)
+        check_player(p2)
+        check_rules(length, win_captures)
         self._p1 = Player(p1)
         self._p2 = Player(p2)
-        self._board = Board(self._p1.get_colour(), self._p2.get_colour())
-        self._max_height = 5
+        self._players = {p2[0]: self._p2, p1[0]: self._p1}
+        self._sides = {p2[0]: 1, p1[0]: 0}
+        self._board = Board(self._p1.get_colour(), self._p2.get_colour(), length, max_height)
+        self._length = length
+        self._stacks = self._board.get_stacks()
+        self._colour_bits = (self._stacks.colour_index(p1[1]),
+                             self._stacks.colour_index(p2[1]))
+        self._cells = self._stacks.get_cells()
+        self._max_height = max_height
+        self._win_captures = win_captures
         self._turn = self._p1.get_name()
+        self._quiet = quiet
+        self._listeners = []
+        self._move_table = []
+        self._tile_moves = [None] * len(self._cells)
+        self._controlled = (set(), set())
+        self._reserve_moves = []
+        self._piece_counts = [0, 0]
+        self._controlled_height = [0, 0]
+        self._full_stacks = [0, 0]
+        self._near_full_stacks = [0, 0]
+        self._changed = {}
+        self.initialize_moves()
+        self._zobrist = get_keys(len(self._cells), self._max_height, len(self._cells))
+        self._cell_keys = self._zobrist.get_cell_keys()
+        start = (length, max_height, self._colour_bits)
+        if start not in _start_hashes:
+            _start_hashes[start] = self.compute_hash()
+        self._hash = _start_hashes[start]
 
     def move_piece(self, name, start, destination, num_of_pieces):
         """
         checks if name is == to _turn using check_turn.
         checks if name is valid and one of p1 or p2 names
+        checks the game is not already won using check_game_over
         checks if the move is valid using check_location, where the start, destination
         and num_of_pieces are communicated with check_location.
         checks if pieces trying to be moved at location start are valid using check_pieces
 
-        find destination tile in board using Board.get_tile, save pieces to
-        Tile._pieces at destination by passing a var with the list of pieces to
-        Tile.add while tile height > 5, tile.remove_piece, check return value if
-        p1 colour or p2 colour, add1 to reserve or captures accordingly.
+        applies the move with make_move, which stacks the pieces on the destination
+        Tile, removes pieces over _max_height from the bottom into the player's
+        reserves or captures and changes the turn unless the player won.
         If no errors and piece(s) successfully moved, print "successfully moved."
         If move returns True from self.check_win, print(<name> + " Wins").
-        Call change_turn to update who's turn it is.
+        Nothing is printed in a quiet game, listeners get the move's events.
         :param name: players name (str)
         :param start: tuple of coordinates of piece location to move
         :param destination: tuple of coordinates of destination to move
@@ -75,6 +168,8 @@ class FocusGame:
         player = self.get_player_from_name(name)
         if not player:
             return False
+        elif self.check_game_over():
+            return False
         elif not self.check_turn(name):
             return False
         elif not self.check_location(num_of_pieces, start, destination):
@@ -82,21 +177,8 @@ class FocusGame:
         elif not self.check_number_of_pieces(num_of_pieces, start):
             return False
         else:
-            start_tile = self.get_tile(start)
-            end_tile = self.get_tile(destination)
-            pile = start_tile.get_pieces()[len(
-                start_tile.get_pieces())-num_of_pieces:]
-
-            end_tile.add(pile)
-            for _ in range(num_of_pieces):
-                self.change_reserves_captured(player, destination)
-                start_tile.remove_top()
-            print("successfully moved")
-            if self.check_win(name):
-                print(name + " wins!")
-                return name + " wins!"
-            self.change_turn(name)
-            return "successfully moved"
+            token = self.make_move((start, destination, num_of_pieces))
+            return self.finish_move(name, token)
 
     def show_pieces(self, position):
         """
@@ -141,7 +223,8 @@ class FocusGame:
         uses player name and get_player to get player Object, then check_reserves(name)
         to determine if any pieces in reserve, if >= 1, places reserved piece at
         location(extends Tile._pieces), decrement reserve piece by 1 and change
-        turn to other player, if no pieces in reserve, return "no pieces in reserve"
+        turn to other player, if no pieces in reserve, return "no pieces in reserve".
+        Refused with False once the game is won, see check_game_over
         :param name: string of player name
         :param location: coordinates tuple of location to place reserve
         :return: "no pieces in reserve" or changes Tile._pieces at Board.get_tile(location)
@@ -150,6 +233,8 @@ class FocusGame:
         player = self.get_player_from_name(name)
         if not player:
             return False
+        elif self.check_game_over():
+            return False
         elif not self.check_turn(name):
             return False
         elif not self.check_reserves(name):
@@ -157,15 +242,517 @@ class FocusGame:
         elif not self.check_on_board(location):
             return False
         else:
-            self.get_tile(location).add([player.get_colour()])
+            token = self.make_move((None, location, 1))
+            return self.finish_move(name, token)
+
+    def finish_move(self, name, token):
+        """
+        prints and returns the result of a move made by move_piece or reserved_move
+        and fires its events to the listeners, if there are any
+        :param name: string name of the player who moved
+        :param token: undo token returned by make_move
+        :return: "successfully moved" or <name> wins!
+        """
+        if self._listeners:
+            self.notify(name, token)
+        self.report("successfully moved")
+        if self.check_win(name):
+            self.report(name + " wins!")
+            return name + " wins!"
+        return "successfully moved"
+
+    def report(self, message):
+        # prints message unless the game is quiet
+        if not self._quiet:
+            print(message)
+
+    def set_quiet(self, quiet):
+        # turns printing off (True) or on (False)
+        self._quiet = quiet
+
+    def subscribe(self, listener):
+        """
+        registers listener to be called with each event from events after every
+        move_piece and reserved_move, no events are made while there are no listeners
+        :param listener: callable taking one Event
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        # removes listener registered with subscribe
+        self._listeners.remove(listener)
+
+    def notify(self, name, token):
+        """
+        calls every listener with the events make_events makes for the move behind token
+        :param name: string name of the player who moved
+        :param token: undo token returned by make_move
+        """
+        self.emit(self.make_events(name, token))
+
+    def make_events(self, name, token):
+        """
+        makes the events for the move behind token, read just after it was made:
+        MoveApplied, then PiecesReserved and PiecesCaptured if pieces were removed from
+        the destination, then GameWon if the move won
+        :param name: string name of the player who moved
+        :param token: undo token returned by make_move
+        :return: list of Event objects
+        """
+        move, _, reserves, captures = token[:4]
+        player = self.get_player_from_name(name)
+        reserved = player.get_reserves() - reserves + (move[0] is None)
+        captured = player.get_captures() - captures
+        events = [MoveApplied(name, move[0], move[1], move[2])]
+        if reserved:
+            events.append(PiecesReserved(name, move[1], reserved))
+        if captured:
+            events.append(PiecesCaptured(name, move[1], captured))
+        if self.check_win(name):
+            events.append(GameWon(name, player.get_captures()))
+        return events
+
+    def emit(self, events):
+        # calls every listener with each of events in order
+        for event in events:
+            for listener in list(self._listeners):
+                listener(event)
+
+    def apply_moves(self, moves, validate_only=False):
+        """
+        checks moves in order the way move_piece/reserved_move do and makes each one
+        that passes, the players looked up once for the batch and the start stack read
+        from the packed cells. A refused move is skipped and checking goes on with the
+        next. If anything raises partway every move of the batch is unmade again, so
+        a batch is made whole or not at all. Listeners get the events of the moves made
+        once the batch is through, nothing is printed
+        :param moves: iterable of (name, start, destination, num_of_pieces) tuples,
+                      start None for a reserve move to destination
+        :param validate_only: True to unmake every move again, leaving the game as it was
+        :return: bytes of one MOVE_ code per move
+        """
+        sides = {player.get_name(): (player, self._stacks.colour_index(player.get_colour()))
+                 for player in (self._p1, self._p2)}
+        codes, tokens, events, made = bytearray(), [], [], False
+        try:
+            for name, start, destination, num_of_pieces in moves:
+                move = (start, destination, num_of_pieces)
+                codes.append(self.move_code(sides, name, move))
+                if codes[-1] == MOVE_OK:
+                    tokens.append(self.make_move(move))
+                    if self._listeners and not validate_only:
+                        events.extend(self.make_events(name, tokens[-1]))
+            made = not validate_only
+        finally:
+            while not made and tokens:
+                self.unmake_move(tokens.pop())
+        self.emit(events)
+        return bytes(codes)
+
+    def move_code(self, sides, name, move):
+        """
+        finds the first check move fails, in the order move_piece/reserved_move check,
+        reading the start stack's height and top colour straight from its packed cell.
+        Locations that are not 2 ints on the board and counts that are not ints are
+        refused like any other bad move
+        :param sides: dict of player name to (Player, colour bit), from apply_moves
+        :param name: string name of the player making move
+        :param move: (start, destination, num_of_pieces) or (None, location, 1)
+        :return: int MOVE_ code
+        """
+        if name not in sides:
+            return MOVE_UNKNOWN_PLAYER
+        if self.check_game_over():
+            return MOVE_GAME_OVER
+        if name != self._turn:
+            return MOVE_NOT_YOUR_TURN
+        player, colour = sides[name]
+        start, destination, num_of_pieces = move
+        if start is None:
+            if player.get_reserves() < 1:
+                return MOVE_NO_RESERVES
+            return MOVE_OK if self.check_coordinates(destination) else MOVE_INVALID_LOCATION
+        if not self.check_coordinates(start) or not self.check_coordinates(destination) or \
+                (start[0] == destination[0]) == (start[1] == destination[1]) or \
+                num_of_pieces not in (abs(destination[0] - start[0]),
+                                      abs(destination[1] - start[1])):
+            return MOVE_INVALID_LOCATION
+        cell = self._cells[self._board.get_index(start)]
+        height = cell.bit_length() - 1
+        if height == 0 or (cell >> (height - 1)) & 1 != colour:
+            return MOVE_INVALID_LOCATION
+        if type(num_of_pieces) is not int or not 0 < num_of_pieces <= height:
+            return MOVE_INVALID_PIECES
+        return MOVE_OK
+
+    def check_coordinates(self, position):
+        """
+        checks for move_code that position is a tuple or list of 2 ints on the board,
+        bools and floats such as 1.0 are not coordinates
+        :param position: location from a batch of moves
+        :return: True if position is a location on the board, False otherwise
+        """
+        return (isinstance(position, (tuple, list)) and len(position) == 2 and
+                type(position[0]) is int and type(position[1]) is int and
+                self.check_on_board(position))
+
+    def legal_moves(self, name):
+        """
+        returns every legal move for the player whose turn it is. Board moves are
+        (start, destination, num_of_pieces) tuples, reserve moves are (None, location, 1).
+        Only cells in _controlled for the player's colour are visited, their moves come
+        from _tile_moves which settle brings up to date with the cells moves changed
+        :param name: string of player's name
+        :return: list of move tuples, empty once the game is won, False if name is
+                 not a player or not their turn
+        """
+        player = self.get_player_from_name(name)
+        if not player:
+            return False
+        elif not self.check_turn(name):
+            return False
+        elif self.check_game_over():
+            return []
+        self.settle()
+        moves = []
+        for index in sorted(self._controlled[self._stacks.colour_index(player.get_colour())]):
+            moves.extend(self._tile_moves[index])
+        if player.get_reserves() > 0:
+            moves.extend(self._reserve_moves)
+        return moves
+
+    def make_move(self, move):
+        """
+        applies a move from legal_moves for the player whose turn it is the same way
+        move_piece/reserved_move do, but without validating or printing, so search
+        can make and unmake moves instead of copying the game. The pieces are moved
+        as packed ints with StackArray.lift and StackArray.drop
+        :param move: (start, destination, num_of_pieces) or (None, location, 1)
+        :return: undo token for unmake_move holding the move, the turn, the player's
+                 reserves and captures, the packed start and destination cells and
+                 the hash before the move
+        """
+        start, destination, num_of_pieces = move
+        side = self._sides[self._turn]
+        player = self._p2 if side else self._p1
+        end = destination[0] * self._length + destination[1]
+        begin = end if start is None else start[0] * self._length + start[1]
+        token = (move, self._turn, player.get_reserves(), player.get_captures(),
+                 self._cells[begin], self._cells[end], self._hash)
+        if start is None:
+            pile = 2 | self._colour_bits[side]
             player.change_reserves(-1)
-            self.change_reserves_captured(player, location)
-            print("successfully moved")
-            if self.check_win(name):
-                print(name + " wins!")
-                return name + " wins!"
-            self.change_turn(name)
-            return "successfully moved"
+        else:
+            pile = self._stacks.lift(begin, num_of_pieces)
+            self._changed.setdefault(begin, token[4])
+        self._stacks.drop(end, pile)
+        tall = self._cells[end].bit_length() - 1 > self._max_height
+        if tall:
+            self.trim_destination(player, side, end)
+        self._changed.setdefault(end, token[5])
+        if player.get_captures() < self._win_captures:
+            self._turn = (self._p1 if side else self._p2).get_name()
+        self.update_hash(token, side, begin, end, start is None or tall)
+        return token
+
+    def unmake_move(self, token):
+        """
+        reverses the move make_move returned token for by writing back the packed
+        start and destination cells and restoring the player's reserves, captures,
+        _turn and _hash
+        :param token: undo token returned by make_move
+        :return: game restored to the position before the move
+        """
+        move, turn, reserves, captures, begin_cell, end_cell, key = token
+        start, destination, num_of_pieces = move
+        player = self._players[turn]
+        if start is not None:
+            begin = start[0] * self._length + start[1]
+            self._changed.setdefault(begin, self._cells[begin])
+            self._cells[begin] = begin_cell
+        end = destination[0] * self._length + destination[1]
+        self._changed.setdefault(end, self._cells[end])
+        self._cells[end] = end_cell
+        player.change_reserves(reserves - player.get_reserves())
+        player.change_captured(captures - player.get_captures())
+        self._turn = turn
+        self._hash = key
+
+    def get_state(self):
+        """
+        returns the whole game as a small tuple of immutable values to send to another
+        process instead of pickling Board, Tile and Player objects
+        :return: tuple of p1 (name, colour), p2 (name, colour), bytes of the packed
+                 cells from StackArray.to_bytes, tuple of p1 reserves, p1 captures,
+                 p2 reserves, p2 captures, 0 if it is p1's turn or 1 if it is p2's and
+                 the tuple from get_rules
+        """
+        return ((self._p1.get_name(), self._p1.get_colour()),
+                (self._p2.get_name(), self._p2.get_colour()),
+                self._stacks.to_bytes(self._max_height),
+                (self._p1.get_reserves(), self._p1.get_captures(),
+                 self._p2.get_reserves(), self._p2.get_captures()),
+                0 if self._turn == self._p1.get_name() else 1,
+                self.get_rules())
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        makes a FocusGame from a tuple returned by get_state
+        :param state: tuple from get_state
+        :return: FocusGame object in the same position
+        """
+        game = cls(state[0], state[1], False, *state[5])
+        game.set_position(state[2], state[3], state[4])
+        return game
+
+    def set_position(self, cells, counts, turn):
+        """
+        replaces the position with packed cells, player counts and turn, then marks
+        the cells that changed for settle and recomputes the hash
+        :param cells: bytes or memoryview of packed cells from StackArray.to_bytes
+        :param counts: p1 reserves, p1 captures, p2 reserves, p2 captures
+        :param turn: 0 for p1's turn, 1 for p2's
+        """
+        old = self._cells[:]
+        self._stacks.load_bytes(cells, self._max_height)
+        for index, cell in enumerate(self._cells):
+            if cell != old[index]:
+                self._changed.setdefault(index, old[index])
+        for player, reserves, captures in ((self._p1,) + tuple(counts[:2]),
+                                           (self._p2,) + tuple(counts[2:])):
+            player.change_reserves(reserves - player.get_reserves())
+            player.change_captured(captures - player.get_captures())
+        self._turn = (self._p1, self._p2)[turn].get_name()
+        self._hash = self.compute_hash()
+
+    def position_key(self):
+        """
+        fixed size encoding of the position: b"FOCS", version, board length, max
+        height and turn as 1 byte each, captures to win, p1 reserves, p1 captures,
+        p2 reserves and p2 captures as 2 byte little endian ints, then the cells from
+        StackArray.to_bytes. Leaves out the players so games between different
+        players in the same position share cache entries
+        :return: bytes
+        """
+        return _SNAPSHOT.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self._board.get_length(),
+                              self._max_height, 0 if self._turn == self._p1.get_name() else 1,
+                              self._win_captures, self._p1.get_reserves(), self._p1.get_captures(),
+                              self._p2.get_reserves(), self._p2.get_captures()) + \
+            self._stacks.to_bytes(self._max_height)
+
+    def to_bytes(self):
+        """
+        encodes the whole game as position_key followed by p1's name and colour and
+        p2's name and colour, each 1 byte length + utf-8. position_key has a fixed size
+        for the rules, the names add 4 to 4 * (NAME_LIMIT + 1) bytes. The same game
+        always gives the same bytes, so they can be a dict key, a cache key or an IPC
+        message
+        :return: bytes
+        """
+        texts = [text.encode("utf-8") for text in (
+            self._p1.get_name(), self._p1.get_colour(),
+            self._p2.get_name(), self._p2.get_colour())]
+        return self.position_key() + b"".join(bytes((len(text),)) + text for text in texts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        makes a FocusGame from bytes returned by to_bytes, reading through a
+        memoryview so the cells are not copied before they are loaded
+        :param data: bytes, bytearray or memoryview from to_bytes
+        :return: FocusGame object in the same position
+        """
+        view = memoryview(data)
+        magic, version, length, max_height, turn, win, *counts = _SNAPSHOT.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("not a FocusGame snapshot")
+        offset = _SNAPSHOT.size + length * length * StackArray.cell_width(max_height)
+        cells, texts = view[_SNAPSHOT.size:offset], []
+        for _ in range(4):
+            texts.append(bytes(view[offset + 1:offset + 1 + view[offset]]).decode("utf-8"))
+            offset += 1 + view[offset]
+        game = cls((texts[0], texts[1]), (texts[2], texts[3]), False, length, max_height, win)
+        game.set_position(cells, counts, turn)
+        return game
+
+    def get_hash(self):
+        # returns 64 bit Zobrist hash of the position, kept up to date by make_move
+        return self._hash
+
+    def compute_hash(self):
+        """
+        computes the Zobrist hash of the position from scratch: the key of every cell,
+        of each player's reserve and captured counts and the turn key if it is p2's turn
+        :return: int 64 bit hash
+        """
+        key = 0
+        for index, cell in enumerate(self._cells):
+            key ^= self._zobrist.get_cell_keys()[index][cell]
+        for side, player in enumerate((self._p1, self._p2)):
+            key ^= self._zobrist.get_reserve_keys()[side][player.get_reserves()]
+            key ^= self._zobrist.get_captured_keys()[side][player.get_captures()]
+        if self._turn != self._p1.get_name():
+            key ^= self._zobrist.get_turn_key()
+        return key
+
+    def update_hash(self, token, side, begin, end, counted):
+        """
+        updates _hash after make_move by XORing out the keys in token and in the keys
+        for the cells, counts and turn now, only the 2 cells the move touched change
+        :param token: undo token returned by make_move
+        :param side: 0 if p1 made the move, 1 if p2 did
+        :param begin: int index of the start cell, end for a reserve move
+        :param end: int index of the destination cell
+        :param counted: True if the move may have changed the player's reserves or
+                        captures, a reserve move or a trimmed destination
+        :return: changes _hash
+        """
+        move, turn, reserves, captures, begin_cell, end_cell, key = token
+        cell_keys = self._cell_keys
+        key ^= cell_keys[end][end_cell] ^ cell_keys[end][self._cells[end]]
+        if begin != end:
+            key ^= cell_keys[begin][begin_cell] ^ cell_keys[begin][self._cells[begin]]
+        if counted:
+            player = self._p2 if side else self._p1
+            reserve_keys = self._zobrist.get_reserve_keys()[side]
+            captured_keys = self._zobrist.get_captured_keys()[side]
+            key ^= reserve_keys[reserves] ^ reserve_keys[player.get_reserves()]
+            key ^= captured_keys[captures] ^ captured_keys[player.get_captures()]
+        if turn != self._turn:
+            key ^= self._zobrist.get_turn_key()
+        self._hash = key
+
+    def count_captures(self, move):
+        """
+        returns number of the other player's pieces move would capture, the pieces
+        trim_destination would remove from the bottom of the destination,
+        without making the move. Used to search capturing moves first
+        :param move: move tuple from legal_moves
+        :return: int of pieces captured
+        """
+        end_cell = self._cells[self._board.get_index(move[1])]
+        over = end_cell.bit_length() - 1 + move[2] - self._max_height
+        if over <= 0:
+            return 0
+        removed = (end_cell & ((1 << over) - 1)) | (1 << over)
+        colour = self.get_player_from_name(self._turn).get_colour()
+        return over - self._stacks.count_colour(removed, colour)
+
+    def count_stacks(self, name):
+        """
+        returns number of stacks with a piece of name's colour on top
+        :param name: string of player's name
+        :return: int of stacks controlled, False if name is not a player
+        """
+        player = self.get_player_from_name(name)
+        if not player:
+            return False
+        self.settle()
+        return len(self._controlled[self._stacks.colour_index(player.get_colour())])
+
+    def features(self):
+        """
+        returns the evaluation counters, each a tuple of p1's and p2's value: "stacks"
+        with the player's colour on top, "pieces" of the player's colour on the board,
+        "height" of the stacks the player controls added up, "full" stacks at
+        max_height the player controls (anything dropped on them overflows),
+        "near_full" stacks at max_height - 1 or more the player controls (one move of
+        2 pieces or fewer overflows them), "reserves" and "captures". Only reads
+        counters settle brings up to date with the cells moves changed
+        :return: dict of str to tuple of 2 ints
+        """
+        self.settle()
+        return {"stacks": (len(self._controlled[0]), len(self._controlled[1])),
+                "pieces": tuple(self._piece_counts),
+                "height": tuple(self._controlled_height),
+                "full": tuple(self._full_stacks),
+                "near_full": tuple(self._near_full_stacks),
+                "reserves": (self._p1.get_reserves(), self._p2.get_reserves()),
+                "captures": (self._p1.get_captures(), self._p2.get_captures())}
+
+    def add_features(self, cell, sign):
+        """
+        adds (sign 1) or takes away (sign -1) what packed cell counts towards
+        _piece_counts, _controlled_height, _full_stacks and _near_full_stacks, lists
+        indexed by colour bit
+        :param cell: packed cell at rest
+        :param sign: 1 or -1
+        """
+        height = cell.bit_length() - 1
+        if height == 0:
+            return
+        ones = (cell ^ (1 << height)).bit_count()
+        self._piece_counts[1] += sign * ones
+        self._piece_counts[0] += sign * (height - ones)
+        top = (cell >> (height - 1)) & 1
+        self._controlled_height[top] += sign * height
+        if height >= self._max_height - 1:
+            self._near_full_stacks[top] += sign
+            if height >= self._max_height:
+                self._full_stacks[top] += sign
+
+    def initialize_moves(self):
+        """
+        looks up _move_table and _reserve_moves for the board's shape, built once by
+        build_move_table and shared by every game of that shape, then marks every
+        cell changed from empty, so the first settle fills _tile_moves, _controlled
+        (the set of cells each colour bit is on top of) and the feature counters
+        """
+        shape = (self._board.get_length(), self._max_height)
+        if shape not in _move_tables:
+            _move_tables[shape] = self.build_move_table()
+        self._move_table, self._reserve_moves = _move_tables[shape]
+        self._changed = dict.fromkeys(range(len(self._cells)), 1)
+
+    def build_move_table(self):
+        """
+        builds the move table, where move_table[index][height] is the list of moves a
+        stack of that height on cell index can make, and the list of reserve moves
+        :return: tuple of move_table and reserve_moves lists, never changed after
+        """
+        length = self._board.get_length()
+        move_table, reserve_moves = [], []
+        for index in range(length * length):
+            position = divmod(index, length)
+            reserve_moves.append((None, position, 1))
+            moves = [[]]
+            for height in range(1, self._max_height + 1):
+                moves.append(moves[-1] + [(position, destination, height) for destination
+                                          in self._board.get_destinations(position, height)])
+            move_table.append(moves)
+        return move_table, reserve_moves
+
+    def settle(self):
+        """
+        brings _tile_moves, _controlled and the feature counters up to date with the
+        cells in _changed. make_move, unmake_move and set_position only note each
+        cell's value before its first change there, so moves that nobody asks for
+        legal moves or features after cost nothing more, and a search that does pays
+        once per cell however many moves changed it
+        """
+        if self._changed:
+            for index, old in self._changed.items():
+                self.update_cell(index, old)
+            self._changed = {}
+
+    def update_cell(self, index, old):
+        """
+        refreshes the move list, controlling colour and feature counters of a cell that
+        changed from packed old, so no other tile has to be looked at. Reads the packed
+        cell directly, the top piece's colour bit sits just under the sentinel bit
+        :param index: int index of the cell in _stacks
+        :param old: packed cell before the change
+        """
+        cell = self._cells[index]
+        height, old_height = cell.bit_length() - 1, old.bit_length() - 1
+        self._tile_moves[index] = self._move_table[index][min(height, self._max_height)]
+        if old_height > 0:
+            self._controlled[(old >> (old_height - 1)) & 1].discard(index)
+            self.add_features(old, -1)
+        if height > 0:
+            self._controlled[(cell >> (height - 1)) & 1].add(index)
+            self.add_features(cell, 1)
 
     def get_p1(self):
         # returns player 1
@@ -179,6 +766,18 @@ class FocusGame:
         # returns turn
         return self._turn
 
+    def get_rules(self):
+        # returns tuple of board length, max_height and captures needed to win
+        return self._board.get_length(), self._max_height, self._win_captures
+
+    def get_move_table(self):
+        # returns move table shared by games of this shape, see build_move_table
+        return self._move_table
+
+    def get_reserve_moves(self):
+        # returns list of every reserve move, shared by games of this shape
+        return self._reserve_moves
+
     def get_tile(self, tile_location):
         # returns Tile at tile_location in _board
         return self._board.get_tile(tile_location)
@@ -188,13 +787,8 @@ class FocusGame:
         return self._board
 
     def get_player_from_name(self, name):
-        # returns Player object from name
-        if self._p1.get_name() == name:
-            return self._p1
-        elif self._p2.get_name() == name:
-            return self._p2
-        else:
-            return False
+        # returns Player object from name, False if name is not a player
+        return self._players.get(name, False)
 
     def change_turn(self, name):
         """
@@ -229,7 +823,8 @@ class FocusGame:
         """
         if num_of_pieces == 0:
             return False
-        elif num_of_pieces > self._board.get_tile(tile_location).get_height():
+        elif num_of_pieces > self._cells[tile_location[0] * self._length +
+                                         tile_location[1]].bit_length() - 1:
             return False
         else:
             return True
@@ -247,9 +842,10 @@ class FocusGame:
     def check_location(self, n_o_p, start, destination):
         """
         check if Board.get_tile(location) returns True if: Tile type, if location is
-        between (0,0) and (5,5), if location is on same row or column tuple[0] or
+        between (0,0) and (length-1,length-1), if location is on same row or column tuple[0] or
         tuple[1] is same for both , if difference in location on row/column < n_o_p
-        if not: return False
+        and if the top piece of start, read from its packed cell, is the colour of the
+        player whose turn it is. if not: return False
         :param n_o_p: number of pieces to be moved, int
         :param start: coordinates tuple of Tile to be moved from
         :param destination: coordinates tuple of Tile to be moved to
@@ -266,11 +862,10 @@ class FocusGame:
         elif abs(destination[0] - start[0]) != n_o_p and \
                 abs(destination[1] - start[1]) != n_o_p:
             return False
-        elif self.get_tile(start).get_top() != \
-                self.get_player_from_name(self._turn).get_colour():
-            return False
-        else:
-            return True
+        cell = self._cells[start[0] * self._length + start[1]]
+        height = cell.bit_length() - 1
+        return height > 0 and (cell >> (height - 1)) & 1 == \
+            self._colour_bits[self._sides[self._turn]]
 
     def check_on_board(self, position):
         """
@@ -278,18 +873,24 @@ class FocusGame:
         :param position: tuple of 2 ints, representing row/column respectively
         :return: False if location off board, True otherwise
         """
-        if position[0] not in range(self._board.get_length()):
+        if not 0 <= position[0] < self._length:
             return False
-        elif position[1] not in range(self._board.get_length()):
+        elif not 0 <= position[1] < self._length:
             return False
         else:
             return True
 
+    def check_game_over(self):
+        # returns True once either player has captured enough pieces to win
+        return self._p1.get_captures() >= self._win_captures or \
+            self._p2.get_captures() >= self._win_captures
+
     def check_win(self, name):
         # check if name.get_captures
         # :param name: string of player's name
-        # :return: True if player belonging to name has 6 or more captures, False otherwise
-        if self.get_player_from_name(name).get_captures() >= 6:
+        # :return: True if player belonging to name has _win_captures (6 by default) or
+        # more captures, False otherwise
+        if self.get_player_from_name(name).get_captures() >= self._win_captures:
             return True
         else:
             return False
@@ -306,19 +907,48 @@ class FocusGame:
             print(r)
         return colour_list
 
-    def change_reserves_captured(self, player, destination):
+    def trim_destination(self, player, side, end):
         """
-        removes pieces from tile with too many pieces and changes reserves and
-        captured accordingly
-        :param player: player object
-        :param destination: tuple coordinates of tile
-        :return: changed values of player._reserves/_captured
+        removes pieces from the destination cell of make_move if it is too tall and
+        changes the player's reserves and captured accordingly
+        :param player: Player object who moved
+        :param side: 0 for p1, 1 for p2
+        :param end: int index of the destination cell
         """
-        if self.get_tile(destination).get_height() > self._max_height:
-            if self.get_tile(destination).remove_bottom() == player.get_colour():
-                player.change_reserves(1)
-            else:
-                player.change_captured(1)
+        removed = self._stacks.trim(end, self._max_height)
+        count = removed.bit_length() - 1
+        if count > 0:
+            ones = (removed ^ (1 << count)).bit_count()
+            own = ones if self._colour_bits[side] else count - ones
+            player.change_reserves(own)
+            player.change_captured(count - own)
+
+
+def check_player(name_colour):
+    """
+    checks a (name, colour) tuple FocusGame is given for a player
+    :param name_colour: sequence of the player's name and colour
+    :return: raises ValueError unless it is 2 str of at most NAME_LIMIT utf-8 bytes each
+    """
+    if isinstance(name_colour, str) or len(name_colour) != 2 or not all(
+            isinstance(text, str) and len(text.encode("utf-8")) <= NAME_LIMIT
+            for text in name_colour):
+        raise ValueError("a player is a name and a colour of at most %d bytes" % NAME_LIMIT)
+
+
+def check_rules(length, win_captures):
+    """
+    checks the board length and captures to win FocusGame is given fit to_bytes,
+    max_height is checked by StackArray.typecode
+    :param length: length of the board's sides
+    :param win_captures: captures that win the game
+    :return: raises ValueError unless length is an int from 1 to LENGTH_LIMIT and
+             win_captures an int from 1 to WIN_LIMIT
+    """
+    for value, limit in ((length, LENGTH_LIMIT), (win_captures, WIN_LIMIT)):
+        if not isinstance(value, int) or not 1 <= value <= limit:
+            raise ValueError("board length is 1 to %d and captures to win 1 to %d"
+                             % (LENGTH_LIMIT, WIN_LIMIT))
 
 
 class Player:
@@ -364,46 +994,81 @@ class Player:
 
 class Board:
     """
-    Represents a board object that contains data members length(length of sides)
-    and board. Communicates with FocusGame to provide a board to use and uses
-    get_stack to provide stack object at provided location.
-    Communicates with Stack to initialize each tile with a Stack object representing
-    what exists on each tile.
+    Represents a board object that contains data members length(length of sides),
+    stacks and board. Communicates with FocusGame to provide a board to use and uses
+    get_tile to provide Tile object at provided location.
+    The pieces on every tile live packed in one StackArray, the Tile objects in board
+    are views onto its cells so get_tile, get_board and Tile.get_pieces keep working.
     """
 
-    def __init__(self, p1_colour, p2_colour):
-        # initializes the board with data members sides and tiles
-        self._length = 6
+    def __init__(self, p1_colour, p2_colour, length=6, max_height=5):
+        # initializes the board with data members sides, stacks and tiles
+        self._length = length
+        self._stacks = StackArray([p1_colour, p2_colour], length * length, max_height)
         self._board_list = []
+        self._reach = {}
         self.initialize_board(p1_colour, p2_colour)
+        self.initialize_reach()
 
     def get_length(self):
+        # returns length of the board's sides
         return self._length
 
-    def initialize_board(self, p1_colour, p2_colour):
+    def get_stacks(self):
+        # returns StackArray holding the packed pieces of every tile
+        return self._stacks
+
+    def get_index(self, location):
+        # returns index of the cell for location in _stacks
+        return location[0] * self._length + location[1]
+
+    def initialize_reach(self):
         """
-        Initializes and returns board for FocusGame using the length of the sides
-        in _length. Using nested for loops and _length as their range, it makes a
-        list of lists where each inner list is a row and each element is a tile.
-        """
-        def tile_gen():
-            while True:
-                yield [p1_colour]
-                yield [p1_colour]
-                yield [p2_colour]
-                yield [p2_colour]
-        colour = tile_gen()
-        initial_board = []
-
-        def rows(r):
-            line = []
+        fills _reach so _reach[position][distance] lists the on board positions exactly
+        distance tiles away from position along its row or column, done once per board
+        length and shared by every board that long so move generation never has to
+        check the board edges
+        """
+        if self._length in _reach_cache:
+            self._reach = _reach_cache[self._length]
+            return
+        _reach_cache[self._length] = self._reach
+        for row in range(self._length):
             for column in range(self._length):
-                line.append(Tile((r, column), next(colour)))
-            return line
+                reach = [[]]
+                for distance in range(1, self._length):
+                    reach.append([(r, c) for r, c in (
+                        (row - distance, column), (row + distance, column),
+                        (row, column - distance), (row, column + distance))
+                        if 0 <= r < self._length and 0 <= c < self._length])
+                self._reach[(row, column)] = reach
 
-        for row in range(self._length):
-            initial_board.append(rows(row))
-        self._board_list = initial_board
+    def get_destinations(self, position, distance):
+        """
+        returns list of positions distance tiles away from position on the board
+        :param position: tuple of coordinates
+        :param distance: int of tiles travelled
+        :return: list of coordinate tuples, empty if distance leaves the board
+        """
+        if distance >= self._length:
+            return []
+        return self._reach[position][distance]
+
+    def initialize_board(self, p1_colour, p2_colour):
+        """
+        Initializes and returns board for FocusGame using the length of the sides
+        in _length. The start cells, two of p1's pieces then two of p2's over and
+        over, are packed straight into _stacks, then a list of lists is made where
+        each inner list is a row and each element is a tile viewing its cell.
+        """
+        pattern = ([2 | self._stacks.colour_index(p1_colour)] * 2 +
+                   [2 | self._stacks.colour_index(p2_colour)] * 2)
+        cells = self._stacks.get_cells()
+        for index in range(self._length * self._length):
+            cells[index] = pattern[index % 4]
+        self._board_list = [[Tile((row, column), None, self._stacks, row * self._length + column)
+                             for column in range(self._length)]
+                            for row in range(self._length)]
 
     def get_tile(self, location):
         """
@@ -419,26 +1084,210 @@ class Board:
         return self._board_list
 
 
+class StackArray:
+    """
+    Represents the stacks of a whole board packed into one array('H'), one int (cell)
+    per tile. Bit i of a cell is the colour index (position in _colours) of the i-th
+    piece from the bottom and one sentinel bit sits just above the top piece, so an
+    empty tile is 1 and the height is cell.bit_length() - 1. Moving, adding and
+    removing pieces are a few shifts and masks on one int, nothing is allocated.
+    Communicates with Board, which keeps one for the whole board, with Tile, which
+    views one cell, and with FocusGame, which moves pieces between cells.
+    """
+
+    def __init__(self, colours, size, max_height=5):
+        """
+        initializes colours (p1's colour at index 0, p2's at index 1) and size empty cells
+        :param colours: list of 2 colours, None for a slot not known yet
+        :param size: int number of cells
+        :param max_height: int of pieces allowed on a tile, the cells are made wide
+                           enough for a full tile with a full pile dropped on it
+        """
+        self._colours = list(colours)
+        self._cells = array(self.typecode(2 * max_height + 1), [1]) * size
+
+    def get_colours(self):
+        # returns list of colours, index in list is the bit used for that colour
+        return self._colours
+
+    def get_cells(self):
+        # returns array of packed cells
+        return self._cells
+
+    def get_cell(self, index):
+        # returns packed cell at index
+        return self._cells[index]
+
+    def colour_index(self, colour):
+        """
+        returns bit used for colour, a standalone Tile fills its empty palette slot the
+        first time it sees a second colour
+        :param colour: str colour
+        :return: int 0 or 1, raises ValueError if the palette is already full
+        """
+        if colour not in self._colours:
+            self._colours[self._colours.index(None)] = colour
+        return self._colours.index(colour)
+
+    @staticmethod
+    def typecode(bits):
+        """
+        returns the smallest unsigned array typecode holding bits bits
+        :param bits: int of bits needed
+        :return: str typecode, raises ValueError if no typecode is that wide
+        """
+        for code in "BHILQ":
+            if array(code).itemsize * 8 >= bits:
+                return code
+        raise ValueError("no array typecode holds %d bits" % bits)
+
+    @staticmethod
+    def cell_width(max_height):
+        # returns bytes per cell in to_bytes, a cell at rest is below 1 << (max_height + 1)
+        return array(StackArray.typecode(max_height + 1)).itemsize
+
+    def to_bytes(self, max_height):
+        """
+        returns the cells as bytes, cell_width bytes little endian each: 1 while
+        max_height is below 8, 2 while it is below 16 and 4 while it is below 32
+        :param max_height: int of pieces allowed on a tile
+        :return: bytes
+        """
+        cells = array(self.typecode(max_height + 1), self._cells)
+        if cells.itemsize > 1 and sys.byteorder == "big":
+            cells.byteswap()
+        return cells.tobytes()
+
+    def load_bytes(self, data, max_height):
+        """
+        replaces the cells with bytes from to_bytes
+        :param data: bytes or memoryview from to_bytes
+        :param max_height: int of pieces allowed on a tile
+        """
+        cells = array(self.typecode(max_height + 1))
+        cells.frombytes(data)
+        if cells.itemsize > 1 and sys.byteorder == "big":
+            cells.byteswap()
+        self._cells[:] = array(self._cells.typecode, cells)
+
+    def pack(self, pieces):
+        """
+        packs list of pieces (bottom first) into an int with the sentinel bit on top
+        :param pieces: list of str colours
+        :return: packed int
+        """
+        packed = 1 << len(pieces)
+        for i, piece in enumerate(pieces):
+            packed |= self.colour_index(piece) << i
+        return packed
+
+    def unpack(self, packed):
+        # returns list of colours (bottom first) of packed int
+        return [self._colours[(packed >> i) & 1] for i in range(packed.bit_length() - 1)]
+
+    def count_colour(self, packed, colour):
+        """
+        counts pieces of colour in packed int, used to split removed pieces into
+        reserves and captures
+        :param packed: packed int with sentinel bit
+        :param colour: str colour
+        :return: int count
+        """
+        count = packed.bit_length() - 1
+        ones = (packed ^ (1 << count)).bit_count()
+        return ones if self.colour_index(colour) == 1 else count - ones
+
+    def get_pieces(self, index):
+        # returns list of colours on cell index, bottom first
+        return self.unpack(self._cells[index])
+
+    def get_height(self, index):
+        # returns number of pieces on cell index
+        return self._cells[index].bit_length() - 1
+
+    def get_top(self, index):
+        # returns colour of the top piece on cell index, None if it is empty
+        cell = self._cells[index]
+        height = cell.bit_length() - 1
+        if height == 0:
+            return None
+        return self._colours[(cell >> (height - 1)) & 1]
+
+    def set_pieces(self, index, pieces):
+        # replaces the pieces on cell index with list of colours
+        self._cells[index] = self.pack(pieces)
+
+    def lift(self, index, num_of_pieces):
+        """
+        removes the top num_of_pieces from cell index
+        :param index: int index of cell
+        :param num_of_pieces: int of pieces to lift, at most the height of the cell
+        :return: packed int of the lifted pieces
+        """
+        cell = self._cells[index]
+        keep = cell.bit_length() - 1 - num_of_pieces
+        self._cells[index] = (cell & ((1 << keep) - 1)) | (1 << keep)
+        return cell >> keep
+
+    def drop(self, index, pile):
+        """
+        stacks packed pile on top of cell index
+        :param index: int index of cell
+        :param pile: packed int of pieces to add
+        :return: changed cell at index
+        """
+        cell = self._cells[index]
+        height = cell.bit_length() - 1
+        self._cells[index] = (cell ^ (1 << height)) | (pile << height)
+
+    def trim(self, index, max_height):
+        """
+        removes pieces from the bottom of cell index until it is max_height tall
+        :param index: int index of cell
+        :param max_height: int of pieces allowed on a tile
+        :return: packed int of the removed pieces, 1 if none were removed
+        """
+        cell = self._cells[index]
+        over = cell.bit_length() - 1 - max_height
+        if over <= 0:
+            return 1
+        self._cells[index] = cell >> over
+        return (cell & ((1 << over) - 1)) | (1 << over)
+
+    def add_bottom(self, index, pile):
+        # puts packed pile under cell index, undoing trim
+        count = pile.bit_length() - 1
+        cell = self._cells[index]
+        self._cells[index] = (cell << count) | (pile ^ (1 << count))
+
+
 class Tile:
     """
-    Represents Tile object that contain data members: position, top, height, pieces.
+    Represents Tile object that contain data members: position, stacks and index.
     Communicates with Board and FocusGame to provide information on what pieces exist at
     a location using get_pieces, the height using get_height, top of stack using
     get_top and pieces on the Tile using get_pieces
-    Pieces is a list of "R" or "G" representing a stack/piece on a tile
+    Pieces is a list of "R" or "G" representing a stack/piece on a tile, kept packed in
+    cell index of a StackArray so the Tile is only a view onto it
     """
 
-    def __init__(self, position, pieces):
+    def __init__(self, position, pieces, stacks=None, index=0):
         """
-        initializes tile position, top, height and pieces
+        initializes tile position and writes pieces into its cell
         :param position: tuple of 2 numbers, (row and column)
-        :param pieces: list of _p1/_p2._colour
+        :param pieces: list of _p1/_p2._colour, None to view the cell as it is
+        :param stacks: StackArray holding the cell, a Tile made on its own gets a one
+                       cell StackArray with the colours in pieces
+        :param index: int index of the cell in stacks
         :return: Tile object
         """
+        if stacks is None:
+            stacks = StackArray((list(dict.fromkeys(pieces)) + [None, None])[:2], 1)
         self._position = position
-        self._pieces = pieces
-        self._height = len(pieces)
-        self._top = self._pieces[-1]
+        self._stacks = stacks
+        self._index = index
+        if pieces is not None:
+            self._stacks.set_pieces(index, pieces)
 
     def get_position(self):
         # returns position
@@ -446,45 +1295,56 @@ class Tile:
 
     def get_pieces(self):
         # returns pieces
-        return self._pieces
+        return self._stacks.get_pieces(self._index)
 
     def get_height(self):
         # returns height
-        return self._height
+        return self._stacks.get_height(self._index)
 
     def get_top(self):
-        # returns top
-        return self._top
+        # returns top, None if the tile is empty
+        return self._stacks.get_top(self._index)
 
     def add(self, pieces):
         """
-        adds list of pieces onto self._pieces by appending to _pieces
+        adds list of pieces onto the top of the stack
         :param pieces: list of str "colour1" or "colour2"
-        :return: pieces appended onto Tile._pieces
+        :return: pieces packed onto the cell of the Tile
         """
-        self._height += len(pieces)
-        self._pieces.extend(pieces)
-        self._top = self._pieces[-1]
+        self._stacks.drop(self._index, self._stacks.pack(pieces))
 
     def remove_bottom(self):
         """
         removes first element and return it's value
-        :return: value of element[0] removed from _pieces
+        :return: value of bottom piece removed from the stack
+        """
+        return self._stacks.unpack(self._stacks.trim(
+            self._index, self.get_height() - 1))[0]
+
+    def add_bottom(self, pieces):
+        """
+        puts list of pieces back under the stack, undoing remove_bottom
+        :param pieces: list of str "colour1" or "colour2", bottom first
+        :return: pieces packed under the cell of the Tile
         """
-        self._height -= 1
-        piece = self._pieces[0]
-        del self._pieces[0]
-        return piece
+        self._stacks.add_bottom(self._index, self._stacks.pack(pieces))
 
     def remove_top(self):
         """
         removes last element/top
-        :return: changed value of tile._pieces
+        :return: changed cell of the Tile
         """
-        self._height -= 1
-        del self._pieces[-1]
-        if self._height > 0:
-            self._top = self._pieces[-1]
+        self._stacks.lift(self._index, 1)
+
+
+def apply_to_games(batches, validate_only=False):
+    """
+    runs FocusGame.apply_moves for the moves of many games
+    :param batches: iterable of (FocusGame, moves) pairs, moves as apply_moves takes them
+    :param validate_only: True to leave every game as it was
+    :return: list of the bytes of result codes of each game, in order
+    """
+    return [game.apply_moves(moves, validate_only) for game, moves in batches]
 
 
 if __name__ == "__main__":
@@ -1,6 +1,12 @@
 # This file contains tests for FocusGame.
+import contextlib
+import io
+import random
 import unittest
-from FocusGame import FocusGame, Tile, Board
+from FocusGame import FocusGame, Tile, Board, apply_to_games, MOVE_OK, MOVE_UNKNOWN_PLAYER, \
+    MOVE_GAME_OVER, MOVE_NOT_YOUR_TURN, MOVE_INVALID_LOCATION, MOVE_INVALID_PIECES, \
+    MOVE_NO_RESERVES, NAME_LIMIT, LENGTH_LIMIT, WIN_LIMIT
+from events import MoveApplied, PiecesReserved, PiecesCaptured, GameWon
 
 
 class FocusGameTests(unittest.TestCase):
@@ -207,6 +213,309 @@ class FocusGameTests(unittest.TestCase):
         g.move_piece('player1', (0, 3), (1, 3), 1)
         self.assertEqual(g.get_tile((1, 3)).get_pieces(), ['r', 'g', 'g', 'r'])
 
+    def brute_force_moves(self, g):
+        # every (start, destination, num_of_pieces) accepted by the validation checks
+        moves = []
+        for start in [(r, c) for r in range(6) for c in range(6)]:
+            for destination in [(r, c) for r in range(6) for c in range(6)]:
+                for n in range(1, 6):
+                    if g.check_location(n, start, destination) and \
+                            g.check_number_of_pieces(n, start):
+                        moves.append((start, destination, n))
+        return moves
+
+    def test_legal_moves_at_start_match_validation_checks(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        self.assertEqual(sorted(g.legal_moves('player1')), sorted(self.brute_force_moves(g)))
+
+    def test_legal_moves_updated_after_multiple_moves(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        g.move_piece('player2', (1, 0), (1, 1), 1)
+        g.move_piece('player1', (0, 1), (0, 3), 2)
+        g.move_piece('player2', (1, 1), (1, 3), 2)
+        self.assertIn(((0, 3), (3, 3), 3), g.legal_moves('player1'))
+        self.assertEqual(sorted(g.legal_moves('player1')), sorted(self.brute_force_moves(g)))
+
+    def test_legal_moves_on_wrong_turn(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        self.assertEqual(g.legal_moves('player2'), False)
+
+    def test_legal_moves_includes_reserve_moves_when_player_has_reserves(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g._p1.change_reserves(1)
+        self.assertEqual(len([m for m in g.legal_moves('player1') if m[0] is None]), 36)
+
+    def snapshot(self, g):
+        # every piece of game state make_move/unmake_move must restore
+        return ([[list(tile.get_pieces()) for tile in line] for line in g.get_board().get_board()],
+                g.show_reserve('player1'), g.show_captured('player1'),
+                g.show_reserve('player2'), g.show_captured('player2'), g.get_turn(),
+                sorted(g.legal_moves(g.get_turn()), key=str))
+
+    def test_make_move_matches_move_piece(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        h = FocusGame(("player1", "r"), ("player2", "g"))
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        h.make_move(((0, 0), (0, 1), 1))
+        self.assertEqual(self.snapshot(g), self.snapshot(h))
+
+    def test_unmake_move_restores_game_after_overflow_and_reserve_moves(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        rng = random.Random(7)
+        tokens, snapshots = [], []
+        for _ in range(120):
+            snapshots.append(self.snapshot(g))
+            tokens.append(g.make_move(rng.choice(g.legal_moves(g.get_turn()))))
+        self.assertTrue(any(token[4] for token in tokens))
+        self.assertTrue(any(token[0][0] is None for token in tokens))
+        while tokens:
+            g.unmake_move(tokens.pop())
+            self.assertEqual(self.snapshot(g), snapshots.pop())
+
+    def test_reserved_moves_past_max_height_remove_bottom_pieces_into_reserves_and_captures(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g._p1.change_reserves(3)
+        g._p2.change_reserves(3)
+        for _ in range(3):
+            g.reserved_move('player1', (0, 0))
+            g.reserved_move('player2', (0, 0))
+        self.assertEqual(g.show_pieces((0, 0)), ['g', 'r', 'g', 'r', 'g'])
+        self.assertEqual(g.show_reserve('player1'), 1)
+        self.assertEqual(g.show_captured('player2'), 1)
+
+    def test_tile_add_remove_bottom_and_remove_top_on_standalone_tile(self):
+        g = Tile((0, 0), ["r"])
+        g.add(['g', 'g', 'r'])
+        self.assertEqual(g.remove_bottom(), 'r')
+        g.remove_top()
+        self.assertEqual((g.get_pieces(), g.get_height(), g.get_top()), (['g', 'g'], 2, 'g'))
+
+    def test_from_state_rebuilds_game_from_get_state(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g._p1.change_reserves(1)
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        g.move_piece('player2', (1, 0), (1, 1), 1)
+        h = FocusGame.from_state(g.get_state())
+        self.assertEqual(self.snapshot(h), self.snapshot(g))
+        self.assertEqual(h.get_hash(), g.compute_hash())
+
+    def test_quiet_game_does_not_print(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(g.move_piece('player1', (0, 0), (1, 0), 1), 'successfully moved')
+        self.assertEqual(out.getvalue(), '')
+
+    def test_listeners_get_move_reserve_capture_and_win_events(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        g._p1.change_reserves(3)
+        g._p2.change_reserves(3)
+        g._p2.change_captured(5)
+        events = []
+        g.subscribe(events.append)
+        for _ in range(3):
+            g.reserved_move('player1', (0, 0))
+            g.reserved_move('player2', (0, 0))
+        self.assertEqual([type(e) for e in events[-3:]], [MoveApplied, PiecesCaptured, GameWon])
+        self.assertEqual((events[-2].get_location(), events[-2].get_count()), ((0, 0), 1))
+        self.assertIsInstance(events[-4], PiecesReserved)
+        self.assertEqual((events[-7].get_start(), events[-7].get_destination()), (None, (0, 0)))
+        g.unsubscribe(events.append)
+        self.assertEqual(g._listeners, [])
+
+    def test_to_bytes_round_trips_through_from_bytes(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        data = g.to_bytes()
+        h = FocusGame.from_bytes(memoryview(bytearray(data)))
+        self.assertEqual(self.snapshot(h), self.snapshot(g))
+        self.assertEqual(h.to_bytes(), data)
+
+    def test_to_bytes_has_fixed_size_and_works_as_dict_key(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        h = FocusGame(("player1", "r"), ("player2", "g"))
+        size = len(g.to_bytes())
+        seen = {g.to_bytes(): 'start'}
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        self.assertEqual(len(g.to_bytes()), size)
+        self.assertEqual(seen.get(h.to_bytes()), 'start')
+        self.assertNotIn(g.to_bytes(), seen)
+        self.assertEqual(len(g.position_key()), 18 + 36)
+
+    def test_players_must_be_names_and_colours_to_bytes_can_store(self):
+        longest = "\u00e9" * (NAME_LIMIT // 2)
+        g = FocusGame((longest, "r"), ("player2", "g"))
+        self.assertEqual(FocusGame.from_bytes(g.to_bytes()).get_p1().get_name(), longest)
+        for p1 in ((longest + "\u00e9", "r"), (1, "r"), ("player1", None), ("player1",),
+                   "pr", ("player1", "r", "x")):
+            with self.assertRaises(ValueError):
+                FocusGame(p1, ("player2", "g"))
+
+    def test_rules_to_bytes_cannot_store_are_refused(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 6, 5, WIN_LIMIT)
+        self.assertEqual(FocusGame.from_bytes(g.to_bytes()).get_rules(), (6, 5, WIN_LIMIT))
+        for rules in ((LENGTH_LIMIT + 1, 5, 6), (6, 5, WIN_LIMIT + 1), (0, 5, 6), (6, 5, 0),
+                      (6.0, 5, 6), (6, 32, 6)):
+            with self.assertRaises(ValueError):
+                FocusGame(("player1", "r"), ("player2", "g"), True, *rules)
+
+    def test_board_length_stack_limit_and_win_threshold_are_rules(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 8, 1, 1)
+        self.assertEqual(g.get_rules(), (8, 1, 1))
+        self.assertTrue(g.check_on_board((7, 7)))
+        self.assertFalse(g.check_on_board((8, 0)))
+        self.assertEqual(g.show_pieces((1, 0)), ['r'])
+        self.assertEqual(g.move_piece('player1', (0, 1), (0, 2), 1), 'player1 wins!')
+        self.assertEqual(g.show_pieces((0, 2)), ['r'])
+
+    def test_games_of_one_shape_share_move_tables(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 12, 9)
+        h = FocusGame(("player3", "b"), ("player4", "w"), True, 12, 9)
+        self.assertIs(g._move_table, h._move_table)
+        self.assertIsNot(g._move_table, FocusGame(("player1", "r"), ("player2", "g"))._move_table)
+
+    def test_large_board_with_tall_stacks_round_trips(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 12, 10, 1000)
+        rng = random.Random(4)
+        for _ in range(300):
+            g.make_move(rng.choice(g.legal_moves(g.get_turn())))
+        self.assertEqual(len(g.position_key()), 18 + 2 * 144)
+        for h in (FocusGame.from_bytes(g.to_bytes()), FocusGame.from_state(g.get_state())):
+            self.assertEqual(self.snapshot(h), self.snapshot(g))
+            self.assertEqual(h.get_hash(), g.get_hash())
+
+    def scan_features(self, g):
+        # features counted by walking the board, as callers did before features()
+        colours = (g.get_p1().get_colour(), g.get_p2().get_colour())
+        counts = {"stacks": [0, 0], "pieces": [0, 0], "height": [0, 0], "full": [0, 0],
+                  "near_full": [0, 0]}
+        for line in g.get_board().get_board():
+            for tile in line:
+                if tile.get_height():
+                    top = colours.index(tile.get_top())
+                    counts["stacks"][top] += 1
+                    counts["height"][top] += tile.get_height()
+                    counts["full"][top] += tile.get_height() >= g.get_rules()[1]
+                    counts["near_full"][top] += tile.get_height() >= g.get_rules()[1] - 1
+                for side in (0, 1):
+                    counts["pieces"][side] += tile.get_pieces().count(colours[side])
+        return {name: tuple(value) for name, value in counts.items()}
+
+    def test_features_match_board_scan_through_moves_and_unmakes(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        rng = random.Random(9)
+        tokens, full, near_full = [], 0, 0
+        for _ in range(200):
+            tokens.append(g.make_move(rng.choice(g.legal_moves(g.get_turn()))))
+            features = g.features()
+            full = max(full, sum(features["full"]))
+            near_full = max(near_full, sum(features["near_full"]) - sum(features["full"]))
+            self.assertEqual({name: features[name] for name in self.scan_features(g)},
+                             self.scan_features(g))
+            self.assertEqual(features["captures"], (g.show_captured('player1'),
+                                                    g.show_captured('player2')))
+        self.assertGreater(full, 0)
+        self.assertGreater(near_full, 0)
+        for token in reversed(tokens):
+            g.unmake_move(token)
+        self.assertEqual(g.features(), FocusGame(("player1", "r"), ("player2", "g")).features())
+
+    def test_features_rebuilt_by_set_position(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        g.move_piece('player1', (0, 1), (0, 2), 1)
+        h = FocusGame.from_bytes(g.to_bytes())
+        self.assertEqual(h.features(), g.features())
+        self.assertEqual(h.features()["height"], (19, 17))
+
+    def test_apply_moves_reports_which_check_failed(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        codes = g.apply_moves([
+            ('nobody', (0, 0), (0, 1), 1),
+            ('player2', (1, 0), (1, 1), 1),
+            ('player1', (0, 0), (1, 1), 1),
+            ('player1', (1, 0), (1, 1), 1),
+            ('player1', (0, 0), (0, 2), 2),
+            ('player1', None, (2, 2), 1),
+            ('player1', (0, 0), (0, 0), 0),
+            ('player1', (0, 1), (0, 1), 1),
+            ('player1', (0, 0), (0, 6), 6),
+            ('player1', (0, 0), (0, 1), 1),
+            ('player2', (1, 0), (1, 1), 1),
+            ('player1', (0, 1), (0, 3), 2)])
+        self.assertEqual(list(codes), [
+            MOVE_UNKNOWN_PLAYER, MOVE_NOT_YOUR_TURN, MOVE_INVALID_LOCATION,
+            MOVE_INVALID_LOCATION, MOVE_INVALID_PIECES, MOVE_NO_RESERVES,
+            MOVE_INVALID_LOCATION, MOVE_INVALID_LOCATION, MOVE_INVALID_LOCATION,
+            MOVE_OK, MOVE_OK, MOVE_OK])
+        self.assertEqual(g.show_pieces((0, 3)), ['g', 'r', 'r'])
+        g._p1.change_captured(6)
+        self.assertEqual(g.apply_moves([('player2', (1, 1), (1, 3), 2)]),
+                         bytes([MOVE_GAME_OVER]))
+
+    def test_moves_after_a_win_are_refused_by_both_paths(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 8, 1, 1)
+        self.assertEqual(g.move_piece('player1', (0, 1), (0, 2), 1), 'player1 wins!')
+        g._p1.change_reserves(1)
+        before = g.to_bytes()
+        self.assertEqual(g.legal_moves('player1'), [])
+        moves = [('player1', (1, 0), (1, 1), 1), ('player1', None, (3, 3), 1)]
+        self.assertFalse(g.move_piece(*moves[0]))
+        self.assertFalse(g.reserved_move('player1', (3, 3)))
+        self.assertEqual(g.apply_moves(moves), bytes([MOVE_GAME_OVER] * 2))
+        self.assertEqual(g.to_bytes(), before)
+
+    def test_apply_moves_refuses_floats_and_rolls_back_a_broken_batch(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        before = g.to_bytes()
+        moves = [('player1', (0, 0), (0, 1), 1), ('player2', (1.0, 0), (1, 1), 1),
+                 ('player2', (1, 0), (1, 1), 1.0), ('player2', [True, 0], (1, 1), 1),
+                 ('player2', None, (2, 2, 2), 1)]
+        self.assertEqual(g.apply_moves(moves, validate_only=True), bytes(
+            [MOVE_OK, MOVE_INVALID_LOCATION, MOVE_INVALID_PIECES, MOVE_INVALID_LOCATION,
+             MOVE_NO_RESERVES]))
+        self.assertEqual((g.to_bytes(), g.get_turn()), (before, 'player1'))
+        events = []
+        g.subscribe(events.append)
+        for validate_only in (True, False):
+            with self.assertRaises(ValueError):
+                g.apply_moves([moves[0], ('player2', (1, 0), (1, 1))], validate_only)
+            self.assertEqual((g.to_bytes(), g.get_turn()), (before, 'player1'))
+        self.assertEqual(events, [])
+        self.assertEqual(g.get_hash(), FocusGame.from_bytes(before).get_hash())
+
+    def test_apply_moves_agrees_with_move_piece_on_random_moves(self):
+        rng = random.Random(4)
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        h = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        for _ in range(400):
+            name = rng.choice(('player1', 'player2'))
+            if rng.random() < 0.5 and g.legal_moves(g.get_turn()):
+                move = rng.choice(g.legal_moves(g.get_turn()))
+            else:
+                move = (None if rng.random() < 0.2 else (rng.randrange(-1, 7), rng.randrange(7)),
+                        (rng.randrange(7), rng.randrange(-1, 7)), rng.randrange(-1, 7))
+            if move[0] is None:
+                expected = h.reserved_move(name, move[1])
+            else:
+                expected = h.move_piece(name, *move)
+            code = g.apply_moves([(name,) + move])[0]
+            self.assertEqual(code == MOVE_OK, bool(expected), (name, move))
+        self.assertEqual(g.to_bytes(), h.to_bytes())
+
+    def test_apply_moves_validate_only_and_many_games(self):
+        games = [FocusGame(("player1", "r"), ("player2", "g"), quiet=True) for _ in range(3)]
+        before = games[0].to_bytes()
+        moves = [('player1', (0, 0), (0, 1), 1), ('player2', (1, 0), (1, 1), 1)]
+        results = apply_to_games([(games[0], moves), (games[1], moves[1:])], True)
+        self.assertEqual(results, [bytes([MOVE_OK, MOVE_OK]), bytes([MOVE_NOT_YOUR_TURN])])
+        self.assertEqual(games[0].to_bytes(), before)
+        events = []
+        games[2].subscribe(events.append)
+        games[2].apply_moves(moves)
+        self.assertEqual([type(event) for event in events], [MoveApplied, MoveApplied])
+        self.assertNotEqual(games[2].to_bytes(), before)
+
 
 if '__name__' == "__main__":
     # provided test
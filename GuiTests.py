@@ -0,0 +1,60 @@
+# This file contains tests for the parts of the GUI that work without a display.
+import time
+import unittest
+from concurrent.futures import Future
+from FocusGame import FocusGame
+from gui import ComputerPlayer, DirtyTiles
+
+
+class GuiTests(unittest.TestCase):
+
+    def setUp(self):
+        self.g = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True)
+
+    def test_dirty_tiles_collects_only_changed_tiles(self):
+        dirty = DirtyTiles()
+        self.g.subscribe(dirty)
+        self.assertEqual(dirty.take(), (set(), True))
+        self.g.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        self.assertEqual(dirty.take(), ({(0, 0), (0, 1)}, True))
+        self.assertEqual(dirty.take(), (set(), False))
+        self.g._p2.change_reserves(1)
+        self.g.reserved_move("PlayerB", (3, 3))
+        self.assertEqual(dirty.take(), ({(3, 3)}, True))
+        self.assertFalse(self.g.move_piece("PlayerA", (0, 0), (0, 1), 1))
+        self.assertEqual(dirty.take(), (set(), False))
+
+    def test_computer_move_arrives_through_the_queue(self):
+        computer = ComputerPlayer("PlayerA", time_limit_ms=50)
+        self.assertIsNone(computer.get_move())
+        before = self.g.get_state()
+        computer.think_about(self.g)
+        self.assertTrue(computer.is_thinking())
+        move, deadline = None, time.monotonic() + 30
+        while move is None and time.monotonic() < deadline:
+            move = computer.get_move()
+            time.sleep(0.01)
+        computer.close()
+        self.assertIn(move, self.g.legal_moves("PlayerA"))
+        self.assertFalse(computer.is_thinking())
+        self.assertEqual(self.g.get_state(), before)
+
+    def test_failed_search_and_no_move_end_the_thinking(self):
+        computer = ComputerPlayer("PlayerA")
+        failed, empty = Future(), Future()
+        failed.set_exception(RuntimeError("worker died"))
+        empty.set_result(None)
+        for done in (failed, empty):
+            computer._thinking = True
+            computer._moves.put(done)
+            self.assertIs(computer.get_move(), False)
+            self.assertFalse(computer.is_thinking())
+        self.assertIsNone(computer.get_error())
+        computer._moves.put(failed)
+        computer.get_move()
+        self.assertIsInstance(computer.get_error(), RuntimeError)
+        self.assertIsNone(computer.get_move())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+# This file contains tests for the Monte Carlo Tree Search player.
+import unittest
+from FocusGame import FocusGame
+from mcts import MCTS
+
+
+class MCTSTests(unittest.TestCase):
+
+    def test_search_returns_legal_move_and_leaves_game_unchanged(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        before = g.get_state()
+        result = MCTS(1, seed=2).search(g, playouts=30)
+        self.assertIn(result.get_move(), g.legal_moves('player1'))
+        self.assertEqual(result.get_playouts(), 30)
+        self.assertEqual(g.get_state(), before)
+
+    def test_worker_trees_are_merged(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        player = MCTS(2, seed=2)
+        result = player.search(g, playouts=10)
+        player.close()
+        self.assertEqual(result.get_playouts(), 20)
+        self.assertEqual(sum(visits for visits, _ in result.get_stats().values()), 20)
+
+    def test_search_without_a_limit_is_refused(self):
+        with self.assertRaises(ValueError):
+            MCTS(1).search(FocusGame(("player1", "r"), ("player2", "g")))
+
+
+if __name__ == "__main__":
+    unittest.main()
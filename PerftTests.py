@@ -0,0 +1,42 @@
+# This file contains tests for the perft move tree counter.
+import unittest
+from perft import load_position, perft, divide
+
+# reference counts, a change to any of these is a change to the move generator
+START_COUNTS = [1, 60, 3452, 204448]
+TALL_COUNTS = [1, 114, 3127, 350545]
+
+
+class PerftTests(unittest.TestCase):
+
+    def test_start_counts(self):
+        game = load_position("start")
+        for depth, count in enumerate(START_COUNTS):
+            self.assertEqual(perft(game, depth), count)
+
+    def test_tall_counts_with_reserves_and_overflow(self):
+        game = load_position("tall")
+        self.assertEqual(game.show_reserve(game.get_turn()), 2)
+        for depth, count in enumerate(TALL_COUNTS):
+            self.assertEqual(perft(game, depth), count)
+
+    def test_perft_restores_position(self):
+        game = load_position("tall")
+        before = game.to_bytes()
+        perft(game, 3)
+        self.assertEqual(game.to_bytes(), before)
+        self.assertEqual(game.get_hash(), game.compute_hash())
+
+    def test_divide_sums_to_perft(self):
+        game = load_position("tall")
+        counts = divide(game, 2)
+        self.assertEqual([move for move, _ in counts], game.legal_moves(game.get_turn()))
+        self.assertEqual(sum(count for _, count in counts), TALL_COUNTS[2])
+
+    def test_divide_over_processes_matches(self):
+        game = load_position("start")
+        self.assertEqual(divide(game, 3, processes=2), divide(game, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# This file contains tests for the immutable positions in persistent.
+import random
+import tracemalloc
+import unittest
+from FocusGame import FocusGame
+from persistent import Position
+
+P1, P2 = ("player1", "r"), ("player2", "g")
+
+
+class PersistentTests(unittest.TestCase):
+
+    def test_random_games_match_focus_game(self):
+        for rules in ((6, 5, 6), (9, 9, 12)):
+            g = FocusGame(P1, P2, True, *rules)
+            p = Position.from_game(g)
+            rng = random.Random(2)
+            for _ in range(300):
+                self.assertEqual(p.legal_moves(), g.legal_moves(g.get_turn()))
+                move = rng.choice(p.legal_moves())
+                g.make_move(move)
+                p = p.play(move)
+                self.assertEqual(p.get_state(), g.get_state())
+                if p.get_winner():
+                    break
+            self.assertEqual(p.get_winner(), g.get_turn() if g.check_win(g.get_turn()) else None)
+
+    def test_play_leaves_parent_unchanged_and_shares_rows(self):
+        p = Position.from_game(FocusGame(P1, P2))
+        child = p.play(((0, 0), (0, 1), 1))
+        self.assertEqual(p.get_pieces((0, 1)), ['r'])
+        self.assertEqual(child.get_pieces((0, 1)), ['r', 'r'])
+        self.assertEqual(child.get_turn(), 'player2')
+        self.assertTrue(all(a is b for a, b in zip(p.get_rows()[1:], child.get_rows()[1:])))
+        self.assertIs(child.get_counts(), p.get_counts())
+        self.assertIs(child.get_setup(), p.get_setup())
+
+    def test_converts_both_ways_and_compares_by_position(self):
+        g = FocusGame(P1, P2, quiet=True)
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        p = Position.from_game(g)
+        self.assertEqual(p.to_game().to_bytes(), g.to_bytes())
+        same = Position.from_game(FocusGame(P1, P2)).play(((0, 0), (0, 1), 1))
+        self.assertEqual(same, p)
+        self.assertEqual(len({same, p}), 1)
+        self.assertNotEqual(p.play(((1, 0), (1, 1), 1)), p)
+
+    def test_child_positions_take_a_few_hundred_bytes(self):
+        root = Position.from_game(FocusGame(P1, P2))
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        children = [root.play(move) for move in root.legal_moves()]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        self.assertLess(allocated / len(children), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
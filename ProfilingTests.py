@@ -0,0 +1,64 @@
+# This file contains tests for the per-method profiler.
+import unittest
+from FocusGame import FocusGame, Board, Tile
+from profiling import Profiler
+
+
+class ProfilingTests(unittest.TestCase):
+
+    def test_counts_calls_while_enabled(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        profiler = Profiler()
+        with profiler:
+            g.move_piece('player1', (0, 0), (0, 1), 1)
+            g.move_piece('player2', (0, 2), (0, 1), 1)
+        stats = profiler.get_stats()
+        self.assertEqual(stats["FocusGame.move_piece"]["calls"], 2)
+        self.assertEqual(stats["FocusGame.check_location"]["calls"], 2)
+        self.assertGreater(stats["FocusGame.move_piece"]["total_ns"], 0)
+        self.assertNotIn("FocusGame.reserved_move", stats)
+
+    def test_disable_restores_original_methods(self):
+        originals = [vars(cls).copy() for cls in (FocusGame, Board, Tile)]
+        profiler = Profiler()
+        self.assertTrue(profiler.enable())
+        self.assertIsNot(vars(FocusGame)["move_piece"], originals[0]["move_piece"])
+        self.assertTrue(profiler.disable())
+        self.assertEqual([vars(cls).copy() for cls in (FocusGame, Board, Tile)], originals)
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        g.move_piece('player1', (0, 0), (0, 1), 1)
+        self.assertEqual(profiler.get_stats(), {})
+
+    def test_only_one_profiler_enabled(self):
+        first, second = Profiler(), Profiler()
+        self.assertTrue(first.enable())
+        self.assertFalse(second.enable())
+        self.assertFalse(second.disable())
+        self.assertTrue(first.disable())
+        self.assertFalse(first.is_enabled())
+
+    def test_reset_while_enabled_keeps_counting(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), quiet=True)
+        profiler = Profiler()
+        with profiler:
+            g.move_piece('player1', (0, 0), (0, 1), 1)
+            profiler.reset()
+            self.assertEqual(profiler.get_stats(), {})
+            g.move_piece('player2', (0, 2), (0, 1), 1)
+        stats = profiler.get_stats()
+        self.assertEqual(stats["FocusGame.move_piece"]["calls"], 1)
+        self.assertEqual(stats["FocusGame.check_location"]["calls"], 1)
+
+    def test_prometheus_text(self):
+        profiler = Profiler()
+        with profiler:
+            Tile((0, 0), ["r", "g"]).remove_bottom()
+        text = profiler.to_prometheus()
+        self.assertIn('focus_method_calls_total{class="Tile",method="remove_bottom"} 1\n', text)
+        self.assertIn("# TYPE focus_method_seconds_total counter", text)
+        profiler.reset()
+        self.assertEqual(profiler.get_stats(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# This file contains tests for the binary game record format.
+import io
+import random
+import unittest
+from FocusGame import FocusGame
+from records import RecordWriter, read_games, read_header, read_records, replay, \
+    encode_move, decode_move
+
+P1, P2 = ("player1", "r"), ("player2", "g")
+
+
+def random_game(seed, plies):
+    # returns moves of a random game and its winner
+    g = FocusGame(P1, P2, quiet=True)
+    rng = random.Random(seed)
+    moves, winner = [], None
+    for _ in range(plies):
+        name = g.get_turn()
+        moves.append(rng.choice(g.legal_moves(name)))
+        g.make_move(moves[-1])
+        if g.check_win(name):
+            winner = name
+            break
+    return moves, winner
+
+
+class RecordsTests(unittest.TestCase):
+
+    def test_move_fits_in_2_bytes_and_round_trips(self):
+        for move in (((5, 5), (0, 5), 5), (None, (3, 4), 1), ((0, 0), (0, 1), 1)):
+            self.assertLess(encode_move(move), 1 << 16)
+            self.assertEqual(decode_move(encode_move(move)), move)
+
+    def test_moves_widen_to_4_bytes_past_8x8(self):
+        self.assertLess(encode_move(((7, 7), (0, 7), 7), 8, 7), 1 << 16)
+        move = ((11, 11), (11, 1), 10)
+        self.assertGreaterEqual(encode_move(move, 12, 10), 1 << 16)
+        self.assertEqual(decode_move(encode_move(move, 12, 10), 12, 10), move)
+        self.assertEqual(decode_move(encode_move((None, (5, 9), 1), 12, 10), 12, 10),
+                         (None, (5, 9), 1))
+
+    def test_large_board_games_round_trip_with_their_rules(self):
+        g = FocusGame(P1, P2, True, 12, 10, 1000)
+        rng = random.Random(6)
+        moves = []
+        for _ in range(200):
+            moves.append(rng.choice(g.legal_moves(g.get_turn())))
+            g.make_move(moves[-1])
+        stream = io.BytesIO()
+        with RecordWriter(stream, g.get_rules()) as writer:
+            writer.write_game(P1, P2, moves)
+        stream.seek(0)
+        rules = read_header(stream)
+        self.assertEqual(rules, (12, 10, 1000))
+        record = next(read_records(stream, *rules[:2]))
+        self.assertEqual(record, (P1, P2, moves, None))
+        self.assertEqual(replay(P1, P2, moves, rules=rules).get_state(), g.get_state())
+
+    def test_games_round_trip_and_replay_to_same_position(self):
+        games = [random_game(seed, 300) for seed in range(5)]
+        stream = io.BytesIO()
+        with RecordWriter(stream) as writer:
+            for moves, winner in games:
+                writer.write_game(P1, P2, moves, winner)
+        stream.seek(0)
+        for (moves, winner), record in zip(games, read_games(stream)):
+            self.assertEqual(record, (P1, P2, moves, winner))
+            fast, checked = replay(P1, P2, moves), replay(P1, P2, moves, validate=True)
+            self.assertEqual(fast.get_state(), checked.get_state())
+
+    def test_read_games_is_a_generator(self):
+        stream = io.BytesIO()
+        writer = RecordWriter(stream)
+        writer.write_game(P1, P2, [((0, 0), (0, 1), 1)])
+        writer.write_game(P1, P2, [])
+        stream.seek(0)
+        games = read_games(stream)
+        self.assertEqual(next(games)[2], [((0, 0), (0, 1), 1)])
+        self.assertEqual(len(list(games)), 1)
+
+    def test_replay_with_validation_rejects_invalid_move(self):
+        self.assertFalse(replay(P1, P2, [((1, 0), (1, 1), 1)], validate=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
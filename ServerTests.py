@@ -0,0 +1,67 @@
+# This file contains tests for the asyncio GameHost and its load generator.
+import asyncio
+import unittest
+from server import GameHost, request, run_load
+
+
+class ServerTests(unittest.TestCase):
+
+    def run_with_server(self, client):
+        # runs client(port) against a GameHost listening on a free port
+        async def main():
+            server = await GameHost().start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await client(port)
+        return asyncio.run(main())
+
+    def test_new_move_show_and_close_over_socket(self):
+        async def client(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            game = (await request(reader, writer, {"op": "new", "p1": ["A", "r"],
+                                                   "p2": ["B", "g"]}))["game"]
+            moved = await request(reader, writer, {"op": "move", "game": game, "name": "A",
+                                                   "start": [0, 0], "destination": [0, 1],
+                                                   "pieces": 1, "id": 7})
+            wrong = await request(reader, writer, {"op": "reserve", "game": game,
+                                                   "name": "A", "location": [0, 0]})
+            shown = await request(reader, writer, {"op": "show", "game": game,
+                                                   "position": [0, 1]})
+            closed = await request(reader, writer, {"op": "close", "game": game})
+            writer.close()
+            return moved, wrong, shown, closed
+        moved, wrong, shown, closed = self.run_with_server(client)
+        self.assertEqual(moved, {"ok": True, "result": "successfully moved", "id": 7})
+        self.assertEqual(wrong, {"ok": True, "result": False})
+        self.assertEqual(shown["result"], ["r", "r"])
+        self.assertTrue(closed["ok"])
+
+    def test_bad_requests_get_errors(self):
+        host = GameHost()
+        self.assertFalse(host.handle({"op": "move", "game": 99})["ok"])
+        self.assertEqual(host.respond(b"not json\n"), b'{"ok": false, "error": "bad json"}\n')
+        new = {"op": "new", "p1": ["a", "r"], "p2": ["b", "g"]}
+        self.assertFalse(host.handle(dict(new, rules=[255, 31, 6]))["ok"])
+        self.assertTrue(host.handle(dict(new, rules=[8, 6, 10]))["ok"])
+
+    def test_batch_returns_a_code_per_move(self):
+        host = GameHost()
+        game = host.handle({"op": "new", "p1": ["a", "r"], "p2": ["b", "g"]})["game"]
+        moves = [["a", [0, 0], [0, 1], 1], ["a", [1, 0], [1, 1], 1], ["b", None, [2, 2], 1]]
+        self.assertEqual(host.handle({"op": "batch", "game": game, "moves": moves,
+                                      "validate": True}), {"ok": True, "result": [0, 3, 6]})
+        self.assertEqual(host.handle({"op": "show", "game": game, "position": [0, 1]}),
+                         {"ok": True, "result": ["r"]})
+        host.handle({"op": "batch", "game": game, "moves": moves[:1]})
+        self.assertEqual(host.handle({"op": "show", "game": game, "position": [0, 1]}),
+                         {"ok": True, "result": ["r", "r"]})
+        self.assertFalse(host.handle({"op": "batch", "game": game, "moves": [[1]]})["ok"])
+
+    def test_load_generator_reports_latency_percentiles(self):
+        stats = self.run_with_server(lambda port: run_load("127.0.0.1", port, 10, 3, 4))
+        self.assertEqual(stats["requests"], 40)
+        self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# This file contains tests for BatchSimulator, skipped when numpy is not installed.
+import random
+import unittest
+from FocusGame import FocusGame
+try:
+    import numpy
+    from simulator import BatchSimulator, encode_moves
+except ImportError:
+    numpy = None
+
+P1, P2 = ("player1", "r"), ("player2", "g")
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class SimulatorTests(unittest.TestCase):
+
+    def test_reset_matches_initial_board(self):
+        sim = BatchSimulator(3)
+        self.assertEqual(sim.get_state(2, P1, P2), FocusGame(P1, P2).get_state())
+
+    def test_random_games_match_focus_game_exactly(self):
+        rng = random.Random(6)
+        games = [FocusGame(P1, P2) for _ in range(16)]
+        sim = BatchSimulator(len(games))
+        for _ in range(250):
+            moves = [rng.choice(g.legal_moves(g.get_turn()) or [(None, (0, 0), 1)])
+                     for g in games]
+            wins = []
+            for g, move in zip(games, moves):
+                if sim.get_done()[len(wins)]:
+                    wins.append(False)
+                    continue
+                name = g.get_turn()
+                g.make_move(move)
+                wins.append(g.check_win(name))
+            rewards, done = sim.step(encode_moves(moves))
+            self.assertEqual(list(rewards == 1.0), wins)
+            for i, g in enumerate(games):
+                self.assertEqual(sim.get_state(i, P1, P2), g.get_state())
+        self.assertTrue(sim.get_reserves().any())
+        self.assertTrue(sim.get_captures().any())
+
+    def test_large_board_with_tall_stacks_matches_focus_game(self):
+        rng = random.Random(7)
+        g = FocusGame(P1, P2, True, 10, 12, 20)
+        sim = BatchSimulator(1, 10, 12, 20)
+        for _ in range(300):
+            move = rng.choice(g.legal_moves(g.get_turn()))
+            g.make_move(move)
+            sim.step(encode_moves([move], 10))
+        self.assertEqual(sim.get_state(0, P1, P2), g.get_state())
+
+    def test_set_game_copies_focus_game_position(self):
+        g = FocusGame(P1, P2)
+        g.make_move(((0, 0), (0, 1), 1))
+        sim = BatchSimulator(2)
+        sim.set_game(1, g)
+        self.assertEqual(sim.to_game(1, P1, P2).get_state(), g.get_state())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# This file contains tests for the spectator change feed.
+import asyncio
+import json
+import random
+import unittest
+from FocusGame import FocusGame
+from server import GameHost, request
+from spectator import Feed, Spectator
+
+
+def play_random(game, rng, plies):
+    # plays plies random legal moves through move_piece and reserved_move
+    for _ in range(plies):
+        name = game.get_turn()
+        move = rng.choice(game.legal_moves(name))
+        if move[0] is None:
+            game.reserved_move(name, move[1])
+        else:
+            game.move_piece(name, *move)
+
+
+class SpectatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.g = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True)
+
+    def assert_view_matches(self, view):
+        # checks a Spectator's view against the game
+        self.assertEqual(view.get_cells(), list(self.g.get_board().get_stacks().get_cells()))
+        self.assertEqual(view.get_counts(), list(self.g.get_state()[3]))
+        self.assertEqual(view.get_turn(), self.g.get_turn())
+
+    def test_deltas_hold_only_changed_tiles_and_rebuild_the_game(self):
+        feed = Feed(self.g, keyframe_every=1000)
+        self.g.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        delta = json.loads(feed.get_messages()[-1])
+        self.assertEqual(delta, {"seq": 1, "tiles": [[0, 1], [1, 4]], "turn": "PlayerB"})
+        play_random(self.g, random.Random(1), 80)
+        self.assertEqual(feed.get_seq(), 81)
+        view = Spectator()
+        self.assertTrue(all(view.apply(message) for message in feed.get_messages()))
+        self.assert_view_matches(view)
+        self.assertLess(max(len(message) for message in feed.get_messages()[1:]), 80)
+
+    def test_keyframes_bound_the_backlog_and_late_joiners_catch_up(self):
+        feed = Feed(self.g, keyframe_every=10)
+        play_random(self.g, random.Random(2), 25)
+        self.assertEqual(len(feed.get_messages()), 6)
+        self.assertEqual(json.loads(feed.get_keyframe())["seq"], 20)
+        view = Spectator()
+        self.assertFalse(view.apply(feed.get_messages()[1]))
+        for message in feed.get_messages():
+            view.apply(message)
+        self.assert_view_matches(view)
+        self.assertEqual(view.get_seq(), 25)
+
+    def test_async_watchers_fan_out_and_slow_watchers_resync(self):
+        async def main():
+            feed = Feed(self.g, keyframe_every=8)
+            views = [Spectator() for _ in range(500)]
+
+            async def watch(view, delay):
+                async for message in feed.watch():
+                    self.assertTrue(view.apply(message))
+                    if delay:
+                        await asyncio.sleep(delay)
+            tasks = [asyncio.ensure_future(watch(view, 0.002 * (i == 0)))
+                     for i, view in enumerate(views)]
+            await asyncio.sleep(0)
+            rng = random.Random(3)
+            for _ in range(40):
+                play_random(self.g, rng, 1)
+                await asyncio.sleep(0)
+            feed.close()
+            await asyncio.gather(*tasks)
+            return views
+        views = asyncio.run(main())
+        for view in views:
+            self.assert_view_matches(view)
+
+    def test_watch_request_streams_the_feed_over_the_server(self):
+        async def main():
+            server = await GameHost().start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                game = (await request(reader, writer, {"op": "new", "p1": ["A", "r"],
+                                                       "p2": ["B", "g"]}))["game"]
+                watch_reader, watch_writer = await asyncio.open_connection("127.0.0.1", port)
+                watch_writer.write(json.dumps({"op": "watch", "game": game}).encode() + b"\n")
+                keyframe = json.loads(await watch_reader.readline())
+                await request(reader, writer, {"op": "move", "game": game, "name": "A",
+                                               "start": [0, 0], "destination": [0, 1],
+                                               "pieces": 1})
+                delta = json.loads(await watch_reader.readline())
+                await request(reader, writer, {"op": "close", "game": game})
+                end = await watch_reader.readline()
+                writer.close()
+                watch_writer.close()
+                return keyframe, delta, end
+        keyframe, delta, end = asyncio.run(main())
+        self.assertTrue(keyframe["keyframe"])
+        self.assertEqual(delta["seq"], 1)
+        self.assertEqual(end, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
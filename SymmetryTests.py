@@ -0,0 +1,62 @@
+# This file contains tests for symmetry canonicalization.
+import random
+import unittest
+from FocusGame import FocusGame
+from symmetry import canonical_form, transform_move, transform_position, inverse, reduction
+
+P1, P2 = ("player1", "r"), ("player2", "g")
+ALL = [(index, swap) for swap in (False, True) for index in range(8)]
+
+
+def random_game(seed, plies):
+    # returns quiet game after plies random moves
+    g = FocusGame(P1, P2, quiet=True)
+    rng = random.Random(seed)
+    for _ in range(plies):
+        g.make_move(rng.choice(g.legal_moves(g.get_turn())))
+    return g
+
+
+def transformed(g, transform):
+    # returns new game in g's position with transform applied
+    cells, counts, turn = transform_position(g.get_board().get_stacks().get_cells(),
+                                             g.get_state()[3], g.get_state()[4], transform, 6)
+    h = FocusGame(P1, P2, quiet=True)
+    h.set_position(bytes(cells), counts, turn)
+    return h
+
+
+class SymmetryTests(unittest.TestCase):
+
+    def test_equivalent_positions_have_the_same_canonical_key(self):
+        g = random_game(8, 40)
+        key = canonical_form(g)[0]
+        keys = {canonical_form(transformed(g, transform))[0] for transform in ALL}
+        self.assertEqual(keys, {key})
+        self.assertNotEqual(canonical_form(random_game(8, 41))[0], key)
+
+    def test_transform_leads_to_canonical_position(self):
+        g = random_game(3, 25)
+        key, transform = canonical_form(g)
+        self.assertEqual(canonical_form(transformed(g, transform)), (key, (0, False)))
+
+    def test_moves_map_to_transformed_position_and_back(self):
+        g = random_game(4, 30)
+        for transform in ALL:
+            h = transformed(g, transform)
+            moves = g.legal_moves(g.get_turn())
+            mapped = [transform_move(move, transform, 6) for move in moves]
+            self.assertEqual(sorted(mapped, key=str), sorted(h.legal_moves(h.get_turn()), key=str))
+            self.assertEqual([transform_move(move, inverse(transform), 6) for move in mapped],
+                             moves)
+            g.make_move(moves[7])
+            h.make_move(mapped[7])
+            self.assertEqual(canonical_form(g)[0], canonical_form(h)[0])
+            g = random_game(4, 30)
+
+    def test_reduction_at_shallow_depths(self):
+        self.assertEqual(reduction(2), [(0, 1, 1), (1, 60, 30), (2, 3452, 1726)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# This file contains tests for the self-play tournament runner.
+import json
+import os
+import random
+import tempfile
+import unittest
+from tournament import schedule, play_game, run, read_results, summarize, elo_difference, \
+    elo_ratings, random_player, greedy_player
+
+
+def flaky_player(game, name):
+    # kills its worker process in about half the games, the same ones every time
+    if game.get_state()[4] == 0 and random.random() < 0.5:
+        os._exit(1)
+    return random_player(game, name)
+
+
+def illegal_player(game, name):
+    # returns a move that is never legal
+    return (None, (9, 9), 1)
+
+
+class TournamentTests(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_schedule_alternates_first_player_within_pairing(self):
+        jobs = schedule(["a", "b", "c"], 4, seed=1)
+        self.assertEqual(len(jobs), 12)
+        self.assertEqual(len({job[0] for job in jobs}), 12)
+        self.assertEqual([job[1] for job in jobs if job[0].startswith("a-b-")],
+                         ["a", "b", "a", "b"])
+        self.assertEqual(jobs, schedule(["a", "b", "c"], 4, seed=1))
+
+    def test_play_game_is_reproducible_and_illegal_moves_lose(self):
+        job = ("random-greedy-0", "random", "greedy", 7)
+        players = {"random": random_player, "greedy": greedy_player}
+        first, second = play_game(job, players), play_game(job, players)
+        del first["seconds"], second["seconds"]
+        self.assertEqual(first, second)
+        result = play_game(("x", "bad", "random", 1), {"bad": illegal_player,
+                                                       "random": random_player})
+        self.assertEqual((result["winner"], result["reason"], result["plies"]),
+                         ("random", "illegal move", 1))
+
+    def test_run_streams_results_and_resumes(self):
+        players = {"random": random_player, "greedy": greedy_player}
+        results = run(players, 3, self.path, workers=1, max_plies=60)
+        self.assertEqual(sorted(result["game"] for result in results),
+                         ["greedy-random-0", "greedy-random-1", "greedy-random-2"])
+        self.assertEqual(read_results(self.path), results)
+        with open(self.path) as stream:
+            lines = stream.readlines()
+        with open(self.path, "w") as stream:
+            stream.writelines(lines[:2])
+            stream.write(lines[2][:10])
+        resumed = run(players, 3, self.path, workers=1, max_plies=60)
+        self.assertEqual(resumed[:2], results[:2])
+        self.assertEqual(len(resumed), 3)
+        self.assertEqual(run(players, 3, self.path, workers=1, max_plies=60), resumed)
+        with open(self.path) as stream:
+            self.assertEqual([json.loads(line) for line in stream], resumed)
+
+    def test_worker_crash_only_loses_the_crashing_games(self):
+        results = run({"flaky": flaky_player, "random": random_player}, 6, self.path,
+                      workers=1, max_plies=20)
+        self.assertEqual(len(results), 6)
+        reasons = {result["game"]: result["reason"] for result in read_results(self.path)}
+        self.assertEqual(len(reasons), 6)
+        self.assertIn("crashed", reasons.values())
+        self.assertTrue(any(reason != "crashed" for reason in reasons.values()))
+
+    def test_summary_and_elo(self):
+        results = [{"game": str(i), "p1": "a", "p2": "b", "winner": "a" if i < 3 else None,
+                    "reason": "win" if i < 3 else "draw"} for i in range(4)]
+        results.append({"game": "c", "p1": "b", "p2": "a", "winner": None,
+                        "reason": "crashed"})
+        tally = summarize(json.loads(json.dumps(results)))["a vs b"]
+        self.assertEqual((tally["games"], tally["a"], tally["b"], tally["draws"]),
+                         (4, 3, 0, 1))
+        self.assertEqual(tally["score"], 0.875)
+        self.assertEqual(elo_difference(0.5), 0.0)
+        self.assertGreater(tally["elo"], 300)
+        ratings = elo_ratings(results)
+        self.assertAlmostEqual(ratings["a"] + ratings["b"], 0, places=3)
+        self.assertGreater(ratings["a"], ratings["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# This file contains tests for the Zobrist hash of FocusGame and TranspositionTable.
+import random
+import unittest
+from FocusGame import FocusGame
+from zobrist import TranspositionTable, ZobristKeys, EXACT, LOWER
+
+
+class ZobristTests(unittest.TestCase):
+
+    def test_hash_updated_by_make_move_matches_hash_computed_from_scratch(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        rng = random.Random(3)
+        for _ in range(150):
+            g.make_move(rng.choice(g.legal_moves(g.get_turn())))
+            self.assertEqual(g.get_hash(), g.compute_hash())
+
+    def test_unmake_move_restores_hash(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        start = g.get_hash()
+        token = g.make_move(((0, 0), (0, 1), 1))
+        self.assertNotEqual(g.get_hash(), start)
+        g.unmake_move(token)
+        self.assertEqual(g.get_hash(), start)
+
+    def test_transposed_move_orders_reach_same_hash(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        h = FocusGame(("player1", "r"), ("player2", "g"))
+        for move in (((0, 0), (0, 1), 1), ((1, 0), (1, 1), 1), ((0, 4), (0, 5), 1)):
+            g.make_move(move)
+        for move in (((0, 4), (0, 5), 1), ((1, 0), (1, 1), 1), ((0, 0), (0, 1), 1)):
+            h.make_move(move)
+        self.assertEqual(g.get_hash(), h.get_hash())
+
+    def test_reserved_move_changes_hash_like_compute_hash(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"))
+        g._p1.change_reserves(2)
+        g._hash = g.compute_hash()
+        g.reserved_move('player1', (3, 3))
+        self.assertEqual(g.get_hash(), g.compute_hash())
+
+    def test_tall_stacks_draw_the_same_keys_lazily(self):
+        g = FocusGame(("player1", "r"), ("player2", "g"), True, 8, 12, 64)
+        rng = random.Random(5)
+        for _ in range(150):
+            g.make_move(rng.choice(g.legal_moves(g.get_turn())))
+            self.assertEqual(g.get_hash(), g.compute_hash())
+        first, second = ZobristKeys(4, 12, 4), ZobristKeys(4, 12, 4)
+        self.assertEqual(first.get_cell_keys()[3][5000], second.get_cell_keys()[3][5000])
+        self.assertNotEqual(first.get_cell_keys()[3][5000], first.get_cell_keys()[2][5000])
+
+    def test_transposition_table_counts_hits_and_misses(self):
+        t = TranspositionTable(16)
+        t.put(5, 2, 10, EXACT, None)
+        self.assertEqual(t.get(5)[2], 10)
+        self.assertIsNone(t.get(21))
+        self.assertEqual((t.get_hits(), t.get_misses()), (1, 1))
+
+    def test_transposition_table_keeps_deeper_entry_of_same_search(self):
+        t = TranspositionTable(16)
+        t.put(5, 4, 10, EXACT, None)
+        t.put(21, 1, 3, LOWER, None)
+        self.assertEqual(t.get(5)[1], 4)
+        t.new_search()
+        t.put(21, 1, 3, LOWER, None)
+        self.assertEqual(t.get(21)[1], 1)
+        self.assertEqual(len(t), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
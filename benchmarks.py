@@ -0,0 +1,272 @@
+"""
+Benchmark suite for FocusGame. Micro benchmarks time single calls of move_piece,
+reserved_move, check_location, check_on_board and Tile.remove_bottom on a board of
+tall stacks and the moves of a game through apply_moves against one move_piece call
+each, the macro benchmark plays random games with legal_moves/make_move, the
+scaling benchmark times single moves on boards from 6x6 to 32x32 and the memory
+benchmark measures bytes per live FocusGame with tracemalloc. Results
+are written as JSON so runs of different versions can be compared:
+
+    python benchmarks.py --output new.json --baseline old.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from FocusGame import FocusGame, Tile
+
+P1, P2 = ("PlayerA", "R"), ("PlayerB", "G")
+
+
+def tall_game(seed=11, plies=60):
+    """
+    plays random moves until the board has full height stacks
+    :return: quiet FocusGame object with reserves for the player to move
+    """
+    game = FocusGame(P1, P2, quiet=True)
+    rng = random.Random(seed)
+    for _ in range(plies):
+        game.make_move(rng.choice(game.legal_moves(game.get_turn())))
+    game.get_player_from_name(game.get_turn()).change_reserves(2)
+    game.set_position(*game.get_state()[2:5])
+    return game
+
+
+def time_restored(game, call, count):
+    """
+    times count calls that change game, putting the position back after each one
+    outside the timed part
+    :return: float nanoseconds per call
+    """
+    cells, counts, turn = game.get_state()[2:5]
+    total = 0
+    for _ in range(count):
+        began = time.perf_counter_ns()
+        call()
+        total += time.perf_counter_ns() - began
+        game.set_position(cells, counts, turn)
+    return total / count
+
+
+def time_loop(call, count):
+    # returns float nanoseconds per call of call, which must not change anything
+    began = time.perf_counter_ns()
+    for _ in range(count):
+        call()
+    return (time.perf_counter_ns() - began) / count
+
+
+def bench_move_piece(count):
+    # move_piece of the tallest legal stack move, overflowing the destination if possible
+    game = tall_game()
+    move = max(game.legal_moves(game.get_turn()),
+               key=lambda m: (game.count_captures(m), m[0] is not None and m[2]))
+    name = game.get_turn()
+    return time_restored(game, lambda: game.move_piece(name, *move), count)
+
+
+def bench_reserved_move(count):
+    # reserved_move onto the tallest stack
+    game = tall_game()
+    name = game.get_turn()
+    tallest = max(game.legal_moves(name), key=lambda m: len(game.show_pieces(m[1])))[1]
+    return time_restored(game, lambda: game.reserved_move(name, tallest), count)
+
+
+def bench_check_location(count):
+    game = tall_game()
+    start, destination, num_of_pieces = next(m for m in game.legal_moves(game.get_turn())
+                                             if m[0] is not None)
+    return time_loop(lambda: game.check_location(num_of_pieces, start, destination), count)
+
+
+def bench_check_on_board(count):
+    game = tall_game()
+    return time_loop(lambda: game.check_on_board((3, 4)), count)
+
+
+def bench_remove_bottom(count):
+    # remove_bottom of a 10 piece stack, as left by a 5 piece move onto a full tile
+    tile = Tile((0, 0), ["R", "G"] * 5)
+    pieces = tile.get_pieces()
+    total = 0
+    for _ in range(count):
+        began = time.perf_counter_ns()
+        tile.remove_bottom()
+        total += time.perf_counter_ns() - began
+        tile.add_bottom(pieces[:1])
+    return total / count
+
+
+def bench_random_games(count, max_plies=1000):
+    """
+    plays count random games to a win (or max_plies) with legal_moves and make_move
+    :return: dict of games per second and moves per second
+    """
+    rng = random.Random(3)
+    moves = 0
+    began = time.perf_counter()
+    for _ in range(count):
+        game = FocusGame(P1, P2, quiet=True)
+        for _ in range(max_plies):
+            name = game.get_turn()
+            game.make_move(rng.choice(game.legal_moves(name)))
+            moves += 1
+            if game.check_win(name):
+                break
+    elapsed = time.perf_counter() - began
+    return {"games_per_second": count / elapsed, "moves_per_second": moves / elapsed}
+
+
+def scaled_game(length, max_height):
+    # returns quiet game on a length x length board after 4 * length random moves
+    game = FocusGame(P1, P2, True, length, max_height, length * length)
+    rng = random.Random(length)
+    for _ in range(4 * length):
+        game.make_move(rng.choice(game.legal_moves(game.get_turn())))
+    return game
+
+
+def bench_board_scaling(count, lengths=(6, 12, 20, 32), max_height=8):
+    """
+    times make_move + unmake_move and the checks move_piece makes (check_location
+    and check_number_of_pieces) of random legal moves on boards of each length.
+    Neither looks at more than the tiles a move touches, so both should stay flat
+    :return: dict of {"make_unmake_ns": float, "checks_ns": float} by "board_<length>"
+    """
+    results = {}
+    for length in lengths:
+        game = scaled_game(length, max_height)
+        rng = random.Random(length)
+        moves = [move for move in game.legal_moves(game.get_turn()) if move[0] is not None]
+        picks = [rng.choice(moves) for _ in range(count)]
+        began = time.perf_counter_ns()
+        for move in picks:
+            game.unmake_move(game.make_move(move))
+        make_unmake = (time.perf_counter_ns() - began) / count
+        began = time.perf_counter_ns()
+        for start, destination, num_of_pieces in picks:
+            game.check_location(num_of_pieces, start, destination)
+            game.check_number_of_pieces(num_of_pieces, start)
+        results["board_%d" % length] = {"make_unmake_ns": make_unmake,
+                                        "checks_ns": (time.perf_counter_ns() - began) / count}
+    return results
+
+
+def bench_game_memory(count):
+    # returns bytes allocated per live FocusGame, averaged over count games
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    games = [FocusGame(P1, P2, quiet=True) for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / len(games)
+
+
+def batch_moves(plies=100, seed=5):
+    # returns list of (name, start, destination, num_of_pieces) of a random game
+    game, rng, moves = FocusGame(P1, P2, quiet=True), random.Random(seed), []
+    for _ in range(plies):
+        move = rng.choice(game.legal_moves(game.get_turn()))
+        moves.append((game.get_turn(),) + move)
+        game.make_move(move)
+    return moves
+
+
+def bench_apply_moves(count):
+    # apply_moves of a 100 move game, per move
+    game, moves = FocusGame(P1, P2, quiet=True), batch_moves()
+    return time_restored(game, lambda: game.apply_moves(moves),
+                         max(1, count // len(moves))) / len(moves)
+
+
+def bench_move_piece_batch(count):
+    # the same 100 moves as bench_apply_moves one move_piece/reserved_move call each
+    game, moves = FocusGame(P1, P2, quiet=True), batch_moves()
+
+    def play():
+        for name, start, destination, num_of_pieces in moves:
+            if start is None:
+                game.reserved_move(name, destination)
+            else:
+                game.move_piece(name, start, destination, num_of_pieces)
+    return time_restored(game, play, max(1, count // len(moves))) / len(moves)
+
+
+MICRO = {
+    "move_piece": bench_move_piece,
+    "reserved_move": bench_reserved_move,
+    "check_location": bench_check_location,
+    "check_on_board": bench_check_on_board,
+    "tile_remove_bottom": bench_remove_bottom,
+    "apply_moves": bench_apply_moves,
+    "move_piece_batch": bench_move_piece_batch,
+}
+
+
+def run(scale=1.0, only=None):
+    """
+    runs the benchmarks, scale multiplies the number of calls/games of each
+    :param only: list of benchmark names to run, None for all
+    :return: dict of results ready for json
+    """
+    results = {}
+    for name, bench in MICRO.items():
+        if only is None or name in only:
+            results[name] = {"ns_per_op": bench(max(1, int(20000 * scale)))}
+    if only is None or "random_games" in only:
+        results["random_games"] = bench_random_games(max(1, int(20 * scale)))
+    if only is None or "board_scaling" in only:
+        results.update(bench_board_scaling(max(1, int(20000 * scale))))
+    if only is None or "game_memory" in only:
+        results["game_memory"] = {"bytes_per_game": bench_game_memory(max(1, int(500 * scale)))}
+    return {"python": sys.version.split()[0], "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+
+
+def regressions(report, baseline, threshold):
+    """
+    compares report against baseline, lower is better for ns_per_op and
+    bytes_per_game and higher is better for the per_second figures
+    :return: list of (name, metric, ratio) worse than threshold (0.1 is 10% worse)
+    """
+    worse = []
+    for name, metrics in report["results"].items():
+        for metric, value in metrics.items():
+            old = baseline.get("results", {}).get(name, {}).get(metric)
+            if not old or not value:
+                continue
+            ratio = old / value if metric.endswith("per_second") else value / old
+            if ratio > 1 + threshold:
+                worse.append((name, metric, ratio))
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusGame benchmarks")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--only", nargs="+")
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+    report = run(args.scale, args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print(text)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            worse = regressions(report, json.load(baseline), args.threshold)
+        for name, metric, ratio in worse:
+            print("regression: %s %s %.2fx worse" % (name, metric, ratio))
+        sys.exit(1 if worse else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Opening book for FocusGame. build searches every position the first plies from the
+starting layout can reach, one per class of symmetric positions, and writes a
+binary file of fixed size entries sorted by key. OpeningBook mmaps the file and
+binary searches it, so opening a book reads nothing but its header and every
+process using the same file shares its pages.
+
+    header  "<4sBBBHBI"  b"FBOK", version, length, max_height, win_captures, plies,
+                         number of entries
+    entry   "<QIi"       key, move code, score
+
+The key is the first 8 bytes of the blake2b digest of symmetry.canonical_form's key
+and the move is the best move in the canonical position, as records.encode_move, so
+lookup maps it back through the inverse of the transform. Scores are Engine scores
+for the player to move.
+
+    python book.py build book.bin --plies 2 --depth 3
+    python book.py probe book.bin
+"""
+import argparse
+import hashlib
+import mmap
+import struct
+from FocusGame import FocusGame, DEFAULT_RULES
+from engine import Engine
+from records import encode_move, decode_move
+from symmetry import canonical_form, inverse, transform_move
+
+MAGIC = b"FBOK"
+VERSION = 1
+_HEADER = struct.Struct("<4sBBBHBI")
+_ENTRY = struct.Struct("<QIi")
+
+
+def book_key(game):
+    """
+    returns the book key of game's position and the transform to its canonical form
+    :param game: FocusGame object
+    :return: tuple of int key and transform tuple
+    """
+    key, transform = canonical_form(game)
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little"), transform
+
+
+def collect(game, plies):
+    """
+    walks every line of play plies moves deep, keeping one position per key
+    :param game: FocusGame object to start from, left unchanged
+    :param plies: int moves to look ahead
+    :return: dict of book key to get_state of a position with that key
+    """
+    positions, level = {}, [game.get_state()]
+    for ply in range(plies + 1):
+        children = []
+        for state in level:
+            position = FocusGame.from_state(state)
+            key = book_key(position)[0]
+            if key in positions or position.check_win(position.get_p1().get_name()) or \
+                    position.check_win(position.get_p2().get_name()):
+                continue
+            positions[key] = state
+            for move in position.legal_moves(position.get_turn()) if ply < plies else ():
+                token = position.make_move(move)
+                children.append(position.get_state())
+                position.unmake_move(token)
+        level = children
+    return positions
+
+
+def build(path, plies=2, depth=3, time_limit_ms=10000, rules=DEFAULT_RULES):
+    """
+    searches every position up to plies moves from the start and writes the book
+    :param path: str path of the book file to write
+    :param plies: int moves from the start the book covers
+    :param depth: int depth each position is searched to
+    :param time_limit_ms: int most milliseconds each search takes
+    :param rules: tuple of board length, max_height and captures needed to win
+    :return: int number of entries written
+    """
+    start = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True, *rules)
+    length, max_height = rules[0], rules[1]
+    engine, entries = Engine(), []
+    for key, state in collect(start, plies).items():
+        game = FocusGame.from_state(state)
+        result = engine.search(game, time_limit_ms, max_depth=depth)
+        if result.get_move() is None:
+            continue
+        move = transform_move(result.get_move(), book_key(game)[1], length)
+        entries.append((key, encode_move(move, length, max_height), result.get_score()))
+    entries.sort()
+    with open(path, "wb") as stream:
+        stream.write(_HEADER.pack(MAGIC, VERSION, length, max_height, rules[2], plies,
+                                  len(entries)))
+        for entry in entries:
+            stream.write(_ENTRY.pack(*entry))
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Represents a book file mapped into memory, read only. Engine.search and the
+    server's hint request look positions up in it before searching.
+    """
+
+    def __init__(self, path):
+        """
+        maps the book at path, raises ValueError if it is not a book file
+        :param path: str path of a file written by build
+        """
+        with open(path, "rb") as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError("not a book file")
+        magic, version, length, max_height, win, plies, size = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or \
+                len(self._map) != _HEADER.size + size * _ENTRY.size:
+            raise ValueError("not a book file")
+        self._rules = (length, max_height, win)
+        self._plies = plies
+        self._size = size
+
+    def get_rules(self):
+        # returns tuple of board length, max_height and captures to win the book is for
+        return self._rules
+
+    def get_plies(self):
+        # returns int moves from the start the book covers
+        return self._plies
+
+    def __len__(self):
+        return self._size
+
+    def entry(self, index):
+        # returns tuple of key, move code and score of the index-th entry
+        return _ENTRY.unpack_from(self._map, _HEADER.size + index * _ENTRY.size)
+
+    def find(self, key):
+        """
+        binary searches the entries for key
+        :param key: int from book_key
+        :return: tuple of move code and score, None if key is not in the book
+        """
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._size:
+            found = self.entry(low)
+            if found[0] == key:
+                return found[1:]
+        return None
+
+    def lookup(self, game):
+        """
+        finds the book move for the player to move in game
+        :param game: FocusGame object with the book's rules
+        :return: tuple of move tuple and score, None if the position is not in the
+                 book or the rules differ
+        """
+        if game.get_rules() != self._rules:
+            return None
+        key, transform = book_key(game)
+        found = self.find(key)
+        if found is None:
+            return None
+        move = transform_move(decode_move(found[0], *self._rules[:2]), inverse(transform),
+                              self._rules[0])
+        if move not in game.legal_moves(game.get_turn()):
+            return None
+        return move, found[1]
+
+    def close(self):
+        # unmaps the file
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Focus opening book")
+    parser.add_argument("mode", choices=("build", "probe"))
+    parser.add_argument("path")
+    parser.add_argument("--plies", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+    if args.mode == "build":
+        print("%d entries" % build(args.path, args.plies, args.depth))
+        return
+    with OpeningBook(args.path) as book:
+        game = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True, *book.get_rules())
+        print("%d entries, %d plies, start: %s" % (len(book), book.get_plies(),
+                                                   book.lookup(game)))
+
+
+if __name__ == "__main__":
+    main()
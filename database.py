@@ -0,0 +1,278 @@
+"""
+SQLite store of finished games, indexed by every position they reached. A game is
+stored once with its moves as a blob of records.encode_move codes, and each
+position it passed through is a row of the positions table, keyed by the position's
+Zobrist hash (FocusGame.get_hash as a signed 64 bit int) and clustered on it, so
+the games, outcomes and next moves of a position are one range scan:
+
+    positions(key, game, ply, next_move, winner)   WITHOUT ROWID, primary key
+                                                   (key, game, ply)
+    games(id, p1, p1_colour, p2, p2_colour, winner, plies, moves)
+
+winner is 0 for p1, 1 for p2 and NULL for a game without one and next_move is the
+encoded move played from the position, NULL after the last move. The winner is
+copied into every position row so outcomes is a scan of the key's rows alone, with
+no join against games. ingest takes the
+(p1, p2, moves, winner) tuples records.read_games yields and writes them in one
+transaction per batch. A database holds games of one set of rules, fixed when it is
+created.
+
+    python database.py bench games.db --games 20000
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from operator import itemgetter
+from array import array
+from FocusGame import FocusGame, StackArray, DEFAULT_RULES
+from records import encode_move, decode_move, move_width
+
+BATCH = 1000
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (length INTEGER, max_height INTEGER, win INTEGER);
+CREATE TABLE IF NOT EXISTS games (id INTEGER PRIMARY KEY, p1 TEXT, p1_colour TEXT,
+    p2 TEXT, p2_colour TEXT, winner INTEGER, plies INTEGER, moves BLOB);
+CREATE TABLE IF NOT EXISTS positions (key INTEGER, game INTEGER, ply INTEGER,
+    next_move INTEGER, winner INTEGER, PRIMARY KEY (key, game, ply)) WITHOUT ROWID;
+"""
+
+
+def signed(key):
+    # returns unsigned 64 bit key as the signed int SQLite stores
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class GameDatabase:
+    """
+    Represents a database file of games and the positions they reached, usable as a
+    context manager
+    """
+
+    def __init__(self, path, rules=DEFAULT_RULES):
+        """
+        opens or creates the database at path, raises ValueError if it already holds
+        games of other rules
+        :param path: str path of the SQLite file, ":memory:" for one in memory
+        :param rules: tuple of board length, max_height and captures needed to win
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA cache_size=-262144")
+        self._connection.executescript(_SCHEMA)
+        stored = self._connection.execute("SELECT * FROM rules").fetchone()
+        if stored is None:
+            with self._connection:
+                self._connection.execute("INSERT INTO rules VALUES (?, ?, ?)", rules)
+        elif stored != tuple(rules):
+            raise ValueError("database holds games of other rules")
+        self._rules = tuple(rules)
+        self._start = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True, *rules)
+
+    def get_rules(self):
+        # returns tuple of board length, max_height and captures to win of the games
+        return self._rules
+
+    def count_games(self):
+        # returns int number of games stored
+        return self._connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def count_positions(self):
+        # returns int number of position rows stored, one per game per ply
+        return self._connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def ingest(self, games, batch=BATCH):
+        """
+        stores games, batch games to a transaction
+        :param games: iterable of (p1, p2, moves, winner) like records.read_games
+        :param batch: int games written per transaction
+        :return: int number of games stored
+        """
+        count, pending = 0, []
+        for game in games:
+            pending.append(game)
+            if len(pending) == batch:
+                count += self.write_batch(pending)
+                pending = []
+        return count + self.write_batch(pending)
+
+    def write_batch(self, games):
+        """
+        writes games and their positions in one transaction, ids following the last
+        :param games: list of (p1, p2, moves, winner) tuples
+        :return: int number of games written
+        """
+        next_id = self._connection.execute("SELECT MAX(id) FROM games").fetchone()[0] or 0
+        game_rows, position_rows = [], []
+        for game_id, (p1, p2, moves, winner) in enumerate(games, next_id + 1):
+            side = None if winner is None else int(winner != p1[0])
+            codes = self.replay_keys(game_id, moves, side, position_rows)
+            game_rows.append((game_id, p1[0], p1[1], p2[0], p2[1], side, len(moves),
+                              codes.tobytes()))
+        position_rows.sort(key=itemgetter(0))
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)", game_rows)
+            self._connection.executemany(
+                "INSERT INTO positions VALUES (?, ?, ?, ?, ?)", position_rows)
+        return len(games)
+
+    def replay_keys(self, game_id, moves, winner, rows):
+        """
+        replays moves on the quiet start game with make_move, appending a positions row
+        for every position with its get_hash, and unmakes them again
+        :param game_id: int id of the game
+        :param moves: list of move tuples
+        :param winner: 0 if p1 won, 1 if p2 did, None if neither
+        :param rows: list the (key, game, ply, next_move, winner) rows are appended to
+        :return: array of the encoded moves, little endian
+        """
+        length, max_height = self._rules[0], self._rules[1]
+        codes = array(StackArray.typecode(8 * move_width(length, max_height)))
+        game, tokens = self._start, []
+        try:
+            for ply, move in enumerate(moves):
+                codes.append(encode_move(move, length, max_height))
+                rows.append((signed(game.get_hash()), game_id, ply, codes[-1], winner))
+                tokens.append(game.make_move(move))
+            rows.append((signed(game.get_hash()), game_id, len(moves), None, winner))
+        finally:
+            while tokens:
+                game.unmake_move(tokens.pop())
+        if sys.byteorder == "big":
+            codes.byteswap()
+        return codes
+
+    def position_key(self, game):
+        # returns signed key of game's position, raises ValueError for other rules
+        if game.get_rules() != self._rules:
+            raise ValueError("game has other rules than the database")
+        return signed(game.get_hash())
+
+    def find_games(self, game, limit=100):
+        """
+        finds stored games that reached game's position
+        :param game: FocusGame object
+        :param limit: int most games to return
+        :return: list of (game id, ply the position was reached at), by game id
+        """
+        return self._connection.execute(
+            "SELECT game, MIN(ply) FROM positions WHERE key = ? GROUP BY game "
+            "ORDER BY game LIMIT ?", (self.position_key(game), limit)).fetchall()
+
+    def outcomes(self, game):
+        """
+        counts how the stored games that reached game's position ended
+        :param game: FocusGame object
+        :return: dict of "p1", "p2" and "none" to number of games
+        """
+        rows = self._connection.execute(
+            "SELECT winner, COUNT(DISTINCT game) FROM positions WHERE key = ? "
+            "GROUP BY winner",
+            (self.position_key(game),)).fetchall()
+        counts = {"p1": 0, "p2": 0, "none": 0}
+        for winner, count in rows:
+            counts[("p1", "p2", "none")[2 if winner is None else winner]] = count
+        return counts
+
+    def next_moves(self, game):
+        """
+        counts the moves played from game's position in the stored games
+        :param game: FocusGame object
+        :return: dict of move tuple to number of times it was played, most first
+        """
+        rows = self._connection.execute(
+            "SELECT next_move, COUNT(*) AS times FROM positions WHERE key = ? AND "
+            "next_move IS NOT NULL GROUP BY next_move ORDER BY times DESC",
+            (self.position_key(game),)).fetchall()
+        return {decode_move(code, *self._rules[:2]): times for code, times in rows}
+
+    def get_game(self, game_id):
+        """
+        :param game_id: int id from find_games
+        :return: tuple of (p1, p2, moves, winner) like records.read_games, None if
+                 there is no such game
+        """
+        row = self._connection.execute(
+            "SELECT p1, p1_colour, p2, p2_colour, winner, moves FROM games WHERE id = ?",
+            (game_id,)).fetchone()
+        if row is None:
+            return None
+        length, max_height = self._rules[0], self._rules[1]
+        codes = array(StackArray.typecode(8 * move_width(length, max_height)))
+        codes.frombytes(row[5])
+        if sys.byteorder == "big":
+            codes.byteswap()
+        moves = [decode_move(code, length, max_height) for code in codes]
+        return (row[0], row[1]), (row[2], row[3]), moves, \
+            None if row[4] is None else row[row[4] * 2]
+
+    def close(self):
+        # closes the connection
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def random_games(count, seed=0, max_plies=200):
+    """
+    plays random games to fill a database with
+    :return: generator of (p1, p2, moves, winner) tuples
+    """
+    rng = random.Random(seed)
+    game = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True)
+    for _ in range(count):
+        moves, tokens, winner = [], [], None
+        while len(moves) < max_plies and winner is None:
+            name = game.get_turn()
+            moves.append(rng.choice(game.legal_moves(name)))
+            tokens.append(game.make_move(moves[-1]))
+            winner = name if game.check_win(name) else None
+        while tokens:
+            game.unmake_move(tokens.pop())
+        yield ("PlayerA", "R"), ("PlayerB", "G"), moves, winner
+
+
+def bench(path, games, seed=0):
+    """
+    ingests games random games into the database at path, then times lookups of
+    positions from the stored games
+    :return: dict of games/s and positions/s ingested and mean lookup milliseconds
+    """
+    played = list(random_games(games, seed))
+    with GameDatabase(path) as database:
+        began = time.perf_counter()
+        database.ingest(played)
+        elapsed = time.perf_counter() - began
+        rng, lookups = random.Random(seed), 200
+        positions = [FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True)
+                     for _ in range(lookups)]
+        for game in positions:
+            for move in rng.choice(played)[2][:rng.randrange(12)]:
+                game.make_move(move)
+        began = time.perf_counter()
+        for game in positions:
+            database.find_games(game), database.outcomes(game), database.next_moves(game)
+        lookup = (time.perf_counter() - began) / lookups
+        return {"games_per_second": games / elapsed,
+                "positions_per_second": sum(len(g[2]) + 1 for g in played) / elapsed,
+                "positions": database.count_positions(), "lookup_ms": 1000 * lookup}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Focus game database")
+    parser.add_argument("mode", choices=("bench",))
+    parser.add_argument("path")
+    parser.add_argument("--games", type=int, default=20000)
+    args = parser.parse_args()
+    print(bench(args.path, args.games))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Computer opponent for FocusGame. Engine.search runs iterative deepening alpha-beta
+(negamax) over make_move/unmake_move with a transposition table, searching moves
+that capture first, and stops cleanly when the time limit runs out, returning the
+best move of the deepest search it finished. An Engine given a book.OpeningBook
+plays the book's move without searching when the position is in it.
+"""
+import time
+from zobrist import TranspositionTable, EXACT, LOWER, UPPER
+
+WIN_SCORE = 100000
+CHECK_EVERY = 256
+# features of FocusGame.features the static evaluation adds up, with their weights
+EVALUATION_WEIGHTS = (("captures", 100), ("reserves", 30), ("stacks", 10), ("height", 2))
+
+
+def best_move(game, time_limit_ms, book=None):
+    """
+    returns best move found for the player whose turn it is in game
+    :param game: FocusGame object, left unchanged
+    :param time_limit_ms: int milliseconds to search for
+    :param book: book.OpeningBook to consult first, None for none
+    :return: move tuple for FocusGame.make_move, None if there is no legal move
+    """
+    return Engine(book=book).search(game, time_limit_ms).get_move()
+
+
+class SearchResult:
+    """
+    Represents what Engine.search found: the best move and its score for the player
+    to move, the depth reached, nodes searched, time taken and principal variation.
+    A move from the opening book has depth 0 and no nodes
+    """
+
+    def __init__(self, move, score, depth, nodes, elapsed, pv):
+        # initializes result, elapsed is in seconds
+        self._move = move
+        self._score = score
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+        self._pv = pv
+
+    def get_move(self):
+        # returns best move tuple, None if there was no legal move
+        return self._move
+
+    def get_score(self):
+        # returns score of best move for the player to move
+        return self._score
+
+    def get_depth(self):
+        # returns depth of the deepest search finished
+        return self._depth
+
+    def get_nodes(self):
+        # returns number of positions searched
+        return self._nodes
+
+    def get_elapsed_ms(self):
+        # returns milliseconds the search took
+        return self._elapsed * 1000
+
+    def get_nodes_per_second(self):
+        # returns nodes searched per second
+        return self._nodes / self._elapsed if self._elapsed > 0 else 0.0
+
+    def get_pv(self):
+        # returns list of moves the engine expects to be played from the position
+        return self._pv
+
+
+class Engine:
+    """
+    Represents a search engine with its own TranspositionTable, kept between
+    searches so later moves of a game reuse earlier work.
+    Communicates with FocusGame through legal_moves, make_move, unmake_move,
+    get_hash, count_captures and the show_ methods.
+    """
+
+    def __init__(self, table_size=1 << 18, book=None):
+        # initializes the transposition table, search counters and optional OpeningBook
+        self._table = TranspositionTable(table_size)
+        self._book = book
+        self._game = None
+        self._nodes = 0
+        self._deadline = None
+        self._stopped = False
+
+    def get_table(self):
+        # returns TranspositionTable, for its hit/miss counters
+        return self._table
+
+    def get_book(self):
+        # returns OpeningBook consulted before searching, None if there is none
+        return self._book
+
+    def search(self, game, time_limit_ms, max_depth=64):
+        """
+        searches depth 1, 2, 3... until time_limit_ms is used up or max_depth is done.
+        Depth 1 always finishes so there is always a move to return.
+        :param game: FocusGame object, restored to its position before returning
+        :param time_limit_ms: int milliseconds to search for
+        :param max_depth: int deepest search to start
+        :return: SearchResult object
+        """
+        began = time.perf_counter()
+        booked = self._book.lookup(game) if self._book is not None else None
+        if booked is not None:
+            return SearchResult(booked[0], booked[1], 0, 0, time.perf_counter() - began,
+                                [booked[0]])
+        self._game, self._nodes, self._stopped = game, 0, False
+        self._table.new_search()
+        move, score, depth = None, 0, 0
+        for next_depth in range(1, max_depth + 1):
+            self._deadline = None if next_depth == 1 else began + time_limit_ms / 1000
+            found, found_score = self.search_root(next_depth)
+            if self._stopped:
+                break
+            move, score, depth = found, found_score, next_depth
+            if found is None or abs(score) >= WIN_SCORE - max_depth:
+                break
+        pv = self.principal_variation(depth)
+        return SearchResult(move, score, depth, self._nodes,
+                            time.perf_counter() - began, pv)
+
+    def search_root(self, depth):
+        """
+        searches every move of the player to move to depth
+        :param depth: int plies to search
+        :return: tuple of best move (None if there are no moves) and its score
+        """
+        game = self._game
+        moves = self.order_moves(game.legal_moves(game.get_turn()),
+                                 self._table.get(game.get_hash()))
+        best, alpha = None, -WIN_SCORE - 1
+        for move in moves:
+            score = self.score_move(move, depth, alpha, WIN_SCORE + 1, 1)
+            if self._stopped:
+                break
+            if score > alpha:
+                best, alpha = move, score
+        if best is not None and not self._stopped:
+            self._table.put(game.get_hash(), depth, alpha, EXACT, best)
+        return best, alpha
+
+    def score_move(self, move, depth, alpha, beta, ply):
+        """
+        makes move, scores it for the player making it and unmakes it
+        :param move: move tuple
+        :param depth: int plies left including this move
+        :param alpha: int lower bound from the parent
+        :param beta: int upper bound from the parent
+        :param ply: int plies from the root after this move
+        :return: int score for the player making move
+        """
+        game = self._game
+        name = game.get_turn()
+        token = game.make_move(move)
+        if game.check_win(name):
+            score = WIN_SCORE - ply
+        else:
+            score = -self.negamax(depth - 1, -beta, -alpha, ply)
+        game.unmake_move(token)
+        return score
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        alpha-beta search of the position for the player to move
+        :param depth: int plies left
+        :param alpha: int score the player to move is already sure of
+        :param beta: int score the other player is already sure of
+        :param ply: int plies from the root
+        :return: int score for the player to move, 0 once the search is stopped
+        """
+        self._nodes += 1
+        if self._nodes % CHECK_EVERY == 0 and self._deadline is not None:
+            self._stopped = time.perf_counter() >= self._deadline
+        if self._stopped:
+            return 0
+        key = self._game.get_hash()
+        entry = self._table.get(key)
+        if entry is not None and entry[1] >= depth and self.cutoff(entry, alpha, beta):
+            return entry[2]
+        if depth == 0:
+            return self.evaluate()
+        moves = self.order_moves(self._game.legal_moves(self._game.get_turn()), entry)
+        if not moves:
+            return ply - WIN_SCORE
+        return self.search_moves(moves, key, depth, alpha, beta, ply)
+
+    def search_moves(self, moves, key, depth, alpha, beta, ply):
+        """
+        scores moves in order until one is good enough to cut off, then stores the
+        result in the transposition table
+        :return: int score for the player to move
+        """
+        best, best_score, original_alpha = None, -WIN_SCORE - 1, alpha
+        for move in moves:
+            score = self.score_move(move, depth, alpha, beta, ply + 1)
+            if self._stopped:
+                return 0
+            if score > best_score:
+                best, best_score = move, score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        if best_score <= original_alpha:
+            flag = UPPER
+        else:
+            flag = LOWER if best_score >= beta else EXACT
+        self._table.put(key, depth, best_score, flag, best)
+        return best_score
+
+    def cutoff(self, entry, alpha, beta):
+        # returns True if a stored score settles the position inside (alpha, beta)
+        flag, score = entry[3], entry[2]
+        return flag == EXACT or (flag == LOWER and score >= beta) or \
+            (flag == UPPER and score <= alpha)
+
+    def order_moves(self, moves, entry):
+        """
+        orders moves: the transposition table's best move first, then moves whose
+        overflow captures the most of the other player's pieces
+        :param moves: list of move tuples
+        :param entry: transposition table entry of the position or None
+        :return: ordered list of moves
+        """
+        moves.sort(key=self._game.count_captures, reverse=True)
+        if entry is not None and entry[4] in moves:
+            moves.remove(entry[4])
+            moves.insert(0, entry[4])
+        return moves
+
+    def evaluate(self):
+        """
+        static score of the position for the player to move: captures count most,
+        then pieces in reserve, then stacks controlled, then the height of those
+        stacks. Reads FocusGame.features, so it costs the same on any board
+        :return: int score
+        """
+        game = self._game
+        features = game.features()
+        mover = 0 if game.get_turn() == game.get_p1().get_name() else 1
+        score = 0
+        for name, weight in EVALUATION_WEIGHTS:
+            score += weight * (features[name][mover] - features[name][1 - mover])
+        return score
+
+    def principal_variation(self, depth):
+        """
+        follows the transposition table's best moves from the position
+        :param depth: int most moves to follow
+        :return: list of move tuples
+        """
+        game, pv, tokens = self._game, [], []
+        for _ in range(depth):
+            entry = self._table.get(game.get_hash())
+            if entry is None or entry[4] is None or \
+                    entry[4] not in game.legal_moves(game.get_turn()):
+                break
+            pv.append(entry[4])
+            tokens.append(game.make_move(entry[4]))
+        while tokens:
+            game.unmake_move(tokens.pop())
+        return pv
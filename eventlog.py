@@ -0,0 +1,357 @@
+"""
+Append-only log of the games a host has open, for getting them back after a crash
+without replaying whole games through move_piece. GameLog listens to each game's
+events and appends a record for every move made, and every checkpoint_every moves a
+checkpoint holding the whole game from FocusGame.to_bytes. recover reads the log
+once, keeps each game's latest checkpoint and the moves after it, and rebuilds the
+game with from_bytes and make_move, so a game costs one checkpoint and at most
+checkpoint_every moves to rebuild however long it has been played.
+
+Every game goes in one file so a single fsync makes a whole batch of records from
+many games durable. A record is a header "<IBIH" of the crc32 of everything after
+it, kind, game id and payload length, then the payload:
+
+    CHECKPOINT  FocusGame.to_bytes of the game
+    MOVE        records.encode_move of the move, move_width bytes little endian
+    CLOSE       empty, the game is over and is not recovered
+
+Records are buffered and handed to a writer thread once sync_every have been
+appended, or when sync is called; the thread writes and fsyncs each batch with one
+call, so a slow disk never holds up the caller, an event loop say. flush waits until
+everything appended is on disk. A write error stops the log: later batches are
+dropped, get_error returns the error and flush raises it, but appending never does,
+so a listener cannot fail halfway through a move. A crash loses at most the records
+not yet fsynced; the torn record it may leave at the end fails its crc32 and recover
+cuts it off.
+
+    python eventlog.py bench log.bin --games 100000
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import queue
+import random
+import struct
+import threading
+import time
+import zlib
+from FocusGame import FocusGame
+from events import MoveApplied
+from records import encode_move, decode_move, move_width
+
+CHECKPOINT = 1
+MOVE = 2
+CLOSE = 3
+CHECKPOINT_EVERY = 16
+SYNC_EVERY = 1024
+_HEADER = struct.Struct("<IBIH")
+
+
+def make_record(kind, game_id, payload):
+    # returns bytes of one record, header and payload
+    body = _HEADER.pack(0, kind, game_id, len(payload))[4:] + payload
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def read_records(data):
+    """
+    reads records until the end of data or the first torn or corrupt record
+    :param data: bytes or memoryview of a log
+    :return: generator of (end, kind, game_id, payload) tuples, end the offset just
+             past the record
+    """
+    view, offset = memoryview(data), 0
+    while offset + _HEADER.size <= len(view):
+        crc, kind, game_id, length = _HEADER.unpack_from(view, offset)
+        end = offset + _HEADER.size + length
+        if end > len(view) or zlib.crc32(view[offset + 4:end]) != crc:
+            return
+        yield end, kind, game_id, view[offset + _HEADER.size:end]
+        offset = end
+
+
+class GameLog:
+    """
+    Represents the log file games are recorded in while they are played, one
+    listener for FocusGame.subscribe per game followed
+    """
+
+    def __init__(self, path, checkpoint_every=CHECKPOINT_EVERY, sync_every=SYNC_EVERY):
+        """
+        opens the log at path for appending and starts its writer thread
+        :param path: str path of the log file, made if it does not exist
+        :param checkpoint_every: int moves of a game between its checkpoints
+        :param sync_every: int records appended between hand-offs to the writer
+        """
+        self._stream = open(path, "ab")
+        self._checkpoint_every = checkpoint_every
+        self._sync_every = sync_every
+        self._buffer = bytearray()
+        self._pending = 0
+        self._games = {}
+        self._batches = queue.Queue()
+        self._error = None
+        self._writer = threading.Thread(target=self.write_batches, daemon=True)
+        self._writer.start()
+
+    def get_games(self):
+        # returns dict of [game, listener, moves since its checkpoint] lists by game id
+        return self._games
+
+    def get_pending(self):
+        # returns int of records appended but not yet handed to the writer thread
+        return self._pending
+
+    def get_error(self):
+        # returns the OSError the writer thread failed with, None while it has not
+        return self._error
+
+    def follow(self, game_id, game, checkpoint=True):
+        """
+        records every move made in game from now on. The checkpoint is made before
+        anything else, so a game it fails for is neither followed nor in the log
+        :param game_id: int id of the game, below 2 ** 32
+        :param game: FocusGame object
+        :param checkpoint: False if the log already has the game's position, as after
+                           recover and compact
+        """
+        if checkpoint:
+            self.append(CHECKPOINT, game_id, game.to_bytes())
+        listener = functools.partial(self.record_move, game_id)
+        game.subscribe(listener)
+        self._games[game_id] = [game, listener, 0]
+
+    def record_move(self, game_id, event):
+        # appends a MOVE record for a MoveApplied event and a checkpoint if one is due
+        if not isinstance(event, MoveApplied):
+            return
+        entry = self._games[game_id]
+        length, max_height = entry[0].get_rules()[:2]
+        code = encode_move((event.get_start(), event.get_destination(),
+                            event.get_num_of_pieces()), length, max_height)
+        self.append(MOVE, game_id, code.to_bytes(move_width(length, max_height), "little"))
+        entry[2] += 1
+        if entry[2] >= self._checkpoint_every:
+            self.checkpoint(game_id)
+
+    def checkpoint(self, game_id):
+        # appends a CHECKPOINT record of the game's whole position
+        entry = self._games[game_id]
+        self.append(CHECKPOINT, game_id, entry[0].to_bytes())
+        entry[2] = 0
+
+    def close_game(self, game_id):
+        # stops following the game and appends its CLOSE record
+        game, listener, _ = self._games.pop(game_id)
+        game.unsubscribe(listener)
+        self.append(CLOSE, game_id, b"")
+
+    def append(self, kind, game_id, payload):
+        # buffers one record, handing the buffer on once sync_every records are waiting
+        self._buffer += make_record(kind, game_id, payload)
+        self._pending += 1
+        if self._pending >= self._sync_every:
+            self.sync()
+
+    def sync(self):
+        # hands the buffered records to the writer thread and returns without waiting,
+        # after a write error they are dropped there, see get_error
+        if self._buffer:
+            self._batches.put(self._buffer)
+            self._buffer, self._pending = bytearray(), 0
+
+    def flush(self):
+        # hands the buffered records on and waits until every batch is fsynced
+        self.sync()
+        self._batches.join()
+        if self._error is not None:
+            raise self._error
+
+    def write_batches(self):
+        # writer thread: writes and fsyncs each batch, until the None close puts
+        while True:
+            batch = self._batches.get()
+            try:
+                if batch is not None and self._error is None:
+                    self._stream.write(batch)
+                    self._stream.flush()
+                    os.fsync(self._stream.fileno())
+            except OSError as error:
+                self._error = error
+            finally:
+                self._batches.task_done()
+            if batch is None:
+                return
+
+    def close(self):
+        # flushes, stops the writer and following every game and closes the file, the
+        # games stay open
+        try:
+            self.flush()
+        finally:
+            for game, listener, _ in self._games.values():
+                game.unsubscribe(listener)
+            self._games = {}
+            self._batches.put(None)
+            self._writer.join()
+            self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def restore(checkpoint, moves):
+    """
+    rebuilds a game from its checkpoint and the moves made after it, without checking
+    or printing anything
+    :param checkpoint: bytes of a CHECKPOINT payload
+    :param moves: list of MOVE payloads in order
+    :return: quiet FocusGame object
+    """
+    game = FocusGame.from_bytes(checkpoint)
+    game.set_quiet(True)
+    length, max_height = game.get_rules()[:2]
+    for payload in moves:
+        game.make_move(decode_move(int.from_bytes(payload, "little"), length, max_height))
+    return game
+
+
+def scan(data):
+    """
+    finds each open game's latest checkpoint and the moves after it
+    :param data: bytes of a log
+    :return: tuple of dict of checkpoint payloads by game id, dict of lists of the
+             MOVE payloads after them by game id and int length of the readable log
+    """
+    checkpoints, tails, end = {}, {}, 0
+    for end, kind, game_id, payload in read_records(data):
+        if kind == CHECKPOINT:
+            checkpoints[game_id], tails[game_id] = payload, []
+        elif kind == MOVE and game_id in tails:
+            tails[game_id].append(payload)
+        elif kind == CLOSE:
+            checkpoints.pop(game_id, None), tails.pop(game_id, None)
+    return checkpoints, tails, end
+
+
+def recover(path, truncate=True):
+    """
+    rebuilds every game the log at path has open. The cyclic garbage collector is
+    paused meanwhile, the games are all kept so its passes would find nothing
+    :param path: str path of the log file, a missing file has no games
+    :param truncate: False to leave a torn or corrupt end of the log in place
+    :return: dict of quiet FocusGame objects by game id
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as stream:
+        data = stream.read()
+    checkpoints, tails, end = scan(data)
+    if truncate and end < len(data):
+        os.truncate(path, end)
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return {game_id: restore(checkpoint, tails[game_id])
+                for game_id, checkpoint in checkpoints.items()}
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def compact(path, games):
+    """
+    replaces the log at path with one checkpoint per game, so it does not keep growing
+    across restarts. The new log is fsynced before it replaces the old one
+    :param path: str path of the log file
+    :param games: dict of FocusGame objects by game id, as recover returns
+    """
+    with open(path + ".tmp", "wb") as stream:
+        stream.write(b"".join(make_record(CHECKPOINT, game_id, game.to_bytes())
+                              for game_id, game in games.items()))
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def play_random(log, games, moves, seed=0):
+    """
+    opens games games in log and makes moves random legal moves in each through
+    apply_moves, round by round so the games' records are interleaved
+    :return: dict of lists of the move tuples made by game id
+    """
+    rng, played = random.Random(seed), {}
+    for game_id in range(1, games + 1):
+        log.follow(game_id, FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True))
+        played[game_id] = []
+    for _ in range(moves):
+        for game_id, entry in log.get_games().items():
+            game = entry[0]
+            name = game.get_turn()
+            if game.check_win("PlayerA") or game.check_win("PlayerB"):
+                continue
+            move = rng.choice(game.legal_moves(name))
+            game.apply_moves([(name,) + move])
+            played[game_id].append(move)
+    return played
+
+
+def replay(game_moves):
+    """
+    rebuilds games the slow way, every move through move_piece/reserved_move
+    :param game_moves: dict of lists of move tuples by game id
+    :return: dict of FocusGame objects by game id
+    """
+    games = {}
+    for game_id, moves in game_moves.items():
+        game = games[game_id] = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), True)
+        for start, destination, num_of_pieces in moves:
+            if start is None:
+                game.reserved_move(game.get_turn(), destination)
+            else:
+                game.move_piece(game.get_turn(), start, destination, num_of_pieces)
+    return games
+
+
+def bench(path, games=100000, moves=60, checkpoint_every=CHECKPOINT_EVERY, seed=0):
+    """
+    logs games open games of moves random moves each, then times recover against
+    replaying every game's whole history through move_piece
+    :return: dict of log size, recover and replay seconds and games recovered a second
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    with GameLog(path, checkpoint_every) as log:
+        played = play_random(log, games, moves, seed)
+    began = time.perf_counter()
+    recovered = recover(path)
+    recovering = time.perf_counter() - began
+    began = time.perf_counter()
+    replayed = replay(played)
+    replaying = time.perf_counter() - began
+    if any(recovered[game_id].to_bytes() != game.to_bytes()
+           for game_id, game in replayed.items()):
+        raise ValueError("recovered games differ from the replayed ones")
+    return {"games": games, "moves": sum(map(len, played.values())),
+            "log_bytes": os.path.getsize(path), "recover_seconds": recovering,
+            "replay_seconds": replaying, "games_per_second": games / recovering}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusGame move log")
+    parser.add_argument("mode", choices=("bench",))
+    parser.add_argument("path")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--moves", type=int, default=60)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    args = parser.parse_args()
+    print(json.dumps(bench(args.path, args.games, args.moves, args.checkpoint_every)))
+
+
+if __name__ == "__main__":
+    main()
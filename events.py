@@ -0,0 +1,88 @@
+"""
+Events FocusGame fires after move_piece and reserved_move to listeners registered
+with FocusGame.subscribe. A listener is any callable taking one event. Events are
+only made when at least one listener is registered.
+"""
+
+
+class Event:
+    """
+    Represents something that happened in a game, made by the player name
+    """
+
+    def __init__(self, name):
+        # initializes name of the player whose move caused the event
+        self._name = name
+
+    def get_name(self):
+        # returns name of the player whose move caused the event
+        return self._name
+
+
+class MoveApplied(Event):
+    """
+    Represents a move or reserve move being made, start is None for a reserve move
+    """
+
+    def __init__(self, name, start, destination, num_of_pieces):
+        super().__init__(name)
+        self._start = start
+        self._destination = destination
+        self._num_of_pieces = num_of_pieces
+
+    def get_start(self):
+        # returns tuple coordinates moved from, None for a reserve move
+        return self._start
+
+    def get_destination(self):
+        # returns tuple coordinates moved to
+        return self._destination
+
+    def get_num_of_pieces(self):
+        # returns int of pieces moved
+        return self._num_of_pieces
+
+
+class PiecesRemoved(Event):
+    """
+    Represents pieces removed from the bottom of the tile at location after a move
+    """
+
+    def __init__(self, name, location, count):
+        super().__init__(name)
+        self._location = location
+        self._count = count
+
+    def get_location(self):
+        # returns tuple coordinates of the tile the pieces were removed from
+        return self._location
+
+    def get_count(self):
+        # returns int of pieces removed
+        return self._count
+
+
+class PiecesReserved(PiecesRemoved):
+    """
+    Represents the player's own pieces removed from the bottom of location into reserve
+    """
+
+
+class PiecesCaptured(PiecesRemoved):
+    """
+    Represents the other player's pieces removed from the bottom of location and captured
+    """
+
+
+class GameWon(Event):
+    """
+    Represents the player winning with captures pieces captured
+    """
+
+    def __init__(self, name, captures):
+        super().__init__(name)
+        self._captures = captures
+
+    def get_captures(self):
+        # returns int of pieces the winner has captured
+        return self._captures
@@ -1,4 +1,312 @@
-from tkinter import *
-from FocusGame import *
+"""
+Tkinter front end for FocusGame. Every tile has its canvas items made once, a square
+and one bar per piece it can hold, and a move only reconfigures the bars of the
+tiles it changed: DirtyTiles listens to the game's events and collects them, and a
+tile whose pieces are the same as last drawn is not touched at all. A computer
+opponent thinks in a worker process on the game's get_state tuple, its move comes
+back through a queue the Tk main loop polls, so the window keeps drawing and
+answering clicks while it thinks.
 
-root = Tk()
+Click a stack of yours, pick how many pieces to move, then click where to; for a
+reserve move press Reserve and click a tile.
+
+    python gui.py                                 two players at one screen
+    python gui.py --computer PlayerB --time 1000  against the engine
+"""
+import argparse
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from tkinter import Tk, Canvas, Label, Button, Spinbox, StringVar
+from FocusGame import FocusGame
+from engine import best_move
+from events import MoveApplied
+
+BOARD_PIXELS = 480
+PAD = 6
+POLL_MS = 15
+COLOURS = {"R": "#c0392b", "G": "#27ae60"}
+SQUARES = ("#f0e6d2", "#d8c8a8")
+
+
+def think(state, time_limit_ms):
+    # returns Engine's move for the game in get_state tuple state, runs in the worker
+    return best_move(FocusGame.from_state(state), time_limit_ms)
+
+
+class ComputerPlayer:
+    """
+    Represents the engine playing as one of the players from a worker process.
+    think_about returns at once and get_move hands the move over when it is ready.
+    The finished search itself is queued, so a worker that raised or a broken pool
+    ends the thinking too instead of leaving it waiting forever
+    """
+
+    def __init__(self, name, time_limit_ms=1000):
+        # initializes the player's name, think time and the queue moves arrive on
+        self._name = name
+        self._time_limit_ms = time_limit_ms
+        self._moves = queue.Queue()
+        self._executor = None
+        self._thinking = False
+        self._error = None
+
+    def get_name(self):
+        # returns name of the player the engine plays as
+        return self._name
+
+    def is_thinking(self):
+        # returns True from think_about until get_move has handed over the move
+        return self._thinking
+
+    def get_error(self):
+        # returns exception of the last search that failed, None if it did not fail
+        return self._error
+
+    def think_about(self, game):
+        """
+        starts searching game's position in the worker process
+        :param game: FocusGame object with the engine's player to move, not touched by
+                     the search, which runs on a copy
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(1)
+        self._thinking = True
+        future = self._executor.submit(think, game.get_state(), self._time_limit_ms)
+        future.add_done_callback(self._moves.put)
+
+    def get_move(self):
+        """
+        hands over the move of the finished search
+        :return: move tuple, None if it is still thinking or was not asked, False if
+                 the search ended without a move: the player had no legal move, or
+                 the search failed and get_error says why
+        """
+        try:
+            done = self._moves.get_nowait()
+        except queue.Empty:
+            return None
+        self._thinking = False
+        self._error = done.exception()
+        if self._error is not None:
+            self.close()
+            return False
+        return done.result() if done.result() is not None else False
+
+    def close(self):
+        # stops the worker process
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+class DirtyTiles:
+    """
+    Represents the tiles changed since they were last drawn, a listener for
+    FocusGame.subscribe
+    """
+
+    def __init__(self):
+        # initializes the set of changed tile positions and the status flag
+        self._tiles = set()
+        self._status = True
+
+    def __call__(self, event):
+        # marks the start and destination of a MoveApplied event, and the status
+        if isinstance(event, MoveApplied):
+            self._tiles.add(event.get_destination())
+            if event.get_start() is not None:
+                self._tiles.add(event.get_start())
+        self._status = True
+
+    def mark(self, positions):
+        # marks every tile in positions and the status to be drawn
+        self._tiles.update(positions)
+        self._status = True
+
+    def take(self):
+        """
+        hands over what changed and starts collecting again
+        :return: tuple of set of tile positions and True if the status changed
+        """
+        tiles, status = self._tiles, self._status
+        self._tiles, self._status = set(), False
+        return tiles, status
+
+
+class FocusGUI:
+    """
+    Represents the window: a canvas of tiles, a status line, the number of pieces to
+    move and the Reserve button. Talks to FocusGame only through move_piece,
+    reserved_move, the show_ methods and subscribe
+    """
+
+    def __init__(self, root, game, computer=None):
+        """
+        builds the window's widgets and canvas items and draws the whole board once
+        :param root: Tk object
+        :param game: quiet FocusGame object to play
+        :param computer: ComputerPlayer for one of the players, None for two people
+        """
+        self._root, self._game, self._computer = root, game, computer
+        self._length, self._max_height = game.get_rules()[0], game.get_rules()[1]
+        self._tile = BOARD_PIXELS // self._length
+        self._canvas = Canvas(root, width=self._tile * self._length,
+                              height=self._tile * self._length, highlightthickness=0)
+        self._canvas.pack()
+        self._status, self._message = StringVar(), ""
+        Label(root, textvariable=self._status).pack()
+        self._pieces = Spinbox(root, from_=1, to=self._max_height, width=3)
+        self._pieces.pack(side="left")
+        Button(root, text="Reserve", command=self.toggle_reserve).pack(side="left")
+        self._items, self._drawn = {}, {}
+        self._selected, self._reserve, self._over = None, False, False
+        self._dirty = DirtyTiles()
+        self.make_items()
+        game.subscribe(self._dirty)
+        self._canvas.bind("<Button-1>", self.click)
+        self.redraw()
+        self.start_turn()
+        root.after(POLL_MS, self.poll)
+
+    def make_items(self):
+        # makes every tile's square and piece bars, hidden, and marks every tile dirty
+        bar = (self._tile - 2 * PAD) / self._max_height
+        for row in range(self._length):
+            for column in range(self._length):
+                left, top = column * self._tile, row * self._tile
+                square = self._canvas.create_rectangle(
+                    left, top, left + self._tile, top + self._tile, width=3,
+                    fill=SQUARES[(row + column) % 2], outline=SQUARES[(row + column) % 2])
+                bottom = top + self._tile - PAD
+                bars = [self._canvas.create_rectangle(
+                    left + PAD, bottom - (i + 1) * bar + 1, left + self._tile - PAD,
+                    bottom - i * bar, state="hidden") for i in range(self._max_height)]
+                self._items[(row, column)] = (square, bars)
+        self._dirty.mark(self._items)
+
+    def draw_tile(self, position):
+        # shows the tile's piece bars in their colours if its pieces changed
+        pieces = self._game.show_pieces(position)
+        if self._drawn.get(position) == pieces:
+            return
+        for i, bar in enumerate(self._items[position][1]):
+            if i < len(pieces):
+                self._canvas.itemconfigure(bar, state="normal",
+                                           fill=COLOURS.get(pieces[i].upper(), "grey"))
+            else:
+                self._canvas.itemconfigure(bar, state="hidden")
+        self._drawn[position] = list(pieces)
+
+    def select(self, position):
+        # outlines the tile at position, or removes the outline if position is None
+        if self._selected is not None:
+            square = self._items[self._selected][0]
+            colour = self._canvas.itemcget(square, "fill")
+            self._canvas.itemconfigure(square, outline=colour)
+        self._selected = position
+        if position is not None:
+            self._canvas.itemconfigure(self._items[position][0], outline="#2c3e50")
+
+    def redraw(self):
+        # draws the dirty tiles and, if it changed, the status line
+        tiles, status = self._dirty.take()
+        for position in tiles:
+            self.draw_tile(position)
+        if status:
+            game, turn = self._game, self._game.get_turn()
+            names = (game.get_p1().get_name(), game.get_p2().get_name())
+            self._status.set("%s   %s to move   %s" % (self._message, turn, "   ".join(
+                "%s: %d reserve, %d captured" % (name, game.show_reserve(name),
+                                                 game.show_captured(name))
+                for name in names)))
+
+    def toggle_reserve(self):
+        # switches between moving a stack and placing a reserve piece
+        self._reserve = not self._reserve
+        self.select(None)
+        self._message = "place a reserve piece" if self._reserve else ""
+        self._dirty.mark(())
+        self.redraw()
+
+    def click(self, event):
+        # selects a stack, or moves the selected stack or a reserve piece to the tile
+        position = (event.y // self._tile, event.x // self._tile)
+        if self._over or not (0 <= position[0] < self._length and
+                              0 <= position[1] < self._length) or \
+                (self._computer is not None and self._computer.is_thinking()):
+            return
+        name = self._game.get_turn()
+        if self._reserve:
+            self._reserve = False
+            self.finish_move(self._game.reserved_move(name, position))
+        elif self._selected == position:
+            self.select(None)
+        elif self._selected is None:
+            self.select(position)
+        else:
+            start, count = self._selected, int(self._pieces.get())
+            self.select(None)
+            self.finish_move(self._game.move_piece(name, start, position, count))
+
+    def finish_move(self, result):
+        """
+        shows what move_piece or reserved_move returned and hands the turn on
+        :param result: str message, False for a move that was refused
+        """
+        self._message = result if result else "move not allowed"
+        self._over = self._game.check_win(self._game.get_turn())
+        self._dirty.mark(())
+        self.redraw()
+        self.start_turn()
+
+    def start_turn(self):
+        # asks the computer for a move if it is its turn
+        if not self._over and self._computer is not None and \
+                self._game.get_turn() == self._computer.get_name():
+            self._computer.think_about(self._game)
+            self._message = "%s is thinking" % self._computer.get_name()
+            self._dirty.mark(())
+            self.redraw()
+
+    def poll(self):
+        # makes the computer's move if it has arrived, then polls again after POLL_MS
+        move = self._computer.get_move() if self._computer is not None else None
+        if move is False:
+            self.stop_computer()
+        elif move is not None:
+            name = self._game.get_turn()
+            if move[0] is None:
+                self.finish_move(self._game.reserved_move(name, move[1]))
+            else:
+                self.finish_move(self._game.move_piece(name, *move))
+        self._root.after(POLL_MS, self.poll)
+
+    def stop_computer(self):
+        # shows why the computer made no move; after a failed search play goes on by hand
+        error, name = self._computer.get_error(), self._computer.get_name()
+        if error is None:
+            self._message, self._over = "%s has no legal move" % name, True
+        else:
+            self._message = "engine failed (%s), %s plays by hand" % (error, name)
+            self._computer = None
+        self._dirty.mark(())
+        self.redraw()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Focus")
+    parser.add_argument("--computer", choices=("PlayerA", "PlayerB"),
+                        help="player the engine plays as")
+    parser.add_argument("--time", type=int, default=1000, help="engine milliseconds a move")
+    args = parser.parse_args()
+    root = Tk()
+    root.title("Focus")
+    computer = ComputerPlayer(args.computer, args.time) if args.computer else None
+    FocusGUI(root, FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True), computer)
+    root.mainloop()
+    if computer is not None:
+        computer.close()
+
+
+if __name__ == "__main__":
+    main()
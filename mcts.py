@@ -0,0 +1,277 @@
+"""
+Monte Carlo Tree Search for FocusGame. Root parallel: every worker process grows its
+own tree from the same position, sent as the compact FocusGame.get_state tuple, and
+the visit counts of the root moves are added up at the end. Run this file to measure
+playouts per second for 1 up to os.cpu_count() workers.
+"""
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from FocusGame import FocusGame
+
+EXPLORATION = 1.4
+MAX_ROLLOUT = 200
+
+
+def run_tree(state, playouts, time_limit_ms, seed):
+    """
+    grows one tree from state, runs in a worker process
+    :param state: tuple from FocusGame.get_state
+    :param playouts: int most playouts to run, None for no limit
+    :param time_limit_ms: int milliseconds to run for, None for no limit
+    :param seed: int seed for the rollouts of this tree
+    :return: tuple of dict {move: (visits, wins)} for the root moves and playouts run
+    """
+    tree = Tree(FocusGame.from_state(state), random.Random(seed))
+    deadline = None if time_limit_ms is None else time.perf_counter() + time_limit_ms / 1000
+    count = 0
+    while (playouts is None or count < playouts) and \
+            (deadline is None or time.perf_counter() < deadline):
+        tree.playout()
+        count += 1
+    return tree.get_root_stats(), count
+
+
+class Node:
+    """
+    Represents a tree node: the move leading to it, the player who made it, the moves
+    not expanded yet and visits/wins counted for the player who made the move
+    """
+
+    def __init__(self, move, name, parent, moves):
+        # initializes node, moves is None for a position where the game is won
+        self._move = move
+        self._name = name
+        self._parent = parent
+        self._untried = moves or []
+        self._children = []
+        self._visits = 0
+        self._wins = 0.0
+
+    def get_move(self):
+        # returns move leading to the node, None for the root
+        return self._move
+
+    def get_name(self):
+        # returns name of the player who made the move
+        return self._name
+
+    def get_parent(self):
+        # returns parent Node, None for the root
+        return self._parent
+
+    def get_children(self):
+        # returns list of expanded child Nodes
+        return self._children
+
+    def get_untried(self):
+        # returns list of moves not expanded yet
+        return self._untried
+
+    def get_visits(self):
+        # returns number of playouts through the node
+        return self._visits
+
+    def get_wins(self):
+        # returns wins for the player who made the move, halves for even playouts
+        return self._wins
+
+    def add_child(self, child):
+        # adds child Node and returns it
+        self._children.append(child)
+        return child
+
+    def update(self, winner):
+        # counts a playout, winner None for a playout cut off evenly
+        self._visits += 1
+        self._wins += 0.5 if winner is None else float(winner == self._name)
+
+    def select_child(self):
+        """
+        returns child with the highest UCT score
+        :return: Node object
+        """
+        log_visits = math.log(self._visits)
+        return max(self._children, key=lambda child: child.get_wins() / child.get_visits() +
+                   EXPLORATION * math.sqrt(log_visits / child.get_visits()))
+
+
+class Tree:
+    """
+    Represents one search tree over a FocusGame, each playout walks down the tree with
+    make_move, expands one node, plays random moves to the end and unmakes them all
+    """
+
+    def __init__(self, game, rng):
+        # initializes the root at the game's position
+        self._game = game
+        self._rng = rng
+        self._root = Node(None, None, None, game.legal_moves(game.get_turn()))
+
+    def playout(self):
+        """
+        runs one selection, expansion, rollout and backpropagation, leaving the game
+        in the root position
+        """
+        tokens = []
+        node = self.select(tokens)
+        if node.get_move() is not None and self._game.check_win(node.get_name()):
+            winner = node.get_name()
+        else:
+            winner = self.rollout(tokens)
+        while node is not None:
+            node.update(winner)
+            node = node.get_parent()
+        while tokens:
+            self._game.unmake_move(tokens.pop())
+
+    def select(self, tokens):
+        """
+        walks down by UCT while nodes are fully expanded, then expands one move
+        :param tokens: list the undo tokens of the moves made are appended to
+        :return: Node object the rollout starts from
+        """
+        game, node = self._game, self._root
+        while not node.get_untried() and node.get_children():
+            node = node.select_child()
+            tokens.append(game.make_move(node.get_move()))
+        untried = node.get_untried()
+        if untried:
+            move = untried.pop(self._rng.randrange(len(untried)))
+            name = game.get_turn()
+            tokens.append(game.make_move(move))
+            moves = None if game.check_win(name) else game.legal_moves(game.get_turn())
+            node = node.add_child(Node(move, name, node, moves))
+        return node
+
+    def rollout(self, tokens):
+        """
+        plays random moves until someone wins or MAX_ROLLOUT moves were made
+        :param tokens: list the undo tokens of the moves made are appended to
+        :return: name of the winner, the player with more captures when cut off, or None
+        """
+        game = self._game
+        for _ in range(MAX_ROLLOUT):
+            name = game.get_turn()
+            moves = game.legal_moves(name)
+            if not moves:
+                return game.get_p2().get_name() if name == game.get_p1().get_name() \
+                    else game.get_p1().get_name()
+            tokens.append(game.make_move(self._rng.choice(moves)))
+            if game.check_win(name):
+                return name
+        p1, p2 = game.get_p1(), game.get_p2()
+        if p1.get_captures() == p2.get_captures():
+            return None
+        return p1.get_name() if p1.get_captures() > p2.get_captures() else p2.get_name()
+
+    def get_root_stats(self):
+        # returns dict {move: (visits, wins)} for the expanded root moves
+        return {child.get_move(): (child.get_visits(), child.get_wins())
+                for child in self._root.get_children()}
+
+
+class MCTSResult:
+    """
+    Represents what MCTS.search found: the best move, the merged visits and wins of
+    every root move, playouts run and time taken
+    """
+
+    def __init__(self, move, stats, playouts, elapsed):
+        # initializes result, elapsed is in seconds
+        self._move = move
+        self._stats = stats
+        self._playouts = playouts
+        self._elapsed = elapsed
+
+    def get_move(self):
+        # returns most visited root move, None if there was no legal move
+        return self._move
+
+    def get_stats(self):
+        # returns dict {move: (visits, wins)} merged over all trees
+        return self._stats
+
+    def get_playouts(self):
+        # returns number of playouts over all trees
+        return self._playouts
+
+    def get_playouts_per_second(self):
+        # returns playouts run per second of wall clock time
+        return self._playouts / self._elapsed if self._elapsed > 0 else 0.0
+
+
+class MCTS:
+    """
+    Represents a root parallel MCTS player. With workers > 1 the trees are grown in a
+    ProcessPoolExecutor, started on the first search and reused until close. Given a
+    book.OpeningBook, positions in the book get its move without any playouts.
+    """
+
+    def __init__(self, workers=None, seed=None, book=None):
+        # initializes worker count (os.cpu_count() by default), seed source and book
+        self._workers = workers or os.cpu_count() or 1
+        self._rng = random.Random(seed)
+        self._executor = None
+        self._book = book
+
+    def search(self, game, playouts=None, time_limit_ms=None):
+        """
+        grows one tree per worker from game's position and merges their root moves
+        :param game: FocusGame object, left unchanged
+        :param playouts: int playouts per worker, None to run until the time limit
+        :param time_limit_ms: int milliseconds to search, None to run playouts only
+        :return: MCTSResult object, raises ValueError if neither limit is given
+        """
+        if playouts is None and time_limit_ms is None:
+            raise ValueError("search needs playouts or time_limit_ms")
+        began = time.perf_counter()
+        booked = self._book.lookup(game) if self._book is not None else None
+        if booked is not None:
+            return MCTSResult(booked[0], {}, 0, time.perf_counter() - began)
+        jobs = [(game.get_state(), playouts, time_limit_ms, self._rng.getrandbits(32))
+                for _ in range(self._workers)]
+        if self._workers == 1:
+            results = [run_tree(*jobs[0])]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers)
+            results = list(self._executor.map(run_tree, *zip(*jobs)))
+        return self.merge(results, time.perf_counter() - began)
+
+    def merge(self, results, elapsed):
+        """
+        adds up the root move statistics of every tree
+        :param results: list of run_tree return values
+        :param elapsed: float seconds the search took
+        :return: MCTSResult object
+        """
+        stats, total = {}, 0
+        for tree_stats, count in results:
+            total += count
+            for move, (visits, wins) in tree_stats.items():
+                merged = stats.get(move, (0, 0.0))
+                stats[move] = (merged[0] + visits, merged[1] + wins)
+        move = max(stats, key=lambda m: stats[m][0]) if stats else None
+        return MCTSResult(move, stats, total, elapsed)
+
+    def close(self):
+        # shuts down the worker processes
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+if __name__ == "__main__":
+    # playouts/sec for 1, 2, 4... workers searching the starting position for 2 seconds
+    start = FocusGame(('PlayerA', 'R'), ('PlayerB', 'G'))
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        player = MCTS(workers, seed=1)
+        player.search(start, playouts=1)
+        result = player.search(start, time_limit_ms=2000)
+        print(workers, "workers:", round(result.get_playouts_per_second()), "playouts/sec")
+        player.close()
+        workers *= 2
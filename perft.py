@@ -0,0 +1,104 @@
+"""
+Perft for Focus: counts the positions reachable in exactly depth moves by walking
+the move tree with legal_moves, make_move and unmake_move. Known counts catch any
+move generator that adds or drops moves, and the time taken measures its speed.
+A move that wins ends the game, so its position has no moves after it.
+
+    python perft.py 4                      count from the starting layout
+    python perft.py 3 --position tall     count from a reference midgame position
+    python perft.py 4 --divide --processes 4
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from FocusGame import FocusGame
+
+# to_bytes of reference positions, "tall" has full height stacks and reserves
+POSITIONS = {
+    "start": "464f435302060500060000000000000000000202030302020303020203030202030302020303"
+             "0202030302020303020203030202030307506c6179657241015207506c61796572420147",
+    "tall": "464f435302060500060002000000000000000101050502010503040105050101020702070601"
+            "010b0101260101010a0101010103010507506c6179657241015207506c61796572420147",
+}
+
+
+def load_position(name):
+    # returns quiet FocusGame in the reference position called name
+    game = FocusGame.from_bytes(bytes.fromhex(POSITIONS[name]))
+    game.set_quiet(True)
+    return game
+
+
+def perft(game, depth):
+    """
+    counts positions depth moves from game's position, the last moves are counted
+    without being made
+    :param game: FocusGame object, restored before returning
+    :param depth: int moves to look ahead
+    :return: int count of positions
+    """
+    moves = game.legal_moves(game.get_turn())
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    total = 0
+    for move in moves:
+        total += count_after(game, move, depth - 1)
+    return total
+
+
+def count_after(game, move, depth):
+    # makes move, counts depth moves further unless it won and unmakes it
+    name = game.get_turn()
+    token = game.make_move(move)
+    total = 0 if game.check_win(name) else perft(game, depth)
+    game.unmake_move(token)
+    return total
+
+
+def divide_job(data, move, depth):
+    # counts depth moves after move from the position in data, runs in a worker process
+    game = FocusGame.from_bytes(data)
+    return count_after(game, move, depth)
+
+
+def divide(game, depth, processes=1):
+    """
+    counts positions depth moves away after each root move
+    :param game: FocusGame object, restored before returning
+    :param depth: int moves to look ahead, at least 1
+    :param processes: int worker processes to fan the root moves out to
+    :return: list of (move, count) in legal_moves order
+    """
+    moves = game.legal_moves(game.get_turn())
+    if processes <= 1:
+        counts = [count_after(game, move, depth - 1) for move in moves]
+    else:
+        data = game.to_bytes()
+        with ProcessPoolExecutor(processes) as pool:
+            counts = list(pool.map(divide_job, [data] * len(moves), moves,
+                                   [depth - 1] * len(moves)))
+    return list(zip(moves, counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="count Focus move tree leaves")
+    parser.add_argument("depth", type=int)
+    parser.add_argument("--position", choices=sorted(POSITIONS), default="start")
+    parser.add_argument("--divide", action="store_true", help="print count per root move")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+    game = load_position(args.position)
+    for depth in range(1, args.depth + 1):
+        began = time.perf_counter()
+        counts = divide(game, depth, args.processes)
+        elapsed = time.perf_counter() - began
+        total = sum(count for _, count in counts)
+        print("depth %d: %d nodes in %.3fs, %.0f nodes/sec" %
+              (depth, total, elapsed, total / elapsed if elapsed else 0))
+    if args.divide:
+        for move, count in counts:
+            print(move, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Immutable Focus positions for keeping whole game trees in memory. A Position holds
+its board as a tuple of rows, each row one int of the row's packed cells (in the
+StackArray format) side by side, max_height + 1 bits each. play returns a new
+Position that shares every row the move did not touch with its parent: one or two
+new row ints per move, nothing else is copied, about 200 bytes a position on the
+6x6 board. The players, rules and move tables live in one Setup shared by every
+position of a tree. Positions convert to and from FocusGame through the get_state
+tuple.
+"""
+import sys
+from array import array
+from FocusGame import FocusGame, StackArray
+
+
+class Setup:
+    """
+    Represents what every position of a game shares: the players, the rules and the
+    move tables of FocusGame for the board's shape
+    """
+
+    def __init__(self, game):
+        # initializes players, rules and move tables from FocusGame game
+        self._p1 = (game.get_p1().get_name(), game.get_p1().get_colour())
+        self._p2 = (game.get_p2().get_name(), game.get_p2().get_colour())
+        self._rules = game.get_rules()
+        self._move_table = game.get_move_table()
+        self._reserve_moves = game.get_reserve_moves()
+        self._cell_bits = self._rules[1] + 1
+
+    def get_players(self):
+        # returns tuple of p1 and p2 (name, colour) tuples
+        return self._p1, self._p2
+
+    def get_rules(self):
+        # returns tuple of board length, max_height and captures needed to win
+        return self._rules
+
+    def get_move_table(self):
+        # returns FocusGame move table, move_table[index][height] lists a stack's moves
+        return self._move_table
+
+    def get_reserve_moves(self):
+        # returns list of every reserve move
+        return self._reserve_moves
+
+    def get_cell_bits(self):
+        # returns bits a packed cell takes in a row int, max_height + 1 for a cell at rest
+        return self._cell_bits
+
+    def pack_row(self, cells):
+        # returns row int of the packed cells, column 0 in the lowest bits
+        row = 0
+        for column, cell in enumerate(cells):
+            row |= cell << column * self._cell_bits
+        return row
+
+    def unpack_row(self, row):
+        # returns list of the packed cells in row int
+        mask = (1 << self._cell_bits) - 1
+        return [row >> column * self._cell_bits & mask for column in range(self._rules[0])]
+
+
+class Position:
+    """
+    Represents one position that never changes: rows of packed cells, counts (p1
+    reserves, p1 captures, p2 reserves, p2 captures) and turn (0 for p1, 1 for p2).
+    Equal positions compare and hash equal, so they can key a dict of a tree.
+    """
+
+    __slots__ = ("_setup", "_rows", "_counts", "_turn")
+
+    def __init__(self, setup, rows, counts, turn):
+        """
+        :param setup: Setup shared by the positions of a game
+        :param rows: tuple of row ints from Setup.pack_row
+        :param counts: tuple of p1 reserves, p1 captures, p2 reserves, p2 captures
+        :param turn: 0 for p1's turn, 1 for p2's
+        """
+        self._setup = setup
+        self._rows = rows
+        self._counts = counts
+        self._turn = turn
+
+    @classmethod
+    def from_game(cls, game, setup=None):
+        """
+        makes a Position in the same position as game
+        :param game: FocusGame object
+        :param setup: Setup to share, None to make one from game
+        :return: Position object
+        """
+        setup = setup or Setup(game)
+        length = game.get_rules()[0]
+        cells = game.get_board().get_stacks().get_cells()
+        rows = tuple(setup.pack_row(cells[row * length:(row + 1) * length])
+                     for row in range(length))
+        state = game.get_state()
+        return cls(setup, rows, tuple(state[3]), state[4])
+
+    def get_state(self):
+        # returns tuple in the form of FocusGame.get_state
+        cells = array(StackArray.typecode(self._setup.get_cell_bits()),
+                      [cell for row in self._rows for cell in self._setup.unpack_row(row)])
+        if cells.itemsize > 1 and sys.byteorder == "big":
+            cells.byteswap()
+        return self._setup.get_players() + (cells.tobytes(), self._counts, self._turn,
+                                            self._setup.get_rules())
+
+    def to_game(self, quiet=True):
+        # returns new FocusGame object in this position
+        game = FocusGame.from_state(self.get_state())
+        game.set_quiet(quiet)
+        return game
+
+    def get_setup(self):
+        # returns Setup shared with the other positions of the game
+        return self._setup
+
+    def get_rows(self):
+        # returns tuple of row ints of packed cells
+        return self._rows
+
+    def get_cell(self, position):
+        # returns packed cell of the tile at position
+        bits = self._setup.get_cell_bits()
+        return self._rows[position[0]] >> position[1] * bits & ((1 << bits) - 1)
+
+    def get_counts(self):
+        # returns tuple of p1 reserves, p1 captures, p2 reserves, p2 captures
+        return self._counts
+
+    def get_turn(self):
+        # returns name of the player to move
+        return self._setup.get_players()[self._turn][0]
+
+    def get_pieces(self, position):
+        # returns list of colours on the tile at position, bottom first
+        cell = self.get_cell(position)
+        colours = (self._setup.get_players()[0][1], self._setup.get_players()[1][1])
+        return [colours[(cell >> i) & 1] for i in range(cell.bit_length() - 1)]
+
+    def get_winner(self):
+        # returns name of the player with enough captures to win, None if nobody has
+        for side in (0, 1):
+            if self._counts[2 * side + 1] >= self._setup.get_rules()[2]:
+                return self._setup.get_players()[side][0]
+        return None
+
+    def legal_moves(self):
+        """
+        returns every legal move of the player to move, in the order
+        FocusGame.legal_moves gives them
+        :return: list of move tuples
+        """
+        length, max_height, _ = self._setup.get_rules()
+        move_table = self._setup.get_move_table()
+        moves = []
+        for row, cells in enumerate(self._rows):
+            for column, cell in enumerate(self._setup.unpack_row(cells)):
+                height = cell.bit_length() - 1
+                if height and (cell >> (height - 1)) & 1 == self._turn:
+                    moves.extend(move_table[row * length + column][min(height, max_height)])
+        if self._counts[2 * self._turn] > 0:
+            moves.extend(self._setup.get_reserve_moves())
+        return moves
+
+    def play(self, move):
+        """
+        applies a legal move the way FocusGame.make_move does, without validating it
+        :param move: (start, destination, num_of_pieces) or (None, location, 1)
+        :return: new Position sharing every untouched row with this one
+        """
+        start, destination, num_of_pieces = move
+        rows, counts = list(self._rows), self._counts
+        if start is None:
+            pile = 2 | self._turn
+            counts = self.add_counts(counts, -1, 0)
+        else:
+            pile = self.lift(rows, start, num_of_pieces)
+        removed = self.drop(rows, destination, pile)
+        count = removed.bit_length() - 1
+        if count > 0:
+            ones = (removed ^ (1 << count)).bit_count()
+            own = ones if self._turn == 1 else count - ones
+            counts = self.add_counts(counts, own, count - own)
+        turn = self._turn
+        if counts[2 * turn + 1] < self._setup.get_rules()[2]:
+            turn = 1 - turn
+        return Position(self._setup, tuple(rows), counts, turn)
+
+    def lift(self, rows, position, num_of_pieces):
+        """
+        takes the top num_of_pieces off the cell at position, like StackArray.lift
+        :param rows: list of row ints, changed in place
+        :return: packed int of the pieces lifted
+        """
+        cell = self.get_cell(position)
+        keep = cell.bit_length() - 1 - num_of_pieces
+        self.set_cell(rows, position, cell, (cell & ((1 << keep) - 1)) | (1 << keep))
+        return cell >> keep
+
+    def drop(self, rows, position, pile):
+        """
+        stacks packed pile on the cell at position and takes the pieces over
+        max_height off its bottom, like StackArray.drop and StackArray.trim
+        :param rows: list of row ints, changed in place
+        :return: packed int of the pieces removed, 1 for none
+        """
+        old = self.get_cell(position)
+        height = old.bit_length() - 1
+        cell = (old ^ (1 << height)) | (pile << height)
+        over = cell.bit_length() - 1 - self._setup.get_rules()[1]
+        removed = 1
+        if over > 0:
+            removed = (cell & ((1 << over) - 1)) | (1 << over)
+            cell >>= over
+        self.set_cell(rows, position, old, cell)
+        return removed
+
+    def set_cell(self, rows, position, old, cell):
+        # replaces packed cell old at position in list rows with packed cell
+        shift = position[1] * self._setup.get_cell_bits()
+        rows[position[0]] ^= (old ^ cell) << shift
+
+    def add_counts(self, counts, reserves, captures):
+        # returns counts with reserves and captures added to the player to move's
+        side = 2 * self._turn
+        changed = list(counts)
+        changed[side] += reserves
+        changed[side + 1] += captures
+        return tuple(changed)
+
+    def __eq__(self, other):
+        return isinstance(other, Position) and self._turn == other._turn and \
+            self._counts == other._counts and self._rows == other._rows and \
+            self._setup.get_rules() == other._setup.get_rules()
+
+    def __hash__(self):
+        return hash((self._rows, self._counts, self._turn))
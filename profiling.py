@@ -0,0 +1,127 @@
+"""
+Opt-in call counts and timings for the methods of FocusGame, Board and Tile. While
+a Profiler is enabled each public method (the check_ validation methods included)
+is replaced on its class by a wrapper counting calls and adding up perf_counter_ns
+time, inclusive of the methods it calls. Disabling puts the original functions
+back, so a disabled profiler leaves nothing on the hot path.
+
+    profiler = Profiler()
+    with profiler:
+        game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+    print(profiler.to_prometheus())
+"""
+import functools
+import time
+import types
+from FocusGame import FocusGame, Board, Tile
+
+CLASSES = (FocusGame, Board, Tile)
+
+
+class Profiler:
+    """
+    Represents call counts and time spent per method, keyed by "Class.method"
+    """
+
+    _active = None
+
+    def __init__(self, classes=CLASSES):
+        # initializes classes to instrument, stats and the original functions
+        self._classes = classes
+        self._calls = {}
+        self._total_ns = {}
+        self._originals = []
+
+    def get_calls(self):
+        # returns dict of call counts by "Class.method"
+        return self._calls
+
+    def get_total_ns(self):
+        # returns dict of int nanoseconds spent by "Class.method"
+        return self._total_ns
+
+    def is_enabled(self):
+        # returns True while the wrappers are installed
+        return Profiler._active is self
+
+    def enable(self):
+        """
+        installs a wrapper on each public method other than classmethods, only one
+        profiler can be enabled at a time
+        :return: False if a profiler is already enabled, otherwise True
+        """
+        if Profiler._active is not None:
+            return False
+        for cls in self._classes:
+            for name, function in list(vars(cls).items()):
+                if not name.startswith("_") and isinstance(function, types.FunctionType):
+                    self._originals.append((cls, name, function))
+                    setattr(cls, name, self.wrap(cls.__name__ + "." + name, function))
+        Profiler._active = self
+        return True
+
+    def disable(self):
+        """
+        puts the original methods back, the stats are kept
+        :return: False if this profiler was not enabled, otherwise True
+        """
+        if Profiler._active is not self:
+            return False
+        for cls, name, function in self._originals:
+            setattr(cls, name, function)
+        self._originals = []
+        Profiler._active = None
+        return True
+
+    def reset(self):
+        # zeroes the stats in place, the wrappers of an enabled profiler hold the dicts
+        for key in self._calls:
+            self._calls[key] = 0
+            self._total_ns[key] = 0
+
+    def wrap(self, key, function):
+        # returns function wrapped to count its calls and time under key
+        calls, total_ns, clock = self._calls, self._total_ns, time.perf_counter_ns
+        calls[key] = calls.get(key, 0)
+        total_ns[key] = total_ns.get(key, 0)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            began = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                total_ns[key] += clock() - began
+                calls[key] += 1
+        return wrapper
+
+    def get_stats(self):
+        """
+        :return: dict of {"calls": int, "total_ns": int} by "Class.method", methods
+                 that were never called are left out
+        """
+        return {key: {"calls": calls, "total_ns": self._total_ns[key]}
+                for key, calls in sorted(self._calls.items()) if calls}
+
+    def to_prometheus(self, prefix="focus"):
+        """
+        :param prefix: str put in front of the metric names
+        :return: str of the stats in the Prometheus text exposition format
+        """
+        stats = self.get_stats()
+        lines = []
+        for metric, field, scale in (("calls", "calls", None), ("seconds", "total_ns", 1e9)):
+            lines.append("# TYPE %s_method_%s_total counter" % (prefix, metric))
+            for key, values in stats.items():
+                cls, method = key.split(".")
+                value = values[field] / scale if scale else values[field]
+                lines.append('%s_method_%s_total{class="%s",method="%s"} %s' %
+                             (prefix, metric, cls, method, value))
+        return "\n".join(lines) + "\n"
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
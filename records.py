@@ -0,0 +1,212 @@
+"""
+Compact binary format for archived games. A file starts with a 9 byte header
+(b"FOCR", version, board length, max height, 2 bytes of captures to win) followed
+by game records:
+
+    p1 name, p1 colour, p2 name, p2 colour   each 1 byte length + utf-8
+    winner                                   1 byte, 0 none, 1 p1, 2 p2
+    move count                               4 bytes little endian
+    moves                                    move_width bytes little endian each
+
+A move is start index, destination index (index is row * length + column),
+num_of_pieces and a reserve move flag packed from the lowest bits up, each index
+taking as many bits as the highest index on the board and num_of_pieces as many as
+max height. For the standard 6x6 board with stacks of 5 that is bits 0-5, 6-11,
+12-14 and 15, 2 bytes a move, as it is for any board up to 8x8 with stacks up to
+7; bigger variants take 4 bytes a move. RecordWriter streams games out one at a
+time, read_games is a generator reading one game at a time and replay drives
+FocusGame with make_move.
+"""
+import struct
+import sys
+from array import array
+from FocusGame import FocusGame, StackArray, DEFAULT_RULES
+
+MAGIC = b"FOCR"
+VERSION = 2
+_HEADER = struct.Struct("<4sBBBH")
+_GAME = struct.Struct("<BI")
+
+
+def move_bits(length=6, max_height=5):
+    # returns tuple of bits per cell index and bits for num_of_pieces in a move code
+    return (length * length - 1).bit_length(), max_height.bit_length()
+
+
+def move_width(length=6, max_height=5):
+    """
+    :param length: int length of the board's sides
+    :param max_height: int of pieces allowed on a tile
+    :return: int bytes per move code, 2 or 4, raises ValueError if 4 are not enough
+    """
+    index_bits, count_bits = move_bits(length, max_height)
+    bits = 2 * index_bits + count_bits + 1
+    if bits > 32:
+        raise ValueError("moves on this board do not fit 4 bytes")
+    return 2 if bits <= 16 else 4
+
+
+def encode_move(move, length=6, max_height=5):
+    """
+    packs a move tuple into an int of move_width bytes
+    :param move: (start, destination, num_of_pieces) or (None, location, 1)
+    :param length: int length of the board's sides
+    :param max_height: int of pieces allowed on a tile
+    :return: int below 1 << (8 * move_width(length, max_height))
+    """
+    index_bits, count_bits = move_bits(length, max_height)
+    start, destination, num_of_pieces = move
+    code = (destination[0] * length + destination[1]) << index_bits | \
+        num_of_pieces << 2 * index_bits
+    if start is None:
+        return code | 1 << 2 * index_bits + count_bits
+    return code | start[0] * length + start[1]
+
+
+def decode_move(code, length=6, max_height=5):
+    """
+    unpacks an int made by encode_move
+    :param code: int from encode_move
+    :param length: int length of the board's sides
+    :param max_height: int of pieces allowed on a tile
+    :return: move tuple
+    """
+    index_bits, count_bits = move_bits(length, max_height)
+    mask = (1 << index_bits) - 1
+    destination = divmod(code >> index_bits & mask, length)
+    if code >> 2 * index_bits + count_bits:
+        return None, destination, 1
+    return (divmod(code & mask, length), destination,
+            code >> 2 * index_bits & (1 << count_bits) - 1)
+
+
+def read_header(stream):
+    """
+    reads the file header
+    :param stream: binary file object opened for reading, at its start
+    :return: tuple of board length, max height and captures to win, the rules of
+             every game in the file
+    """
+    magic, version, *rules = _HEADER.unpack(stream.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a Focus game record file")
+    return tuple(rules)
+
+
+def read_games(stream):
+    """
+    reads the header, then the game records one at a time with read_records
+    :param stream: binary file object opened for reading
+    :return: generator of (p1, p2, moves, winner) where p1/p2 are (name, colour)
+             tuples, moves is a list of move tuples and winner is a name or None
+    """
+    length, max_height, _ = read_header(stream)
+    return read_records(stream, length, max_height)
+
+
+def read_records(stream, length=6, max_height=5):
+    """
+    reads game records one at a time, only the game being yielded is in memory
+    :param stream: binary file object opened for reading, after the header
+    :param length: int length of the board's sides, from read_header
+    :param max_height: int of pieces allowed on a tile, from read_header
+    :return: generator of (p1, p2, moves, winner) like read_games
+    """
+    width = move_width(length, max_height)
+    while True:
+        p1 = (read_text(stream), read_text(stream))
+        if p1[0] is None:
+            return
+        p2 = (read_text(stream), read_text(stream))
+        winner, count = _GAME.unpack(stream.read(_GAME.size))
+        codes = array(StackArray.typecode(8 * width))
+        codes.frombytes(stream.read(width * count))
+        if sys.byteorder == "big":
+            codes.byteswap()
+        moves = [decode_move(code, length, max_height) for code in codes]
+        yield p1, p2, moves, (None, p1[0], p2[0])[winner]
+
+
+def read_text(stream):
+    # reads 1 byte length + utf-8 string, None at the end of the stream
+    size = stream.read(1)
+    if not size:
+        return None
+    return stream.read(size[0]).decode("utf-8")
+
+
+def replay(p1, p2, moves, validate=False, rules=DEFAULT_RULES):
+    """
+    plays moves in a new quiet FocusGame. Records written from finished games are
+    already known to be valid, so by default they go straight to make_move
+    :param p1: tuple of p1's name and colour
+    :param p2: tuple of p2's name and colour
+    :param moves: iterable of move tuples
+    :param validate: True to check every move with move_piece/reserved_move
+    :param rules: tuple of board length, max height and captures to win, from
+                  read_header
+    :return: FocusGame object after the last move, False if validate found a bad move
+    """
+    game = FocusGame(p1, p2, True, *rules)
+    for move in moves:
+        if not validate:
+            game.make_move(move)
+        elif move[0] is None:
+            if not game.reserved_move(game.get_turn(), move[1]):
+                return False
+        elif not game.move_piece(game.get_turn(), move[0], move[1], move[2]):
+            return False
+    return game
+
+
+class RecordWriter:
+    """
+    Represents a stream of game records being written, usable as a context manager
+    """
+
+    def __init__(self, stream, rules=DEFAULT_RULES):
+        """
+        writes the file header
+        :param stream: binary file object opened for writing
+        :param rules: tuple of board length, max height and captures to win of the
+                      games, from FocusGame.get_rules
+        """
+        self._stream = stream
+        self._length, self._max_height = rules[:2]
+        self._typecode = StackArray.typecode(8 * move_width(*rules[:2]))
+        self._games = 0
+        stream.write(_HEADER.pack(MAGIC, VERSION, *rules))
+
+    def get_games(self):
+        # returns number of games written
+        return self._games
+
+    def write_game(self, p1, p2, moves, winner=None):
+        """
+        writes one game record
+        :param p1: tuple of p1's name and colour
+        :param p2: tuple of p2's name and colour
+        :param moves: list of move tuples in the order they were played
+        :param winner: name of the winner or None
+        """
+        for text in p1 + p2:
+            data = text.encode("utf-8")
+            self._stream.write(bytes((len(data),)) + data)
+        codes = array(self._typecode, [encode_move(move, self._length, self._max_height)
+                                       for move in moves])
+        if sys.byteorder == "big":
+            codes.byteswap()
+        result = 1 if winner == p1[0] else 2 if winner == p2[0] else 0
+        self._stream.write(_GAME.pack(result, len(codes)))
+        self._stream.write(codes.tobytes())
+        self._games += 1
+
+    def close(self):
+        # flushes the stream, the caller closes it
+        self._stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
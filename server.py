@@ -0,0 +1,347 @@
+"""
+Asyncio host keeping many FocusGame sessions in memory, spoken to over a local TCP
+socket with one JSON object per line. Requests and their responses:
+
+    {"op": "new", "p1": [name, colour], "p2": [name, colour]}  -> {"ok": true, "game": id}
+    {"op": "new", ..., "rules": [length, max_height, win_captures]}
+    {"op": "move", "game": id, "name": n, "start": [r, c], "destination": [r, c],
+     "pieces": k}                                               -> {"ok": true, "result": ...}
+    {"op": "reserve", "game": id, "name": n, "location": [r, c]} -> {"ok": true, "result": ...}
+    {"op": "show", "game": id, "position": [r, c]}              -> {"ok": true, "result": [...]}
+    {"op": "hint", "game": id}       -> {"ok": true, "result": [start, destination, pieces]}
+    {"op": "batch", "game": id, "moves": [[name, start, destination, pieces], ...],
+     "validate": false}                                         -> {"ok": true, "result": [...]}
+    {"op": "close", "game": id}                                 -> {"ok": true}
+    {"op": "watch", "game": id}      -> spectator.Feed messages, one per line, until close
+
+result is what the FocusGame method returned. A hint is the opening book's move for
+the player to move, null when the host has no book or the position is not in it.
+A batch is made with FocusGame.apply_moves, start null for a reserve move, and its
+result is the list of MOVE_ codes, "validate": true only checks the moves. A watch
+request turns its connection into a one way stream of the game's feed, starting at
+the latest keyframe; one Feed per watched game serves every watcher. An "id" in a
+request is copied into its response. Games are quiet, so each call is a few
+microseconds of work and runs on the event loop directly. Each connection reads its
+next request only after the previous response is written below the transport's high
+water mark, so a client that stops reading stops being served instead of growing
+server memory. Started with --log, every open game is recorded in an
+eventlog.GameLog whose records go to its writer thread every SYNC_MS, so fsync never
+runs on the loop, and a restarted host recovers the games the log has open under
+their ids. Once a write fails every request that would change a game is refused
+with "log failed", so no game gets ahead of its log.
+
+    python server.py serve --port 8765 --book book.bin --log games.log
+    python server.py load --port 8765 --games 1000 --connections 50 --moves 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from FocusGame import FocusGame, DEFAULT_RULES, check_player
+from book import OpeningBook
+from eventlog import GameLog, recover, compact
+from spectator import Feed
+
+HIGH_WATER = 64 * 1024
+LINE_LIMIT = 64 * 1024
+# largest board length, max_height and captures to win a client can ask for
+RULE_LIMITS = (32, 16, 1000)
+SYNC_MS = 50
+# ops that change a game, refused once the log has failed so no move goes unlogged
+WRITES = ("new", "move", "reserve", "batch", "close")
+
+
+class GameHost:
+    """
+    Represents the games being played, by id, and answers requests about them
+    """
+
+    def __init__(self, book=None, log=None):
+        # initializes games, the id counter, the OpeningBook hints come from and the
+        # GameLog games are recorded in
+        self._games = {}
+        self._ids = itertools.count(1)
+        self._book = book
+        self._log = log
+        self._feeds = {}
+
+    def adopt(self, games):
+        """
+        takes over games recovered from the log, already in it, under their ids; new
+        games get ids after the largest
+        :param games: dict of quiet FocusGame objects by id, as eventlog.recover returns
+        """
+        for game_id, game in games.items():
+            self._games[game_id] = game
+            if self._log is not None:
+                self._log.follow(game_id, game, False)
+        self._ids = itertools.count(max(self._games, default=0) + 1)
+
+    def get_games(self):
+        # returns dict of FocusGame objects by id
+        return self._games
+
+    def handle(self, request):
+        """
+        answers one request
+        :param request: dict decoded from a request line
+        :return: dict response, {"ok": false, "error": ...} for a bad request or a
+                 change refused because the log failed
+        """
+        try:
+            op = request["op"]
+            if op in WRITES and self._log is not None and self._log.get_error() is not None:
+                return {"ok": False, "error": "log failed"}
+            if op == "new":
+                return self.new_game(request)
+            game = self._games[request["game"]]
+            if op == "close":
+                del self._games[request["game"]]
+                if self._log is not None:
+                    self._log.close_game(request["game"])
+                if request["game"] in self._feeds:
+                    self._feeds.pop(request["game"]).close()
+                return {"ok": True}
+            return self.play(op, game, request)
+        except (KeyError, TypeError, IndexError, ValueError) as error:
+            return {"ok": False, "error": type(error).__name__}
+
+    def play(self, op, game, request):
+        """
+        answers a request about one game
+        :param op: str op of the request
+        :param game: FocusGame object the request is for
+        :param request: dict decoded from a request line
+        :return: dict response
+        """
+        if op == "move":
+            return {"ok": True, "result": game.move_piece(
+                request["name"], tuple(request["start"]),
+                tuple(request["destination"]), request["pieces"])}
+        if op == "reserve":
+            return {"ok": True, "result": game.reserved_move(
+                request["name"], tuple(request["location"]))}
+        if op == "show":
+            return {"ok": True, "result": game.show_pieces(tuple(request["position"]))}
+        if op == "hint":
+            return {"ok": True, "result": self.hint(game)}
+        if op == "batch":
+            return {"ok": True, "result": list(game.apply_moves(
+                [(name, None if start is None else tuple(start), tuple(destination), pieces)
+                 for name, start, destination, pieces in request["moves"]],
+                request.get("validate", False)))}
+        return {"ok": False, "error": "unknown op"}
+
+    def new_game(self, request):
+        """
+        starts a game, rules past RULE_LIMITS are refused so one request cannot make
+        the host build move tables for a huge board, and players check_player refuses
+        before an id is used. The game is only added once the log has its checkpoint
+        :param request: dict of a "new" request
+        :return: dict response with the new game's id
+        """
+        rules = tuple(request.get("rules", DEFAULT_RULES))
+        if len(rules) != 3 or not all(isinstance(value, int) and 1 <= value <= limit
+                                      for value, limit in zip(rules, RULE_LIMITS)):
+            return {"ok": False, "error": "bad rules"}
+        players = tuple(request["p1"]), tuple(request["p2"])
+        try:
+            check_player(players[0]), check_player(players[1])
+        except ValueError:
+            return {"ok": False, "error": "bad players"}
+        game_id = next(self._ids)
+        game = FocusGame(players[0], players[1], True, *rules)
+        if self._log is not None:
+            self._log.follow(game_id, game)
+        self._games[game_id] = game
+        return {"ok": True, "game": game_id}
+
+    def hint(self, game):
+        # returns book move tuple for the player to move in game, None if there is none
+        found = self._book.lookup(game) if self._book is not None else None
+        return found[0] if found is not None else None
+
+    async def serve_client(self, reader, writer):
+        """
+        answers the requests of one connection in order until it closes
+        :param reader: asyncio.StreamReader of the connection
+        :param writer: asyncio.StreamWriter of the connection
+        """
+        writer.transport.set_write_buffer_limits(high=HIGH_WATER)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                feed = self.get_feed(line)
+                if feed is not None:
+                    await self.stream(feed, writer)
+                    break
+                writer.write(self.respond(line))
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def get_feed(self, line):
+        """
+        finds the Feed a watch request asks for, making it on the game's first watcher
+        :param line: encoded request line
+        :return: Feed object, None if line is not a watch request for an open game
+        """
+        if b'"watch"' not in line:
+            return None
+        try:
+            request = json.loads(line)
+            if request["op"] != "watch" or request["game"] not in self._games:
+                return None
+            game_id = request["game"]
+        except (ValueError, TypeError, KeyError):
+            return None
+        if game_id not in self._feeds:
+            self._feeds[game_id] = Feed(self._games[game_id])
+        return self._feeds[game_id]
+
+    async def stream(self, feed, writer):
+        # writes every message of feed to writer as a line until the feed is closed
+        async for message in feed.watch():
+            writer.write(message + b"\n")
+            await writer.drain()
+
+    def respond(self, line):
+        # returns encoded response line for one encoded request line
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return b'{"ok": false, "error": "bad json"}\n'
+        response = self.handle(request) if isinstance(request, dict) else \
+            {"ok": False, "error": "bad request"}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return json.dumps(response).encode() + b"\n"
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        starts listening
+        :return: asyncio.Server object
+        """
+        return await asyncio.start_server(self.serve_client, host, port, limit=LINE_LIMIT)
+
+
+async def request(reader, writer, message):
+    # sends message and returns the decoded response
+    writer.write(json.dumps(message).encode() + b"\n")
+    return json.loads(await reader.readline())
+
+
+async def play_connection(host, port, games, moves, seed, latencies):
+    """
+    plays games over one connection: starts them all, then makes one random legal
+    move in each game per round, picked from a local copy of the game, until it is won
+    :param games: int games to play on this connection
+    :param moves: int moves to make in each game
+    :param latencies: list each request's round trip in seconds is appended to
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+    rng, mirrors = random.Random(seed), {}
+    for _ in range(games):
+        game = FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True)
+        reply = await request(reader, writer, {"op": "new", "p1": ["PlayerA", "R"],
+                                               "p2": ["PlayerB", "G"]})
+        mirrors[reply["game"]] = game
+    for _ in range(moves):
+        for game_id, game in mirrors.items():
+            if game.check_game_over():
+                continue
+            move = rng.choice(game.legal_moves(game.get_turn()))
+            began = time.perf_counter()
+            await request(reader, writer, move_request(game_id, game.get_turn(), move))
+            latencies.append(time.perf_counter() - began)
+            game.make_move(move)
+    for game_id in mirrors:
+        await request(reader, writer, {"op": "close", "game": game_id})
+    writer.close()
+
+
+def move_request(game_id, name, move):
+    # returns request dict for a move tuple
+    if move[0] is None:
+        return {"op": "reserve", "game": game_id, "name": name, "location": move[1]}
+    return {"op": "move", "game": game_id, "name": name, "start": move[0],
+            "destination": move[1], "pieces": move[2]}
+
+
+async def run_load(host, port, games, connections, moves, seed=0):
+    """
+    plays games concurrent games split over connections and measures move latency
+    :return: dict of games, requests, p50_ms, p99_ms and requests_per_second
+    """
+    latencies = []
+    began = time.perf_counter()
+    await asyncio.gather(*[
+        play_connection(host, port, games // connections + (i < games % connections),
+                        moves, seed + i, latencies) for i in range(connections)])
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {"games": games, "requests": len(latencies),
+            "p50_ms": 1000 * latencies[len(latencies) // 2],
+            "p99_ms": 1000 * latencies[int(len(latencies) * 0.99)],
+            "requests_per_second": len(latencies) / elapsed}
+
+
+async def sync_forever(log):
+    # hands log's buffered records to its writer thread every SYNC_MS, until a write
+    # fails and the host stops taking moves
+    while log.get_error() is None:
+        await asyncio.sleep(SYNC_MS / 1000)
+        log.sync()
+
+
+async def serve_forever(host, port, book=None, log_path=None):
+    """
+    runs a GameHost answering hints from OpeningBook book until interrupted
+    :param log_path: str path of the GameLog to recover games from and record them in,
+                     None to keep no log
+    """
+    log, games = None, {}
+    if log_path is not None:
+        games = recover(log_path)
+        compact(log_path, games)
+        log = GameLog(log_path)
+    game_host = GameHost(book, log)
+    game_host.adopt(games)
+    server = await game_host.start(host, port)
+    syncing = asyncio.create_task(sync_forever(log)) if log is not None else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if log is not None:
+            syncing.cancel()
+            log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusGame server and load generator")
+    parser.add_argument("mode", choices=("serve", "load"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--moves", type=int, default=20)
+    parser.add_argument("--book", help="opening book file for hints")
+    parser.add_argument("--log", help="game log file to recover games from and record in")
+    args = parser.parse_args()
+    if args.mode == "serve":
+        asyncio.run(serve_forever(args.host, args.port,
+                                  OpeningBook(args.book) if args.book else None, args.log))
+    for games in args.games if args.mode == "load" else []:
+        print(json.dumps(asyncio.run(run_load(args.host, args.port, games,
+                                              args.connections, args.moves))))
+
+
+if __name__ == "__main__":
+    main()
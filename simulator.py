@@ -0,0 +1,206 @@
+"""
+Batch simulator stepping many independent Focus games at once with NumPy, for
+self-play data generation. Every game is stored the way StackArray stores a tile:
+the height of each stack plus its colours packed as bits (bit i is the colour of
+the i-th piece from the bottom, 0 for p1 and 1 for p2). Needs numpy, which
+FocusGame itself does not.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from FocusGame import FocusGame, StackArray
+
+
+def encode_moves(moves, length=6):
+    """
+    turns FocusGame move tuples into the (N, 4) array BatchSimulator.step takes
+    :param moves: list of (start, destination, num_of_pieces) or (None, location, 1)
+    :param length: int length of the board's sides
+    :return: int64 array of rows (start index, destination index, num_of_pieces, reserve)
+    """
+    rows = []
+    for start, destination, num_of_pieces in moves:
+        begin = 0 if start is None else start[0] * length + start[1]
+        rows.append((begin, destination[0] * length + destination[1],
+                     num_of_pieces, int(start is None)))
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+
+class BatchSimulator:
+    """
+    Represents N games of Focus between two players with different colours, held in
+    arrays: heights and pieces (N x length x length), reserves and captures (N x 2,
+    column 0 for p1), turn (N, 0 while it is p1's turn), done and winner (N, -1 for
+    none). Moves are applied with the same rules as FocusGame.make_move.
+    """
+
+    def __init__(self, num_games, length=6, max_height=5, win_captures=6):
+        """
+        initializes the arrays and puts every game at the starting position
+        :param num_games: int number of games N
+        :param length: int length of the board's sides
+        :param max_height: int of pieces allowed on a tile, at most 16 so a stack and a
+                           moved pile fit 32 bits of pieces (16 bits up to 8)
+        :param win_captures: int captures that win the game
+        """
+        if np is None:
+            raise ImportError("BatchSimulator needs numpy")
+        if max_height > 16:
+            raise ValueError("BatchSimulator stacks are at most 16 pieces high")
+        self._length = length
+        self._max_height = max_height
+        self._win_captures = win_captures
+        self._heights = np.zeros((num_games, length, length), dtype=np.int8)
+        self._pieces = np.zeros((num_games, length, length),
+                                dtype=np.uint16 if max_height <= 8 else np.uint32)
+        self._reserves = np.zeros((num_games, 2), dtype=np.int16)
+        self._captures = np.zeros((num_games, 2), dtype=np.int16)
+        self._turn = np.zeros(num_games, dtype=np.int8)
+        self._done = np.zeros(num_games, dtype=bool)
+        self._winner = np.full(num_games, -1, dtype=np.int8)
+        self._popcount = np.array([bin(i).count("1") for i in range(1 << max_height)],
+                                  dtype=np.int16)
+        self.reset()
+
+    def reset(self, games=None):
+        """
+        puts games back at the layout of Board.initialize_board, tiles in row order
+        going p1, p1, p2, p2
+        :param games: index array or boolean mask of games to reset, None for all
+        """
+        games = slice(None) if games is None else games
+        layout = (np.arange(self._length * self._length) % 4 >= 2)
+        self._heights[games] = 1
+        self._pieces[games] = layout.reshape(self._length, self._length)
+        self._reserves[games] = 0
+        self._captures[games] = 0
+        self._turn[games] = 0
+        self._done[games] = False
+        self._winner[games] = -1
+
+    def get_heights(self):
+        # returns (N, length, length) array of stack heights
+        return self._heights
+
+    def get_pieces(self):
+        # returns (N, length, length) array of packed stack colours
+        return self._pieces
+
+    def get_reserves(self):
+        # returns (N, 2) array of reserve counts, column 0 for p1
+        return self._reserves
+
+    def get_captures(self):
+        # returns (N, 2) array of captured counts, column 0 for p1
+        return self._captures
+
+    def get_turn(self):
+        # returns (N,) array, 0 while it is p1's turn and 1 for p2's
+        return self._turn
+
+    def get_done(self):
+        # returns (N,) boolean array of games that are won
+        return self._done
+
+    def get_winner(self):
+        # returns (N,) array of 0 for p1, 1 for p2 or -1 while playing
+        return self._winner
+
+    def step(self, moves):
+        """
+        applies one move to every game that is not done. Moves must be legal for the
+        player to move, they are not validated, like FocusGame.make_move
+        :param moves: (N, 4) int array from encode_moves
+        :return: tuple of float32 rewards (1.0 for a move that wins) and done flags
+        """
+        moves = np.asarray(moves, dtype=np.int64)
+        games = np.flatnonzero(~self._done)
+        start, end, num, reserve = moves[games].T
+        turn = self._turn[games].astype(np.int64)
+        pile, pile_height = self.lift(games, start, num, reserve.astype(bool), turn)
+        self.drop(games, end, pile, pile_height, turn)
+        wins = self._captures[games, turn] >= self._win_captures
+        self._done[games[wins]] = True
+        self._winner[games[wins]] = turn[wins]
+        self._turn[games] = np.where(wins, turn, 1 - turn)
+        rewards = np.zeros(len(self._done), dtype=np.float32)
+        rewards[games[wins]] = 1.0
+        return rewards, self._done.copy()
+
+    def lift(self, games, start, num, reserve, turn):
+        """
+        takes the moved pieces off their start tile, or out of the mover's reserve
+        :return: tuple of the pile's packed bits and heights
+        """
+        heights = self._heights.reshape(len(self._done), -1)
+        pieces = self._pieces.reshape(len(self._done), -1)
+        board = ~reserve
+        g, s, n = games[board], start[board], num[board]
+        keep = heights[g, s].astype(np.int64) - n
+        bits = pieces[g, s].astype(np.int64)
+        pile = np.where(reserve, turn, 0)
+        pile[board] = bits >> keep
+        pieces[g, s] = bits & ((1 << keep) - 1)
+        heights[g, s] = keep
+        self._reserves[games[reserve], turn[reserve]] -= 1
+        return pile, np.where(reserve, 1, num)
+
+    def drop(self, games, end, pile, pile_height, turn):
+        """
+        stacks the piles on their destination tiles, removes pieces over _max_height
+        from the bottom and adds them to the mover's reserves (own colour) or
+        captures (other colour), as FocusGame.trim_destination does
+        :return: number of pieces removed per game
+        """
+        heights = self._heights.reshape(len(self._done), -1)
+        pieces = self._pieces.reshape(len(self._done), -1)
+        height = heights[games, end].astype(np.int64)
+        bits = pieces[games, end].astype(np.int64) | (pile << height)
+        total = height + pile_height
+        over = np.maximum(total - self._max_height, 0)
+        ones = self._popcount[bits & ((1 << over) - 1)]
+        own = np.where(turn == 1, ones, over - ones)
+        pieces[games, end] = bits >> over
+        heights[games, end] = total - over
+        self._reserves[games, turn] += own.astype(np.int16)
+        self._captures[games, turn] += (over - own).astype(np.int16)
+        return over
+
+    def get_state(self, game, p1, p2):
+        """
+        returns game in the form of FocusGame.get_state
+        :param game: int index of the game
+        :param p1: tuple of p1's name and colour
+        :param p2: tuple of p2's name and colour
+        :return: tuple for FocusGame.from_state
+        """
+        heights = self._heights[game].ravel().astype(np.int64)
+        cells = self._pieces[game].ravel().astype(np.int64) | (1 << heights)
+        counts = (int(self._reserves[game, 0]), int(self._captures[game, 0]),
+                  int(self._reserves[game, 1]), int(self._captures[game, 1]))
+        width = "<u%d" % StackArray.cell_width(self._max_height)
+        return (p1, p2, cells.astype(width).tobytes(), counts, int(self._turn[game]),
+                (self._length, self._max_height, self._win_captures))
+
+    def to_game(self, game, p1, p2):
+        # returns FocusGame object in the position of game
+        return FocusGame.from_state(self.get_state(game, p1, p2))
+
+    def set_game(self, game, focus_game):
+        """
+        copies the position of focus_game into game
+        :param game: int index of the game
+        :param focus_game: FocusGame object of the same board size
+        """
+        state = focus_game.get_state()
+        width = "<u%d" % StackArray.cell_width(self._max_height)
+        cells = np.frombuffer(state[2], dtype=width).astype(np.int64)
+        heights = np.array([int(cell).bit_length() - 1 for cell in cells])
+        self._heights[game] = heights.reshape(self._length, self._length)
+        self._pieces[game] = (cells ^ (1 << heights)).reshape(self._length, self._length)
+        self._reserves[game] = state[3][0], state[3][2]
+        self._captures[game] = state[3][1], state[3][3]
+        self._turn[game] = state[4]
+        self._done[game] = False
+        self._winner[game] = -1
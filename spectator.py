@@ -0,0 +1,235 @@
+"""
+Change feed of one FocusGame for spectators. Feed listens to the game's events and
+after every move_piece/reserved_move publishes a delta holding only what the move
+changed, and every keyframe_every moves a keyframe holding the whole game. Each
+message is encoded to JSON once and the same bytes go to every watcher:
+
+    {"seq": 12, "tiles": [[index, cell], ...], "counts": [...], "turn": name}
+    {"seq": 12, "keyframe": true, "players": [[name, colour], [name, colour]],
+     "rules": [length, max_height, win], "cells": [cell, ...], "counts": [...],
+     "turn": name, "winner": null}
+
+seq counts the moves made since the feed started, a keyframe carries the seq of the
+last move it includes. Tiles are cells in the StackArray format: index is row *
+length + column, bit i of cell is the colour of the i-th piece from the bottom (0
+for p1's colour, 1 for p2's) under a sentinel bit. counts are p1 reserves, p1
+captures, p2 reserves and p2 captures and are only in a delta if they changed, as
+is turn; winner is only in a delta once somebody has won.
+
+Feed keeps the messages since the latest keyframe. A watcher starts at that
+keyframe and async iterates from there; one that falls more than a keyframe behind
+skips ahead to the latest keyframe, so a slow watcher never makes the feed hold
+more than keyframe_every deltas. Every watcher waits on one shared future, so a
+move wakes thousands of watchers without a queue per watcher.
+"""
+import asyncio
+import json
+from events import MoveApplied
+
+KEYFRAME_EVERY = 32
+
+
+def encode(message):
+    # returns message dict as compact JSON bytes
+    return json.dumps(message, separators=(",", ":")).encode()
+
+
+class Feed:
+    """
+    Represents the stream of deltas and keyframes of one game, a listener for
+    FocusGame.subscribe. Publishing and watching happen on one event loop
+    """
+
+    def __init__(self, game, keyframe_every=KEYFRAME_EVERY):
+        """
+        subscribes to game and publishes its first keyframe
+        :param game: FocusGame object to follow
+        :param keyframe_every: int moves between keyframes
+        """
+        self._game = game
+        self._keyframe_every = keyframe_every
+        self._seq = 0
+        self._messages = []
+        self._first = 0
+        self._waiter = None
+        self._closed = False
+        self._counts, self._turn = game.get_state()[3], game.get_turn()
+        self.publish(self.keyframe(), True)
+        game.subscribe(self)
+
+    def get_seq(self):
+        # returns int number of moves published
+        return self._seq
+
+    def get_first(self):
+        # returns int message number of the latest keyframe, where watchers start
+        return self._first
+
+    def get_keyframe(self):
+        # returns encoded latest keyframe
+        return self._messages[0]
+
+    def get_messages(self):
+        # returns list of encoded messages since and including the latest keyframe
+        return self._messages
+
+    def __call__(self, event):
+        # publishes the delta of a move when its MoveApplied event comes in
+        if not isinstance(event, MoveApplied) or self._closed:
+            return
+        self._seq += 1
+        self.publish(self.delta(event))
+        if self._seq % self._keyframe_every == 0:
+            self.publish(self.keyframe(), True)
+
+    def delta(self, event):
+        """
+        makes the message for a move that was just made
+        :param event: MoveApplied event of the move
+        :return: encoded delta
+        """
+        game, cells = self._game, self._game.get_board().get_stacks().get_cells()
+        length = game.get_rules()[0]
+        positions = [event.get_destination()] if event.get_start() is None else \
+            [event.get_start(), event.get_destination()]
+        message = {"seq": self._seq, "tiles": [
+            [row * length + column, cells[row * length + column]] for row, column in positions]}
+        counts = game.get_state()[3]
+        if counts != self._counts:
+            message["counts"], self._counts = list(counts), counts
+        if game.get_turn() != self._turn:
+            message["turn"] = self._turn = game.get_turn()
+        if game.check_win(event.get_name()):
+            message["winner"] = event.get_name()
+        return encode(message)
+
+    def keyframe(self):
+        # returns encoded message of the whole game
+        game = self._game
+        state = game.get_state()
+        winner = [name for name in (state[0][0], state[1][0]) if game.check_win(name)]
+        return encode({"seq": self._seq, "keyframe": True,
+                       "players": [list(state[0]), list(state[1])], "rules": list(state[5]),
+                       "cells": list(game.get_board().get_stacks().get_cells()),
+                       "counts": list(state[3]), "turn": game.get_turn(),
+                       "winner": winner[0] if winner else None})
+
+    def publish(self, message, keyframe=False):
+        """
+        adds message and wakes the watchers, a keyframe drops the messages before it
+        :param message: encoded message
+        :param keyframe: True if message is a keyframe
+        """
+        if keyframe:
+            self._first += len(self._messages)
+            self._messages = []
+        self._messages.append(message)
+        self.wake()
+
+    def wake(self):
+        # resolves the future the watchers are waiting on
+        if self._waiter is not None:
+            self._waiter.set_result(None)
+            self._waiter = None
+
+    async def get_message(self, number):
+        """
+        waits for message number, a number from before the latest keyframe gets the
+        keyframe instead
+        :param number: int message number
+        :return: tuple of the message's number and the encoded message, raises
+                 StopAsyncIteration once the feed is closed and every message was read
+        """
+        while True:
+            number = max(number, self._first)
+            if number < self._first + len(self._messages):
+                return number, self._messages[number - self._first]
+            if self._closed:
+                raise StopAsyncIteration
+            if self._waiter is None:
+                self._waiter = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._waiter)
+
+    def watch(self):
+        # returns new Watcher starting at the latest keyframe
+        return Watcher(self)
+
+    def close(self):
+        # stops following the game and ends every watcher after its last message
+        if not self._closed:
+            self._closed = True
+            self._game.unsubscribe(self)
+            self.wake()
+
+
+class Watcher:
+    """
+    Represents one spectator's place in a Feed, an async iterator of encoded messages
+    """
+
+    def __init__(self, feed):
+        # initializes the feed and the number of the next message, the latest keyframe
+        self._feed = feed
+        self._next = feed.get_first()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        number, message = await self._feed.get_message(self._next)
+        self._next = number + 1
+        return message
+
+
+class Spectator:
+    """
+    Represents a spectator's copy of a game rebuilt from feed messages: a keyframe
+    sets everything, a delta changes only what it holds
+    """
+
+    def __init__(self):
+        # initializes an empty view, the first message applied must be a keyframe
+        self._cells = []
+        self._counts = []
+        self._turn = None
+        self._winner = None
+        self._seq = None
+
+    def apply(self, message):
+        """
+        applies one message to the view
+        :param message: encoded message from a Feed
+        :return: True if it was applied, False for a delta that does not follow seq
+        """
+        message = json.loads(message)
+        if message.get("keyframe"):
+            self._cells, self._winner = list(message["cells"]), message["winner"]
+        elif self._seq is None or message["seq"] != self._seq + 1:
+            return False
+        for index, cell in message.get("tiles", ()):
+            self._cells[index] = cell
+        self._counts = message.get("counts", self._counts)
+        self._turn = message.get("turn", self._turn)
+        self._winner = message.get("winner", self._winner)
+        self._seq = message["seq"]
+        return True
+
+    def get_cells(self):
+        # returns list of packed cells
+        return self._cells
+
+    def get_counts(self):
+        # returns list of p1 reserves, p1 captures, p2 reserves, p2 captures
+        return self._counts
+
+    def get_turn(self):
+        # returns name of the player to move
+        return self._turn
+
+    def get_winner(self):
+        # returns name of the winner, None if nobody has won
+        return self._winner
+
+    def get_seq(self):
+        # returns seq of the last message applied
+        return self._seq
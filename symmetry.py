@@ -0,0 +1,161 @@
+"""
+Symmetry of Focus positions. The starting layout looks the same after some turns
+and reflections of the board, and a position with the colours swapped (every
+piece, the counts and the turn) plays the same for the player to move, so caches,
+opening books and game databases only need one entry per class of equivalent
+positions. A transform is (index into TRANSFORMS, swap colours), canonical_form
+picks the least key of the 16 transforms of a position and returns the transform
+that led there, so moves can be mapped to the canonical position and back:
+
+    key, transform = canonical_form(game)
+    book[key] = transform_move(move, transform, length)           # store
+    move = transform_move(book[key], inverse(transform), length)  # look up
+
+    python symmetry.py 3     distinct positions with and without symmetry per depth
+"""
+import struct
+import sys
+from FocusGame import FocusGame, StackArray
+
+_COUNTS = struct.Struct("<B4H")
+
+# the 8 turns and reflections of a length x length board, each maps (row, column)
+TRANSFORMS = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n - 1 - r),
+    lambda r, c, n: (n - 1 - r, n - 1 - c),
+    lambda r, c, n: (n - 1 - c, r),
+    lambda r, c, n: (r, n - 1 - c),
+    lambda r, c, n: (n - 1 - r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n - 1 - c, n - 1 - r),
+)
+# index of the transform undoing each one, the quarter turns undo each other
+_INVERSES = (0, 3, 2, 1, 4, 5, 6, 7)
+
+_sources = {}
+
+
+def get_sources(length):
+    """
+    returns for each transform the list of source cell indexes, so cells[sources[i]]
+    is the cell the transform moves to index i, built once per board length
+    :param length: int length of the board's sides
+    :return: list of 8 lists of ints
+    """
+    if length not in _sources:
+        _sources[length] = []
+        for transform in TRANSFORMS:
+            sources = [0] * (length * length)
+            for index in range(length * length):
+                row, column = transform(*divmod(index, length), length)
+                sources[row * length + column] = index
+            _sources[length].append(sources)
+    return _sources[length]
+
+
+def swap_cell(cell):
+    # returns packed cell with every piece's colour bit flipped, the sentinel kept
+    return cell ^ ((1 << (cell.bit_length() - 1)) - 1)
+
+
+def inverse(transform):
+    # returns transform undoing transform
+    return _INVERSES[transform[0]], transform[1]
+
+
+def transform_move(move, transform, length):
+    """
+    maps a move to the same move on the transformed board, swapping colours does not
+    move anything
+    :param move: (start, destination, num_of_pieces) or (None, location, 1)
+    :param transform: tuple of index into TRANSFORMS and swap colours
+    :param length: int length of the board's sides
+    :return: move tuple
+    """
+    start, destination, num_of_pieces = move
+    turn = TRANSFORMS[transform[0]]
+    return (None if start is None else turn(*start, length), turn(*destination, length),
+            num_of_pieces)
+
+
+def transform_position(cells, counts, turn, transform, length):
+    """
+    applies transform to a position
+    :param cells: sequence of packed cells, index row * length + column
+    :param counts: p1 reserves, p1 captures, p2 reserves, p2 captures
+    :param turn: 0 for p1's turn, 1 for p2's
+    :param transform: tuple of index into TRANSFORMS and swap colours
+    :param length: int length of the board's sides
+    :return: tuple of the transformed cells tuple, counts tuple and turn
+    """
+    cells = tuple(cells[index] for index in get_sources(length)[transform[0]])
+    if transform[1]:
+        return tuple(swap_cell(cell) for cell in cells), tuple(counts[2:4]) + \
+            tuple(counts[0:2]), 1 - turn
+    return cells, tuple(counts), turn
+
+
+def canonical_form(game):
+    """
+    finds the canonical representative of game's position, the one with the least
+    (turn, counts, cells) of its 16 transforms
+    :param game: FocusGame object
+    :return: tuple of key bytes (turn byte, 4 counts as 2 byte little endian ints,
+             then the cells), equal for equivalent positions of one board shape, and
+             the transform taking game's position to the canonical one
+    """
+    length = game.get_rules()[0]
+    cells = game.get_board().get_stacks().get_cells()
+    state = game.get_state()
+    best = None
+    for swap in (False, True):
+        for index in range(len(TRANSFORMS)):
+            position = transform_position(cells, state[3], state[4], (index, swap), length)
+            candidate = (position[2], position[1], position[0])
+            if best is None or candidate < best[0]:
+                best = candidate, (index, swap)
+    (turn, counts, cells), transform = best
+    width = StackArray.cell_width(game.get_rules()[1])
+    return _COUNTS.pack(turn, *counts) + b"".join(
+        cell.to_bytes(width, "little") for cell in cells), transform
+
+
+def reduction(depth, game=None):
+    """
+    walks every line of play depth moves deep and counts distinct positions at each
+    depth with and without symmetry
+    :param depth: int moves to look ahead
+    :param game: FocusGame object to start from, None for the standard start
+    :return: list of (depth, distinct positions, distinct canonical positions)
+    """
+    game = game or FocusGame(("PlayerA", "R"), ("PlayerB", "G"), quiet=True)
+    level, rows = {game.position_key(): game.get_state()}, []
+    for ply in range(depth + 1):
+        canonical = {canonical_form(FocusGame.from_state(state))[0]
+                     for state in level.values()}
+        rows.append((ply, len(level), len(canonical)))
+        if ply < depth:
+            level = next_level(level)
+    return rows
+
+
+def next_level(level):
+    # returns dict of position_key to get_state of every position one move after level
+    children = {}
+    for state in level.values():
+        game = FocusGame.from_state(state)
+        name = game.get_turn()
+        if any(game.check_win(player.get_name()) for player in (game.get_p1(), game.get_p2())):
+            continue
+        for move in game.legal_moves(name):
+            token = game.make_move(move)
+            children.setdefault(game.position_key(), game.get_state())
+            game.unmake_move(token)
+    return children
+
+
+if __name__ == "__main__":
+    print("depth  positions  canonical  reduction")
+    for ply, plain, canonical in reduction(int(sys.argv[1]) if len(sys.argv) > 1 else 3):
+        print("%5d %10d %10d %9.2fx" % (ply, plain, canonical, plain / canonical))
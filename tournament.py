@@ -0,0 +1,267 @@
+"""
+Self-play tournaments between bots. A player is a picklable callable taking a
+FocusGame and the name of the player to move and returning a move tuple; it must
+leave the game as it found it. Every pair of players meets games_per_pairing
+times, taking turns at being p1 (who moves first), the games are played across a
+process pool and each result is appended to a JSON lines file as soon as it
+finishes. A worker that dies only loses the games it was playing: the pool is
+started again and each of those games is played again on its own, so a game that
+keeps killing its worker is found and recorded as crashed after MAX_ATTEMPTS tries
+without taking the others down with it. A run pointed at an existing results file
+skips the games already in it. An illegal move or an exception
+loses the game.
+
+    python tournament.py --players random greedy engine --games 100 --output results.jsonl
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from FocusGame import FocusGame, DEFAULT_RULES
+from engine import best_move
+
+MAX_PLIES = 400
+MAX_ATTEMPTS = 3
+
+
+def random_player(game, name):
+    # returns a random legal move
+    return random.choice(game.legal_moves(name))
+
+
+def greedy_player(game, name):
+    # returns the move capturing the most pieces, a random one among equals
+    moves = game.legal_moves(name)
+    random.shuffle(moves)
+    return max(moves, key=game.count_captures)
+
+
+def engine_player(game, name, time_limit_ms=20):
+    # returns Engine's best move after searching time_limit_ms
+    return best_move(game, time_limit_ms)
+
+
+PLAYERS = {
+    "random": random_player,
+    "greedy": greedy_player,
+    "engine": functools.partial(engine_player, time_limit_ms=20),
+}
+
+
+def schedule(names, games_per_pairing, seed=0):
+    """
+    makes the jobs of a round robin, p1 alternating within each pairing
+    :param names: list of player names
+    :param games_per_pairing: int games each pair of players plays
+    :param seed: int the games' random seeds are drawn from
+    :return: list of (game id, p1 name, p2 name, seed) tuples
+    """
+    rng, jobs = random.Random(seed), []
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            for game in range(games_per_pairing):
+                p1, p2 = (first, second) if game % 2 == 0 else (second, first)
+                jobs.append(("%s-%s-%d" % (first, second, game), p1, p2, rng.getrandbits(32)))
+    return jobs
+
+
+def play_game(job, players, max_plies=MAX_PLIES, rules=DEFAULT_RULES):
+    """
+    plays one game, runs in a worker process
+    :param job: tuple from schedule
+    :param players: dict of name to player callable for the job's two names
+    :return: dict result: game id, p1, p2, winner (None for a draw after
+             max_plies), plies, seconds and reason ("win", "draw", "illegal move"
+             or "error")
+    """
+    game_id, p1, p2, seed = job
+    random.seed(seed)
+    game = FocusGame((p1, "R"), (p2, "G"), True, *rules)
+    result = {"game": game_id, "p1": p1, "p2": p2, "winner": None, "plies": 0,
+              "reason": "draw"}
+    began = time.perf_counter()
+    while result["plies"] < max_plies and result["reason"] == "draw":
+        name = game.get_turn()
+        result["winner"], result["reason"] = play_turn(game, name, players[name])
+        result["plies"] += 1
+    if result["reason"] in ("illegal move", "error"):
+        result["winner"] = p2 if result["winner"] == p1 else p1
+    result["seconds"] = time.perf_counter() - began
+    return result
+
+
+def play_turn(game, name, player):
+    """
+    asks player for a move and makes it
+    :return: tuple of name and "win" if it won, name and the reason if the player
+             loses by its move, (None, "draw") otherwise
+    """
+    try:
+        move = player(game, name)
+    except Exception:
+        return name, "error"
+    if move not in game.legal_moves(name):
+        return name, "illegal move"
+    game.make_move(move)
+    return (name, "win") if game.check_win(name) else (None, "draw")
+
+
+def read_results(path):
+    # returns list of result dicts already in the JSON lines file at path, [] if none
+    if not os.path.exists(path):
+        return []
+    with open(path) as stream:
+        return [json.loads(line) for line in stream if line.endswith("\n")]
+
+
+def drop_torn_line(path):
+    # cuts a last line a crash left without its newline off the file at path, if any
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as stream:
+        data = stream.read()
+    if data and not data.endswith(b"\n"):
+        os.truncate(path, data.rfind(b"\n") + 1)
+
+
+def run(players, games_per_pairing, output, workers=None, seed=0, max_plies=MAX_PLIES):
+    """
+    plays the tournament, appending each result to output as it comes in
+    :param players: dict of name to player callable
+    :param games_per_pairing: int games each pair of players plays
+    :param output: str path of the JSON lines results file, games in it are skipped
+    :param workers: int worker processes, None for one per CPU
+    :return: list of every result dict, the ones from earlier runs included
+    """
+    drop_torn_line(output)
+    results = read_results(output)
+    done = {result["game"] for result in results}
+    pending = {job[0]: job for job in schedule(sorted(players), games_per_pairing, seed)
+               if job[0] not in done}
+    attempts = dict.fromkeys(pending, 0)
+    with open(output, "a") as stream:
+        while pending:
+            suspects = [game_id for game_id in pending if attempts[game_id]]
+            jobs = [pending[suspects[0]]] if suspects else list(pending.values())
+            started = set()
+            for result in play_pool(jobs, players, 1 if suspects else workers, max_plies,
+                                    started):
+                record(stream, results, result)
+                pending.pop(result["game"])
+            for game_id in started & set(pending):
+                attempts[game_id] += 1
+                if attempts[game_id] >= MAX_ATTEMPTS:
+                    record(stream, results, crashed_result(pending.pop(game_id)))
+    return results
+
+
+def play_pool(jobs, players, workers, max_plies, started):
+    """
+    plays jobs in a new process pool, keeping a few per worker in flight
+    :param started: set the id of each job is added to when it is handed to a worker
+    :return: generator of result dicts, it ends early if a worker process dies
+    """
+    workers = workers or os.cpu_count() or 1
+    queue, running, broken = list(reversed(jobs)), set(), False
+    with ProcessPoolExecutor(workers) as pool:
+        while (queue or running) and not broken:
+            try:
+                while queue and len(running) < 4 * workers:
+                    job = queue.pop()
+                    started.add(job[0])
+                    running.add(pool.submit(play_game, job, {name: players[name] for name
+                                                             in job[1:3]}, max_plies))
+            except BrokenProcessPool:
+                broken = True
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if isinstance(future.exception(), BrokenProcessPool):
+                    broken = True
+                else:
+                    yield future.result()
+
+
+def crashed_result(job):
+    # returns result dict for a game whose worker died every time it was played
+    return {"game": job[0], "p1": job[1], "p2": job[2], "winner": None, "plies": 0,
+            "reason": "crashed", "seconds": 0.0}
+
+
+def record(stream, results, result):
+    # appends result to results and as a line to stream, flushed so it survives a crash
+    results.append(result)
+    stream.write(json.dumps(result) + "\n")
+    stream.flush()
+
+
+def summarize(results):
+    """
+    tallies each pairing, crashed games are left out
+    :param results: list of result dicts
+    :return: dict of "a vs b" (names sorted) to dict of games, wins of a, wins of b,
+             draws, a's score rate (draws count half) and a's Elo difference
+    """
+    pairings = {}
+    for result in results:
+        if result["reason"] == "crashed":
+            continue
+        a, b = sorted((result["p1"], result["p2"]))
+        tally = pairings.setdefault("%s vs %s" % (a, b), {"games": 0, a: 0, b: 0, "draws": 0})
+        tally["games"] += 1
+        tally[result["winner"] if result["winner"] else "draws"] += 1
+    for pairing, tally in pairings.items():
+        a = pairing.split(" vs ")[0]
+        tally["score"] = (tally[a] + tally["draws"] / 2) / tally["games"]
+        tally["elo"] = elo_difference(tally["score"])
+    return pairings
+
+
+def elo_difference(score):
+    # returns Elo difference giving expected score, clamped to about +-800 for 0 and 1
+    score = min(max(score, 0.01), 0.99)
+    return round(-400 * math.log10(1 / score - 1), 1)
+
+
+def elo_ratings(results, iterations=500, step=16.0):
+    """
+    fits one Elo rating per player to every game at once, so players that never
+    met are still comparable, by gradient steps on the logistic Elo model
+    :param results: list of result dicts
+    :return: dict of name to rating, averaging 0
+    """
+    games = [(r["p1"], r["p2"], 1.0 if r["winner"] == r["p1"] else
+              0.0 if r["winner"] == r["p2"] else 0.5)
+             for r in results if r["reason"] != "crashed"]
+    ratings = {name: 0.0 for game in games for name in game[:2]}
+    for _ in range(iterations):
+        change = dict.fromkeys(ratings, 0.0)
+        for p1, p2, score in games:
+            error = score - 1 / (1 + 10 ** ((ratings[p2] - ratings[p1]) / 400))
+            change[p1] += error
+            change[p2] -= error
+        for name in ratings:
+            ratings[name] += step * change[name] / max(1, len(games)) * len(ratings)
+    mean = sum(ratings.values()) / max(1, len(ratings))
+    return {name: round(rating - mean, 1) for name, rating in ratings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Focus bot tournament")
+    parser.add_argument("--players", nargs="+", choices=sorted(PLAYERS), default=sorted(PLAYERS))
+    parser.add_argument("--games", type=int, default=100, help="games per pairing")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="results.jsonl")
+    args = parser.parse_args()
+    results = run({name: PLAYERS[name] for name in args.players}, args.games, args.output,
+                  args.workers, args.seed)
+    print(json.dumps({"pairings": summarize(results), "elo": elo_ratings(results)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
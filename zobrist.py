@@ -0,0 +1,170 @@
+"""
+Zobrist hashing for FocusGame positions and a bounded transposition table that lets
+search and analysis skip positions they have already evaluated.
+"""
+import random
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# tallest stacks that get every cell key drawn up front, 1 << 8 keys per cell
+DENSE_HEIGHT = 7
+
+_keys_cache = {}
+
+
+def get_keys(size, max_height, max_count):
+    """
+    returns the ZobristKeys for a board of size cells, built once per shape and shared
+    by every game so creating a FocusGame does not draw thousands of random numbers
+    :param size: int number of cells on the board
+    :param max_height: int of pieces allowed on a tile
+    :param max_count: int highest reserve or captured count a player can reach
+    :return: ZobristKeys object
+    """
+    shape = (size, max_height, max_count)
+    if shape not in _keys_cache:
+        _keys_cache[shape] = ZobristKeys(size, max_height, max_count)
+    return _keys_cache[shape]
+
+
+class ZobristKeys:
+    """
+    Represents the random 64 bit keys XORed together into a position hash: one for
+    every (cell index, packed cell) pair, one for every (player, reserve count) and
+    (player, captured count) pair and one for p2 to move. The keys come from a fixed
+    seed so every process gives the same position the same hash.
+    Communicates with FocusGame, which keeps its hash up to date in make_move.
+    """
+
+    def __init__(self, size, max_height, max_count, seed=0x466f637573):
+        """
+        draws the keys, a cell at rest holds at most max_height pieces so its packed
+        value is below 1 << (max_height + 1). Past DENSE_HEIGHT that is too many keys
+        to draw up front, so each cell gets a LazyKeys drawing keys as they are used
+        """
+        rng = random.Random(seed)
+        if max_height <= DENSE_HEIGHT:
+            self._cell_keys = [[rng.getrandbits(64) for _ in range(1 << (max_height + 1))]
+                               for _ in range(size)]
+        else:
+            self._cell_keys = [LazyKeys(seed, index) for index in range(size)]
+        self._reserve_keys = [[rng.getrandbits(64) for _ in range(max_count + 1)]
+                              for _ in range(2)]
+        self._captured_keys = [[rng.getrandbits(64) for _ in range(max_count + 1)]
+                               for _ in range(2)]
+        self._turn_key = rng.getrandbits(64)
+
+    def get_cell_keys(self):
+        # returns list of key lists, _cell_keys[index][cell]
+        return self._cell_keys
+
+    def get_reserve_keys(self):
+        # returns list of key lists, _reserve_keys[side][count], side 0 for p1
+        return self._reserve_keys
+
+    def get_captured_keys(self):
+        # returns list of key lists, _captured_keys[side][count], side 0 for p1
+        return self._captured_keys
+
+    def get_turn_key(self):
+        # returns key XORed in while it is p2's turn
+        return self._turn_key
+
+
+class LazyKeys(dict):
+    """
+    Represents the keys of one cell on a board with tall stacks, indexed by packed
+    cell like the key lists of short stacks. A key is drawn from a generator seeded
+    with the seed, cell index and packed cell the first time it is looked up, so
+    every process still gives a position the same hash.
+    """
+
+    def __init__(self, seed, index):
+        # initializes seed and index of the cell
+        super().__init__()
+        self._seed = seed
+        self._index = index
+
+    def __missing__(self, cell):
+        # draws, keeps and returns the key of packed cell
+        key = random.Random("%d:%d:%d" % (self._seed, self._index, cell)).getrandbits(64)
+        self[cell] = key
+        return key
+
+
+class TranspositionTable:
+    """
+    Represents a fixed number of slots (a power of 2) holding search results by
+    position hash. Each entry is a tuple (key, depth, score, flag, move, age) where flag
+    is EXACT, LOWER or UPPER. A slot is replaced when it is empty, holds the same
+    position, was stored during an older search or was searched less deeply, so deep
+    results from the current search survive. Counts hits and misses on get.
+    """
+
+    def __init__(self, size=1 << 16):
+        """
+        initializes slots, rounding size down to a power of 2 so the slot is key & mask
+        :param size: int number of entries kept at most
+        """
+        slots = 1 << max(size, 1).bit_length() - 1
+        self._mask = slots - 1
+        self._slots = [None] * slots
+        self._age = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """
+        looks up the entry for key
+        :param key: int 64 bit position hash
+        :return: entry tuple or None, counted as a hit or miss
+        """
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry[0] == key:
+            self._hits += 1
+            return entry
+        self._misses += 1
+        return None
+
+    def put(self, key, depth, score, flag, move):
+        """
+        stores a search result for key unless the slot holds a deeper result of the
+        same search for another position
+        :param key: int 64 bit position hash
+        :param depth: int depth searched below the position
+        :param score: int score found
+        :param flag: EXACT, LOWER or UPPER
+        :param move: best move tuple or None
+        """
+        slot = key & self._mask
+        entry = self._slots[slot]
+        if entry is None or entry[0] == key or entry[5] != self._age or entry[1] <= depth:
+            self._slots[slot] = (key, depth, score, flag, move, self._age)
+
+    def new_search(self):
+        # ages every stored entry so the next search may replace them
+        self._age += 1
+
+    def clear(self):
+        # empties every slot and resets the counters
+        self._slots = [None] * len(self._slots)
+        self._hits = 0
+        self._misses = 0
+
+    def get_hits(self):
+        # returns number of get calls that found their key
+        return self._hits
+
+    def get_misses(self):
+        # returns number of get calls that did not find their key
+        return self._misses
+
+    def get_size(self):
+        # returns number of slots
+        return len(self._slots)
+
+    def __len__(self):
+        # returns number of slots in use
+        return len(self._slots) - self._slots.count(None)